@@ -0,0 +1,136 @@
+"""
+Flat, array-backed representation of the AST.
+"""
+from array import array
+from typing import Dict, Iterable, List, Optional
+from .lexer import TokenType
+from .parser import (ASTNode, AssignNode, BinOpNode, IfNode, NumNode, PrintNode,
+                     UnaryOpNode, VarNode, WhileNode, postorder)
+
+# Node kinds
+NUM, VAR, BIN_OP, UNARY_OP, ASSIGN, PRINT, IF, BRANCHES, WHILE, BLOCK = range(10)
+
+# Meaning of the columns for each kind:
+#   NUM       op: literal token type, value: constant, line
+#   VAR       value: name, line
+#   BIN_OP    op: operator token type, child0: left, child1: right, line
+#   UNARY_OP  op: operator token type, child0: operand, line
+#   ASSIGN    child0: VAR target, child1: expression
+#   PRINT     child0: expression
+#   IF        child0: condition, child1: BRANCHES
+#   BRANCHES  child0: then BLOCK, child1: else BLOCK or -1
+#   WHILE     child0: condition, child1: body BLOCK
+#   BLOCK     child0: offset in `items`, child1: number of statements
+
+_TOKEN_TYPES = {token_type.value: token_type for token_type in TokenType}
+
+class NodeArena:
+    """AST stored as parallel arrays, one row per node.
+
+    A node is an integer index; its children are indices too. Literals and
+    names live once in a constant pool. A node costs 18 bytes in the arrays
+    instead of a Python object per node plus the Token it kept alive.
+    """
+
+    def __init__(self):
+        self.kinds = array('B')
+        self.ops = array('B')
+        self.child0 = array('i')
+        self.child1 = array('i')
+        self.values = array('i')
+        self.lines = array('i')
+        self.items = array('i')
+        self.constants: List[object] = []
+        self._constant_ids: Dict[tuple, int] = {}
+        self.root = -1
+
+    def __len__(self) -> int:
+        return len(self.kinds)
+
+    def _new(self, kind: int, op: int = 0, child0: int = -1, child1: int = -1,
+             value: int = -1, line: int = 0) -> int:
+        index = len(self.kinds)
+        self.kinds.append(kind)
+        self.ops.append(op)
+        self.child0.append(child0)
+        self.child1.append(child1)
+        self.values.append(value)
+        self.lines.append(line)
+        return index
+
+    def _constant(self, value) -> int:
+        # The type is part of the key so that 1, 1.0 and True stay apart
+        key = (type(value), value)
+        index = self._constant_ids.get(key)
+        if index is None:
+            index = self._constant_ids[key] = len(self.constants)
+            self.constants.append(value)
+        return index
+
+    def op(self, index: int) -> TokenType:
+        """Operator (or literal) token type of a node."""
+        return _TOKEN_TYPES[self.ops[index]]
+
+    def value(self, index: int):
+        """Constant or name of a NUM or VAR node."""
+        return self.constants[self.values[index]]
+
+    def block(self, index: int) -> array:
+        """Statements of a BLOCK node."""
+        start = self.child0[index]
+        return self.items[start:start + self.child1[index]]
+
+    def add(self, node: ASTNode) -> int:
+        """Copy a statement or expression of the object AST; return its index."""
+        if isinstance(node, AssignNode):
+            return self._new(ASSIGN, child0=self.add_expression(node.left),
+                             child1=self.add_expression(node.right))
+        elif isinstance(node, PrintNode):
+            return self._new(PRINT, child0=self.add_expression(node.value))
+        elif isinstance(node, IfNode):
+            condition = self.add_expression(node.condition)
+            then_body = self.add_block(node.then_body)
+            else_body = self.add_block(node.else_body) if node.else_body is not None else -1
+            return self._new(IF, child0=condition,
+                             child1=self._new(BRANCHES, child0=then_body, child1=else_body))
+        elif isinstance(node, WhileNode):
+            condition = self.add_expression(node.condition)
+            return self._new(WHILE, child0=condition, child1=self.add_block(node.body))
+        return self.add_expression(node)
+
+    def add_expression(self, node: ASTNode) -> int:
+        """Copy an expression of the object AST, without recursion."""
+        indices = []
+        for node in postorder(node):
+            if isinstance(node, BinOpNode):
+                right = indices.pop()
+                indices.append(self._new(BIN_OP, node.op.type.value, indices.pop(), right,
+                                         line=node.op.line))
+            elif isinstance(node, UnaryOpNode):
+                indices.append(self._new(UNARY_OP, node.op.type.value, indices.pop(),
+                                         line=node.op.line))
+            elif isinstance(node, VarNode):
+                indices.append(self._new(VAR, value=self._constant(node.value), line=node.token.line))
+            elif isinstance(node, NumNode):
+                indices.append(self._new(NUM, node.token.type.value, value=self._constant(node.value),
+                                         line=node.token.line))
+            else:
+                raise TypeError(f"Unexpected expression node: {type(node).__name__}")
+        return indices.pop()
+
+    def add_block(self, statements: Iterable) -> int:
+        """Add a BLOCK of statements. Nested lists are flattened and None skipped,
+        as IntermediateCodeGenerator.generate() does."""
+        indices = array('i', (self.add(node) for node in _flatten(statements)))
+        # Nested blocks were added while converting the statements, so this
+        # block's items are appended last to keep them contiguous
+        start = len(self.items)
+        self.items.extend(indices)
+        return self._new(BLOCK, child0=start, child1=len(indices))
+
+def _flatten(statements: Optional[Iterable]):
+    for node in statements or ():
+        if isinstance(node, list):
+            yield from _flatten(node)
+        elif node is not None:
+            yield node
@@ -0,0 +1,115 @@
+"""
+Binary file format of a NodeArena, loadable without copying through mmap.
+"""
+import hashlib
+import marshal
+import mmap
+import os
+import struct
+import tempfile
+from typing import Union
+from .ast_arena import NodeArena
+from .lexer import TokenType
+
+_MAGIC = b'ASTARENA'
+_FORMAT_VERSION = 1
+
+# Magic, version key, node count, item count, root, constant pool length
+_HEADER = struct.Struct('<8s16sqqqq')
+
+# Columns in file order: the 32-bit ones first, so that all of them are
+# aligned after the 56-byte header, then the one-byte ones
+_INT_COLUMNS = ('child0', 'child1', 'values', 'lines')
+_BYTE_COLUMNS = ('kinds', 'ops')
+
+def _version_key() -> bytes:
+    """Digest of what a file depends on besides its contents.
+
+    The `ops` column holds token type values, so a change to TokenType
+    makes older files unreadable rather than wrong.
+    """
+    description = repr((_FORMAT_VERSION, [(token_type.name, token_type.value) for token_type in TokenType]))
+    return hashlib.blake2b(description.encode('utf-8'), digest_size=16).digest()
+
+VERSION_KEY = _version_key()
+
+def dump_arena(arena: NodeArena) -> bytes:
+    """Binary form of `arena`: header, the node columns, the block items, then
+    the marshalled constant pool."""
+    constants = marshal.dumps(arena.constants)
+    parts = [_HEADER.pack(_MAGIC, VERSION_KEY, len(arena), len(arena.items), arena.root, len(constants))]
+    for name in _INT_COLUMNS + ('items',) + _BYTE_COLUMNS:
+        column = getattr(arena, name)
+        if column.itemsize != (1 if name in _BYTE_COLUMNS else 4):
+            raise ValueError(f"Column '{name}' has an unexpected item size")
+        parts.append(column.tobytes())
+    parts.append(constants)
+    return b''.join(parts)
+
+def load_arena(data: Union[bytes, bytearray, memoryview, mmap.mmap]) -> NodeArena:
+    """NodeArena whose columns are read-only views of `data`.
+
+    Nothing but the constant pool is copied, and nothing can be added to
+    the arena. Raises ValueError if `data` is not a current arena file.
+    """
+    # Everything is checked before the first view is taken, so that a
+    # mapping can still be closed when this raises
+    if len(data) < _HEADER.size:
+        raise ValueError("Not an AST arena file")
+    magic, version, count, item_count, root, constants_length = _HEADER.unpack_from(data)
+    if magic != _MAGIC:
+        raise ValueError("Not an AST arena file")
+    if version != VERSION_KEY:
+        raise ValueError("AST arena file from another version of the compiler")
+    offset = _HEADER.size + (4 * len(_INT_COLUMNS) + len(_BYTE_COLUMNS)) * count + 4 * item_count
+    if len(data) != offset + constants_length:
+        raise ValueError("Truncated AST arena file")
+    try:
+        constants = marshal.loads(data[offset:])
+    except (EOFError, TypeError, ValueError):
+        raise ValueError("Corrupt AST arena constant pool")
+
+    arena = NodeArena.__new__(NodeArena)
+    view = memoryview(data)
+    offset = _HEADER.size
+    for name in _INT_COLUMNS:
+        setattr(arena, name, view[offset:offset + 4 * count].cast('i'))
+        offset += 4 * count
+    arena.items = view[offset:offset + 4 * item_count].cast('i')
+    offset += 4 * item_count
+    for name in _BYTE_COLUMNS:
+        setattr(arena, name, view[offset:offset + count].cast('B'))
+        offset += count
+    arena.constants = constants
+    arena._constant_ids = {(type(value), value): index for index, value in enumerate(arena.constants)}
+    arena.root = root
+    return arena
+
+def write_arena(path: str, arena: NodeArena):
+    """Write `arena` to `path`, which readers never see half written."""
+    data = dump_arena(arena)
+    fd, temporary = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as file:
+            file.write(data)
+        os.replace(temporary, path)
+    except BaseException:
+        try:
+            os.unlink(temporary)
+        except OSError:
+            pass
+        raise
+
+def read_arena(path: str) -> NodeArena:
+    """Map the arena file at `path`; its columns are views of the mapping.
+
+    The mapping stays open as long as the arena is referenced, and
+    processes that map the same file share its pages.
+    """
+    with open(path, 'rb') as file:
+        mapping = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    try:
+        return load_arena(mapping)
+    except ValueError:
+        mapping.close()
+        raise
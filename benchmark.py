@@ -0,0 +1,256 @@
+"""
+Benchmarks for the compiler stages.
+
+Run with ``python -m compiler.benchmark``.
+"""
+import gc
+import os
+import pickle
+import tempfile
+import time
+import tracemalloc
+from .ast_format import read_arena, write_arena
+from .lexer import Lexer, TokenType
+from .incremental_parser import IncrementalParser
+from .lexer_generator import load_lexer
+from .parallel_lexer import lex_parallel
+from .parser import Parser
+from .parser_generator import load_parser
+from .symbol_pass import SymbolTableBuilder
+from .symbol_table import SymbolTable
+from .token_buffer import TokenBuffer
+from .token_cache import TokenCache
+from .vectorized_lexer import lex_vectorized, np
+
+def generate_program(blocks: int = 10000) -> str:
+    """Generate a program that the parser accepts, with `blocks` repeated statement groups."""
+    lines = ["program", "var contador = 0; acumulado = 1; limite = 100;"]
+    for i in range(blocks):
+        lines.append("// Bloque generado")
+        lines.append(f"acumulado = (acumulado + {i}) * limite - contador / 2;")
+        lines.append("while (contador < limite) {")
+        lines.append("    acumulado = acumulado + contador * 2;")
+        lines.append("    contador = contador + 1;")
+        lines.append("};")
+    return "\n".join(lines)
+
+def _best_of(func, repeat: int = 3) -> float:
+    """Return the best wall-clock time of several runs."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def bench_lexer_engines(blocks: int = 20000):
+    """Compare the lexing engines of Lexer on the same input."""
+    text = generate_program(blocks)
+    
+    def lex(engine):
+        lexer = Lexer(text, engine=engine)
+        while lexer.get_next_token().type != TokenType.EOF:
+            pass
+    
+    results = {engine: _best_of(lambda: lex(engine)) for engine in Lexer.ENGINES}
+    for engine, seconds in results.items():
+        print(f"lexer[{engine}]: {seconds:.3f}s ({blocks} blocks)")
+    return results
+
+def bench_generated_lexer(blocks: int = 20000):
+    """Compare the lexer generated from the token specification, used directly
+    and through Lexer(engine='generated'), with the other engines."""
+    text = generate_program(blocks)
+    generated = load_lexer()
+    
+    def drain(lexer):
+        while lexer.get_next_token().type != TokenType.EOF:
+            pass
+    
+    results = {f"lexer[{engine}]": _best_of(lambda: drain(Lexer(text, engine=engine)))
+               for engine in Lexer.ENGINES}
+    results["GeneratedLexer"] = _best_of(lambda: drain(generated(text)))
+    for name, seconds in results.items():
+        print(f"{name}: {seconds:.3f}s ({blocks} blocks)")
+    return results
+
+def bench_vectorized_lexing(blocks: int = 20000):
+    """Compare lex_vectorized with draining the regex engine into a TokenBuffer."""
+    text = generate_program(blocks)
+    sequential = _best_of(lambda: TokenBuffer.from_lexer(Lexer(text, engine='regex', span_tokens=True)))
+    vectorized = _best_of(lambda: lex_vectorized(text))
+    print(f"TokenBuffer.from_lexer: {sequential:.3f}s ({blocks} blocks)")
+    label = "lex_vectorized" if np is not None else "lex_vectorized (NumPy missing, regex fallback)"
+    print(f"{label}: {vectorized:.3f}s (x{sequential / vectorized:.2f})")
+    return sequential, vectorized
+
+def bench_token_cache(blocks: int = 20000):
+    """Compare a cache miss (lex and store) with a hit (mmap load)."""
+    text = generate_program(blocks)
+    with tempfile.TemporaryDirectory() as directory:
+        cache = TokenCache(directory)
+        miss = _best_of(lambda: cache.lex(text), repeat=1)
+        hit = _best_of(lambda: cache.lex(text))
+    print(f"TokenCache miss: {miss:.3f}s, hit: {hit:.4f}s ({blocks} blocks)")
+    return miss, hit
+
+def bench_expression_chains(lengths=(2000, 4000, 8000, 16000)):
+    """Parse assignments of ever longer chains `a + b + ...` to show linear scaling."""
+    results = {}
+    for length in lengths:
+        chain = " + ".join(("a", "b")[i % 2] for i in range(length))
+        # Inside a block, so that it is parsed as an assignment statement
+        text = f"program var a = 1; b = 2; c = 0;\nwhile (c < 1) {{\n    c = {chain};\n}};"
+        tokens = TokenBuffer.from_lexer(Lexer(text, engine='regex', span_tokens=True))
+        seconds = _best_of(lambda: Parser(tokens, SymbolTable()).parse())
+        results[length] = seconds
+        print(f"Parser[{length} operands]: {seconds:.3f}s ({seconds / length * 1e6:.2f}us per operand)")
+    return results
+
+def bench_parser_inputs(blocks: int = 20000):
+    """Parse one program pulled from a Lexer and read from a TokenBuffer and a token list."""
+    text = generate_program(blocks)
+    buffer = TokenBuffer.from_lexer(Lexer(text, engine='regex', span_tokens=True))
+    tokens = list(buffer)
+    results = {
+        "Lexer": _best_of(lambda: Parser(Lexer(text, engine='regex', span_tokens=True), SymbolTable()).parse()),
+        "TokenBuffer": _best_of(lambda: Parser(buffer, SymbolTable()).parse()),
+        "list": _best_of(lambda: Parser(tokens, SymbolTable()).parse()),
+    }
+    for name, seconds in results.items():
+        print(f"Parser[{name}]: {seconds:.3f}s ({blocks} blocks)")
+    return results
+
+def bench_generated_parser(blocks: int = 20000):
+    """Compare the LL(1) parser generated from the grammar with Parser.
+
+    All read the same TokenBuffer and build the same AST; the generated
+    parser fills no symbol table, like a syntax-only Parser.
+    """
+    text = generate_program(blocks)
+    buffer = TokenBuffer.from_lexer(Lexer(text, engine='regex', span_tokens=True))
+    generated = load_parser()
+    results = {
+        "Parser": _best_of(lambda: Parser(buffer, SymbolTable()).parse()),
+        "Parser[syntax_only]": _best_of(lambda: Parser(buffer, None, syntax_only=True).parse()),
+        "generated": _best_of(lambda: generated(buffer).parse()),
+    }
+    for name, seconds in results.items():
+        print(f"{name}: {seconds:.3f}s ({blocks} blocks)")
+    return results
+
+def bench_syntax_only(blocks: int = 20000):
+    """Compare parsing with symbol-table work, syntax-only, and syntax-only followed by the pass."""
+    text = generate_program(blocks)
+    buffer = TokenBuffer.from_lexer(Lexer(text, engine='regex', span_tokens=True))
+    
+    def parse_then_fill():
+        parser = Parser(buffer, None, syntax_only=True)
+        ast = parser.parse()
+        SymbolTableBuilder(SymbolTable()).fill(ast, parser.declaration_count)
+    
+    results = {
+        "semantic": _best_of(lambda: Parser(buffer, SymbolTable()).parse()),
+        "syntax_only": _best_of(lambda: Parser(buffer, None, syntax_only=True).parse()),
+        "syntax_only + fill": _best_of(parse_then_fill),
+    }
+    for name, seconds in results.items():
+        print(f"Parser[{name}]: {seconds:.3f}s ({blocks} blocks)")
+    return results
+
+def bench_ast_memory(blocks: int = 20000):
+    """Compare the memory kept by the object AST, with and without shared
+    subexpressions, and by the NodeArena of one program."""
+    tokens = TokenBuffer.from_lexer(Lexer(generate_program(blocks), engine='regex', span_tokens=True))
+    
+    def retained(parse, **options):
+        gc.collect()
+        tracemalloc.start()
+        try:
+            ast = parse(Parser(tokens, SymbolTable(), **options))  # Alive while measured
+            gc.collect()
+            return tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+    
+    results = {
+        "objects": retained(Parser.parse),
+        "shared objects": retained(Parser.parse, share_nodes=True),
+        "arena": retained(Parser.parse_arena),
+    }
+    for name, (current, peak) in results.items():
+        print(f"AST[{name}]: {current / 2**20:.1f} MiB kept, {peak / 2**20:.1f} MiB peak ({blocks} blocks)")
+    return results
+
+def bench_ast_format(blocks: int = 20000):
+    """Compare storing and loading a parsed program as an arena file and as a pickle."""
+    tokens = TokenBuffer.from_lexer(Lexer(generate_program(blocks), engine='regex', span_tokens=True))
+    ast = Parser(tokens, SymbolTable()).parse()
+    arena = Parser(tokens, SymbolTable()).parse_arena()
+    with tempfile.TemporaryDirectory() as directory:
+        arena_path = os.path.join(directory, 'program.ast')
+        pickle_path = os.path.join(directory, 'program.pickle')
+        
+        def write_pickle():
+            with open(pickle_path, 'wb') as file:
+                pickle.dump(ast, file, protocol=pickle.HIGHEST_PROTOCOL)
+        
+        def read_pickle():
+            with open(pickle_path, 'rb') as file:
+                return pickle.load(file)
+        
+        results = {
+            "arena": (_best_of(lambda: write_arena(arena_path, arena)), _best_of(lambda: read_arena(arena_path)),
+                      os.path.getsize(arena_path)),
+            "pickle": (_best_of(write_pickle), _best_of(read_pickle), os.path.getsize(pickle_path)),
+        }
+    for name, (write, read, size) in results.items():
+        print(f"AST file[{name}]: write {write:.3f}s, read {read:.4f}s, {size / 2**20:.1f} MiB ({blocks} blocks)")
+    return results
+
+def bench_parallel_lexing(blocks: int = 200000, workers=None):
+    """Measure how lex_parallel scales with the number of worker processes."""
+    text = generate_program(blocks)
+    if workers is None:
+        cpus = os.cpu_count() or 1
+        workers = sorted({1, 2, 4, cpus} - {n for n in (2, 4) if n > cpus})
+    
+    sequential = _best_of(lambda: TokenBuffer.from_lexer(Lexer(text, engine='regex', span_tokens=True)), repeat=1)
+    print(f"sequential: {sequential:.3f}s ({blocks} blocks)")
+    results = {}
+    for count in workers:
+        seconds = _best_of(lambda: lex_parallel(text, workers=count), repeat=1)
+        results[count] = seconds
+        print(f"lex_parallel[{count} workers]: {seconds:.3f}s (x{sequential / seconds:.2f})")
+    return results
+
+def bench_incremental_parsing(blocks: int = 8400, edits: int = 20):
+    """Time a one-character edit inside a while block of a ~50k-line program,
+    reparsed incrementally and from scratch."""
+    text = generate_program(blocks)
+    position = text.index("contador * 2", len(text) // 2) + len("contador * ")
+    parser = IncrementalParser(text)
+    full = _best_of(parser.reparse)
+    
+    def edit():
+        for i in range(edits):
+            parser.apply_edit(position, 1, "3" if i % 2 == 0 else "2")
+    
+    incremental = _best_of(edit) / edits
+    print(f"IncrementalParser: full reparse {full:.3f}s, one-character edit {incremental * 1e3:.3f}ms "
+          f"({text.count(chr(10)) + 1} lines)")
+    return full, incremental
+
+if __name__ == "__main__":
+    bench_lexer_engines()
+    bench_generated_lexer()
+    bench_vectorized_lexing()
+    bench_token_cache()
+    bench_expression_chains()
+    bench_parser_inputs()
+    bench_generated_parser()
+    bench_syntax_only()
+    bench_ast_memory()
+    bench_ast_format()
+    bench_parallel_lexing()
+    bench_incremental_parsing()
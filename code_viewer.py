@@ -26,7 +26,7 @@ class CodeViewer:
                         ft.DataCell(ft.Container(
                             content=ft.Text(str(instr.op)),
                             padding=5,
-                            bgcolor=ft.colors.with_opacity(0.1, ft.colors.BLUE) if instr.op in {'+', '-', '*', '/', 'ADD', 'SUB', 'MUL', 'DIV', 'GT', 'LT', 'EQ', 'CMP', 'JZ', 'JMP', 'LABEL'} else None
+                            bgcolor=ft.colors.with_opacity(0.1, ft.colors.BLUE) if instr.op in {'+', '-', '*', '/', 'ADD', 'SUB', 'MUL', 'DIV', 'MOD', 'NEG', 'GT', 'LT', 'EQ', 'NE', 'GE', 'LE', 'AND', 'OR', 'NOT', 'CMP', 'JZ', 'JMP', 'LABEL'} else None
                         )),
                         ft.DataCell(ft.Text(
                             str(instr.arg1 if instr.arg1 is not None else ""),
@@ -107,7 +107,7 @@ class CodeViewer:
                 stats['temp_vars'] += 1
             
             # Contar operaciones aritméticas
-            if instr.op in {'+', '-', '*', '/', 'ADD', 'SUB', 'MUL', 'DIV', 'GT', 'LT', 'EQ'}:
+            if instr.op in {'+', '-', '*', '/', 'ADD', 'SUB', 'MUL', 'DIV', 'MOD', 'NEG', 'GT', 'LT', 'EQ', 'NE', 'GE', 'LE', 'AND', 'OR', 'NOT'}:
                 stats['arithmetic_ops'] += 1
             
             # Contar asignaciones
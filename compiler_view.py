@@ -2,7 +2,9 @@
 UI components for the compiler interface.
 """
 import flet as ft
-from compiler.lexer import Lexer, TokenType
+from compiler.lexer import Lexer, LexicalError
+from compiler.incremental_lexer import IncrementalLexer
+from compiler.token_buffer import TokenBuffer
 from compiler.parser import Parser
 from compiler.symbol_table import SymbolTable
 from compiler.intermediate_code import IntermediateCodeGenerator
@@ -13,6 +15,7 @@ from .token_viewer import TokenViewer
 class CompilerView:
     def __init__(self, page: ft.Page):
         self.page = page
+        self.incremental_lexer = IncrementalLexer(trivia=True)
         self.setup_ui()
         self.setup_keyboard_shortcuts()
     
@@ -245,8 +248,14 @@ class CompilerView:
     def highlight_syntax(self, e):
         """Update syntax highlighting in the code editor."""
         text = self.code_editor.value or ""
+        try:
+            # Only the tokens around the edit are relexed
+            self.incremental_lexer.update(text)
+            tokens = self.incremental_lexer.tokens
+        except LexicalError:
+            tokens = None  # highlight_text relexes and reports the error
         if text:
-            highlighted = SyntaxHighlighter.highlight_text(text)
+            highlighted = SyntaxHighlighter.highlight_text(text, tokens)
             self.highlight_container.content = highlighted
             self.highlight_container.visible = True
         else:
@@ -393,14 +402,9 @@ y = x + 3 * 2;""")
                 self.error_text.color = ft.colors.ORANGE
                 self.page.update()
             
-            # Lexical analysis
-            lexer = Lexer(self.code_editor.value)
-            tokens = []
-            token = lexer.get_next_token()
-            
-            while token.type != TokenType.EOF:
-                tokens.append(token)
-                token = lexer.get_next_token()
+            # Lexical analysis: a single pass shared by the token view and the parser
+            lexer = Lexer(self.code_editor.value, engine='regex', span_tokens=True, recover=True)
+            tokens = TokenBuffer.from_lexer(lexer)
             
             # Create token view
             token_view = TokenViewer.create_token_view(tokens)
@@ -409,12 +413,10 @@ y = x + 3 * 2;""")
             elif isinstance(token_view, list):
                 self.token_container.controls.extend(token_view)
             
-            # Reset lexer for parser
-            lexer = Lexer(self.code_editor.value)
             symbol_table = SymbolTable()
             
-            # Parsing
-            parser = Parser(lexer, symbol_table)
+            # Parsing: syntax errors are collected and the valid statements kept
+            parser = Parser(tokens, symbol_table, recover=True)
             ast = parser.parse()
             
             # Symbol table view
@@ -427,6 +429,36 @@ y = x + 3 * 2;""")
                 symbol_view = CodeViewer.create_symbol_table_view(symbols)
                 self.symbol_table_container.controls.append(symbol_view)
             
+            # Lexical errors stop the compilation like syntax errors; warnings
+            # are reported either way, under their own heading
+            lexical_errors = [diagnostic for diagnostic in lexer.diagnostics if diagnostic.severity == 'error']
+            lexical_warnings = [diagnostic for diagnostic in lexer.diagnostics if diagnostic.severity == 'warning']
+            warning_sections = []
+            if warnings:
+                warning_sections.append("Advertencias:\n" + "\n".join(warnings))
+            if lexical_warnings:
+                warning_sections.append("Advertencias léxicas:\n" + "\n".join(
+                    f"Línea {diagnostic.line}, columna {diagnostic.column}: {diagnostic.error_message}"
+                    for diagnostic in lexical_warnings
+                ))
+            
+            # Report every lexical and syntax error at once instead of stopping at the first
+            if lexical_errors or parser.errors:
+                sections = []
+                if lexical_errors:
+                    sections.append("Errores léxicos:\n" + "\n".join(
+                        f"Línea {diagnostic.line}, columna {diagnostic.column}: {diagnostic.error_message}"
+                        for diagnostic in lexical_errors
+                    ))
+                if parser.errors:
+                    sections.append("Errores sintácticos:\n" + "\n".join(
+                        f"Línea {error.line}, columna {error.column}: {error.message}"
+                        for error in parser.errors
+                    ))
+                self.error_text.value = "\n\n".join(sections + warning_sections)
+                self.error_text.color = ft.colors.RED
+                return
+            
             # Intermediate code generation
             code_gen = IntermediateCodeGenerator()
             code_gen.generate(ast)
@@ -446,7 +478,10 @@ y = x + 3 * 2;""")
                     self.intermediate_code_container.controls.extend(code_view)
             
             # Si no hay advertencias, mostrar éxito
-            if not warnings:
+            if warning_sections:
+                self.error_text.value = "\n\n".join(warning_sections)
+                self.error_text.color = ft.colors.ORANGE
+            else:
                 self.error_text.value = "Compilación exitosa"
                 self.error_text.color = ft.colors.GREEN
             
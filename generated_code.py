@@ -0,0 +1,52 @@
+"""
+Loading of generated modules, with their compiled code cached on disk.
+"""
+import hashlib
+import marshal
+import os
+import sys
+from typing import Any, Callable, Dict, Tuple
+
+_loaded: Dict[Tuple[str, str], Any] = {}
+
+def _cache_path(kind: str, key: str) -> str:
+    return os.path.join(os.path.dirname(os.path.abspath(__file__)), '__pycache__',
+                        f"generated_{kind}.{key}.{sys.implementation.cache_tag}.marshal")
+
+def load_generated(kind: str, inputs: str, generate: Callable[[], str], version: int,
+                   namespace: Dict[str, Any], name: str, cache: bool = True) -> Any:
+    """Run the source `generate()` writes for a `kind` module and return its global `name`.
+
+    `inputs` is the text the generator reads, and `version` that of the
+    generator itself: a hash of both keys the module, so `generate` is only
+    called when neither this process nor the disk has it. `namespace`
+    provides what the source uses without importing it. The compiled code
+    is cached next to this package's bytecode, so later processes skip the
+    generation and the compilation; within a process each module is run once.
+    """
+    key = hashlib.blake2b(f"{version}\n{inputs}".encode('utf-8'), digest_size=8).hexdigest()
+    if (kind, key) in _loaded:
+        return _loaded[kind, key]
+
+    path = _cache_path(kind, key)
+    code = None
+    if cache:
+        try:
+            with open(path, 'rb') as file:
+                code = marshal.load(file)
+        except (OSError, EOFError, ValueError, TypeError):
+            code = None
+    if code is None:
+        code = compile(generate(), f"<generated {kind} {key}>", 'exec')
+        if cache:
+            try:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                with open(path, 'wb') as file:
+                    marshal.dump(code, file)
+            except OSError:
+                pass  # A read-only installation just compiles every time
+
+    namespace = dict(namespace, __name__=f'generated_{kind}')
+    exec(code, namespace)
+    _loaded[kind, key] = namespace[name]
+    return namespace[name]
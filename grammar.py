@@ -0,0 +1,89 @@
+"""
+Grammar of the language, from which parser_generator builds an LL(1) parser.
+
+One rule per definition: ``name : alternative | alternative ...``, with
+further alternatives on lines starting with ``|``. Upper-case symbols are
+TokenType members and lower-case ones are rules; an alternative without
+symbols is empty. The first rule is the start symbol.
+
+A terminal written ``$NAME`` keeps its token on the value stack, where the
+actions in braces build the AST from it (see parser_generator._ACTIONS).
+Actions run when they reach the top of the parse stack, so ``{binary}`` in
+``PLUS product {binary}`` combines the operand parsed before the tail with
+the one just parsed, which keeps the operators left-associative.
+
+The grammar reproduces Parser exactly, including where it is not LL(1):
+when two alternatives both apply to a token, the one written first wins.
+That is how the declarations take every identifier that follows ``var``
+and how runs of ``;`` are skipped greedily. A rule that can be empty is
+also applied as empty to tokens nothing expects, like Parser's loops that
+simply stop there: the program ends after its last well-separated
+statement and whatever follows is ignored.
+"""
+
+GRAMMAR = r"""
+program             : PROGRAM semicolons declaration_block statement_list
+
+declaration_block   : VAR declarations
+                    |
+declarations        : $IDENTIFIER {variable} initializer SEMICOLON semicolons declarations
+                    |
+initializer         : ASSIGN expr {assign}
+                    |
+semicolons          : SEMICOLON semicolons
+                    |
+
+# Parser.statement_list(): a statement is only parsed before EOF, and
+# anything else that does not start one is an empty statement (None)
+statement_list      : semicolons optional_statement statement_tail
+statement_tail      : SEMICOLON semicolons optional_statement statement_tail
+                    |
+optional_statement  : statement
+                    | {empty}
+statement           : $IDENTIFIER {variable} ASSIGN expr {assign}
+                    | PRINT LPAREN expr RPAREN SEMICOLON {print}
+                    | IF LPAREN expr RPAREN block else_part {if}
+                    | WHILE LPAREN expr RPAREN block {while}
+                    | VAR {mark} declarations {collect}
+block               : LBRACE {mark} statement_list {collect} RBRACE
+else_part           : ELSE block
+                    | {none}
+
+# Operators by increasing precedence, as in Parser.expr(). The operand of
+# 'not' is a whole comparison wherever it appears, that of a sign a single
+# factor
+expr                : conjunction disjunction_tail
+disjunction_tail    : $OR conjunction {binary} disjunction_tail
+                    |
+conjunction         : equality conjunction_tail
+conjunction_tail    : $AND equality {binary} conjunction_tail
+                    |
+equality            : comparison equality_tail
+equality_tail       : $EQUALS comparison {binary} equality_tail
+                    | $NOT_EQUALS comparison {binary} equality_tail
+                    |
+comparison          : sum comparison_tail
+comparison_tail     : $LESS_THAN sum {binary} comparison_tail
+                    | $GREATER_THAN sum {binary} comparison_tail
+                    | $LESS_EQUALS sum {binary} comparison_tail
+                    | $GREATER_EQUALS sum {binary} comparison_tail
+                    |
+sum                 : product sum_tail
+sum_tail            : $PLUS product {binary} sum_tail
+                    | $MINUS product {binary} sum_tail
+                    |
+product             : unary product_tail
+product_tail        : $MULTIPLY unary {binary} product_tail
+                    | $DIVIDE unary {binary} product_tail
+                    | $MODULO unary {binary} product_tail
+                    |
+unary               : $NOT equality {unary}
+                    | $MINUS unary {unary}
+                    | PLUS unary
+                    | primary
+primary             : LPAREN expr RPAREN
+                    | $INTEGER_CONST {number}
+                    | $FLOAT_CONST {number}
+                    | $STRING_LITERAL {number}
+                    | $IDENTIFIER {variable}
+"""
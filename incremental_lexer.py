@@ -0,0 +1,169 @@
+"""
+Incremental relexing of an edited buffer.
+"""
+from bisect import bisect_left
+from typing import List, Optional, Tuple
+from .lexer import Lexer, LexicalError, SpanToken, TokenType
+from .line_index import EditableLineIndex
+
+class TailSpanToken(SpanToken):
+    """SpanToken anchored to the end of the text.
+
+    Its offsets are stored as distances from the end of the source, so they
+    stay valid when the text before the token is edited. Line and column
+    are therefore looked up on every access instead of being cached.
+    """
+    __slots__ = ('_from_start', '_from_end')
+
+    def __init__(self, type: TokenType, start: int, end: int, source: 'IncrementalLexer'):
+        length = len(source.text)
+        self.type = type
+        self.source = source
+        self._from_start = length - start
+        self._from_end = length - end
+
+    @property
+    def start(self) -> int:
+        return len(self.source.text) - self._from_start
+
+    @property
+    def end(self) -> int:
+        return len(self.source.text) - self._from_end
+
+    @property
+    def line(self) -> int:
+        return self.source.line_index.line_of(self.end)
+
+    @property
+    def column(self) -> int:
+        return self.source.line_index.column_of(self.start)
+
+def compute_edit(old_text: str, new_text: str, block: int = 4096) -> Tuple[int, int, str]:
+    """Reduce a full-text replacement to a single (start, old_len, new_text) edit."""
+    limit = min(len(old_text), len(new_text))
+    start = 0
+    # Skip whole blocks with C-level comparisons before narrowing down
+    while start + block <= limit and old_text[start:start + block] == new_text[start:start + block]:
+        start += block
+    while start < limit and old_text[start] == new_text[start]:
+        start += 1
+
+    limit -= start
+    suffix = 0
+    while suffix + block <= limit and \
+            old_text[len(old_text) - suffix - block:len(old_text) - suffix] == \
+            new_text[len(new_text) - suffix - block:len(new_text) - suffix]:
+        suffix += block
+    while suffix < limit and old_text[len(old_text) - suffix - 1] == new_text[len(new_text) - suffix - 1]:
+        suffix += 1
+
+    return start, len(old_text) - start - suffix, new_text[start:len(new_text) - suffix]
+
+class IncrementalLexer:
+    """Keeps the span-token stream of a buffer up to date across edits.
+
+    After an edit only the region between the last token that ends before
+    the edit and the point where the new tokens re-synchronize with the old
+    ones is relexed. Token boundaries are always outside comments and string
+    literals, so restarting there is safe. With trivia=True the stream also
+    holds the whitespace and comment tokens and covers the text exactly.
+
+    Tokens before the last edit keep absolute offsets and tokens after it
+    are TailSpanToken, anchored to the end of the text. Successive edits at
+    nearby positions therefore only re-anchor the tokens between them,
+    instead of shifting every token after the edit.
+    """
+
+    def __init__(self, text: str = "", trivia: bool = False):
+        self.text = ""
+        self.trivia = trivia
+        self.tokens: List[SpanToken] = [TailSpanToken(TokenType.EOF, 0, 0, self)]
+        self.error: Optional[LexicalError] = None
+        self._split = 0  # tokens[:_split] are anchored to the start
+        self._line_index: Optional[EditableLineIndex] = None
+        if text:
+            self.apply_edit(0, 0, text)
+
+    @property
+    def line_index(self) -> EditableLineIndex:
+        if self._line_index is None:
+            self._line_index = EditableLineIndex(self.text)
+        return self._line_index
+
+    def update(self, new_text: str) -> Tuple[int, int, int]:
+        """Bring the stream up to date with a new version of the whole text."""
+        return self.apply_edit(*compute_edit(self.text, new_text))
+
+    def apply_edit(self, start: int, old_len: int, new_text: str) -> Tuple[int, int, int]:
+        """Replace text[start:start + old_len] by new_text and relex the affected tokens.
+
+        Returns (index, removed, inserted): tokens[index:index + removed] of
+        the previous stream were replaced by `inserted` new tokens. Raises
+        LexicalError if the edited region does not lex; the stream then
+        ends right before the error and the next edit relexes from there.
+        """
+        tokens = self.tokens
+
+        # Last token that ends strictly before the edit: its lookahead
+        # character is unchanged, so lexing can resume right after it
+        first = bisect_left(tokens, start, key=lambda token: token.end)
+        restart = tokens[first - 1].end if first else 0
+
+        # Everything from `first` on must survive the text change
+        self._anchor_to_end(first)
+        self.text = self.text[:start] + new_text + self.text[start + old_len:]
+        if self._line_index is not None:
+            self._line_index.edit(start, old_len, new_text)
+        edit_end = start + len(new_text)
+
+        lexer = Lexer(self.text, engine='regex', span_tokens=True, trivia=self.trivia)
+        lexer.seek(restart)
+        relexed = []
+        # A stream cut short by an error has no tail to re-synchronize with
+        resync = first if self.error is None else len(tokens)
+        self.error = None
+        try:
+            while True:
+                token = lexer.get_next_token()
+                if token.start >= edit_end:
+                    # Old tokens after the edit already report new offsets
+                    while resync < len(tokens) and tokens[resync].start < token.start:
+                        resync += 1
+                    if resync < len(tokens):
+                        old = tokens[resync]
+                        if old.start == token.start and old.end == token.end and old.type == token.type:
+                            break
+                token.source = self
+                relexed.append(token)
+                if token.type == TokenType.EOF:
+                    resync = len(tokens)
+                    break
+        except LexicalError as error:
+            self.error = error
+            resync = len(tokens)
+
+        tokens[first:resync] = relexed
+        self._split = first + len(relexed)
+        if self.error is not None:
+            raise self.error
+        return first, resync - first, len(relexed)
+
+    def _anchor_to_end(self, index: int):
+        """Move the head/tail boundary to `index`, re-anchoring the tokens in between."""
+        tokens = self.tokens
+        if index < self._split:
+            for i in range(index, self._split):
+                tokens[i] = _reanchor(tokens[i], TailSpanToken, self)
+        else:
+            for i in range(self._split, index):
+                tokens[i] = _reanchor(tokens[i], SpanToken, self)
+        self._split = index
+
+def _reanchor(token: SpanToken, cls, source: IncrementalLexer) -> SpanToken:
+    """Copy a token into the other anchoring, keeping its cached value."""
+    copy = cls(token.type, token.start, token.end, source)
+    try:
+        copy._value = token._value
+    except AttributeError:
+        pass
+    return copy
@@ -0,0 +1,259 @@
+"""
+Incremental reparsing of an edited buffer, one statement at a time.
+"""
+from bisect import bisect_left
+from typing import List, Optional, Tuple
+from .incremental_lexer import IncrementalLexer, compute_edit
+from .lexer import LexicalError, SpanToken, TokenType
+from .parser import IfNode, ParseError, Parser
+from .symbol_table import SymbolTable
+
+class StatementSpan:
+    """Source span of a statement and of the statements nested in it.
+
+    `children` are the spans of the then and else branches of an if, or of
+    the body of a while, in source order. Their offsets are relative to the
+    start of this statement, so an edit inside a block only moves the spans
+    that follow it in the same block and its enclosing ones.
+    """
+    __slots__ = ('node', 'start', 'end', 'children')
+
+    def __init__(self, node, start: int, end: int, children: List['StatementSpan']):
+        self.node = node
+        self.start = start
+        self.end = end
+        self.children = children
+
+class _SpanParser(Parser):
+    """Parser over the token list of an IncrementalLexer that records the
+    span of every statement it parses in `spans`."""
+
+    def __init__(self, tokens: List[SpanToken], symbol_table: SymbolTable):
+        super().__init__(tokens, symbol_table)
+        self.spans: List[StatementSpan] = []
+        # Set when a var statement is parsed outside the declaration block
+        self.declares = False
+
+    def _statement(self):
+        first = self.pos
+        start = self.current_token.start
+        spans, self.spans = self.spans, []
+        node = super()._statement()
+        children, self.spans = self.spans, spans
+        last = self.pos
+        end = self.tokens[last - 1].end if last > first else start
+        for child in children:
+            child.start -= start
+            child.end -= start
+        spans.append(StatementSpan(node, start, end, children))
+        if isinstance(node, list):
+            self.declares = True
+        return node
+
+def _replace_child(node, index: int, child):
+    """Put `child` in place of the index-th nested statement of an if or while."""
+    if isinstance(node, IfNode):
+        if index < len(node.then_body):
+            node.then_body[index] = child
+        else:
+            node.else_body[index - len(node.then_body)] = child
+    else:
+        node.body[index] = child
+
+class IncrementalParser:
+    """Keeps the AST of a buffer up to date across edits.
+
+    `ast` is what Parser.parse() returns for the text and `spans` holds the
+    StatementSpan of each top-level statement (the declarations of the var
+    block have none). After an edit only the innermost statement that
+    contains it is reparsed and spliced into the tree. The new statement is
+    kept if it ends exactly where the old one did, so that the tokens after
+    it and everything parsed from them are unchanged; otherwise the
+    enclosing statements are tried in turn, and then the whole program.
+    Edits outside every statement (the header, the declarations and the
+    separators between top-level statements) reparse the whole program,
+    and so does any edit once the program has var statements among its
+    statements, since those change what the others may refer to.
+
+    A partial reparse updates the symbol table for the statement it parses,
+    but what the previous version of that statement recorded stays there;
+    reparse() builds it again from scratch.
+
+    Top-level spans are anchored like the tokens of IncrementalLexer: up to
+    the last edited statement they hold absolute offsets and after it
+    distances from the end of the text.
+    """
+
+    def __init__(self, text: str = ""):
+        self.lexer = IncrementalLexer()
+        self.symbol_table = SymbolTable()
+        self.ast: list = []
+        self.spans: List[StatementSpan] = []
+        self._first = 0  # Index in `ast` of the first top-level statement
+        self._split = 0  # spans[:_split] are anchored to the start
+        self._full = True  # The next edit reparses the whole program
+        if text:
+            self.apply_edit(0, 0, text)
+
+    @property
+    def text(self) -> str:
+        return self.lexer.text
+
+    def update(self, new_text: str) -> Tuple[int, int]:
+        """Bring the AST up to date with a new version of the whole text."""
+        return self.apply_edit(*compute_edit(self.lexer.text, new_text))
+
+    def apply_edit(self, start: int, old_len: int, new_text: str) -> Tuple[int, int]:
+        """Replace text[start:start + old_len] by new_text and reparse what it affected.
+
+        Returns the (start, end) offsets of the reparsed region in the new
+        text. Raises LexicalError or ParseError if the new text does not
+        parse; the AST is then left as it was and the next edit reparses the
+        whole program.
+        """
+        path = None if self._full else self._enclosing(start, start + old_len)
+        if path is not None:
+            # The edited top-level statement and those before it keep
+            # their offsets
+            self._anchor_to_end(path[0][2] + 1)
+            # Index of the token that follows each of the statements
+            tokens = self.lexer.tokens
+            following = [bisect_left(tokens, base + span.end - span.start, key=lambda token: token.start)
+                         for span, base, _ in path]
+        try:
+            index, removed, inserted = self.lexer.apply_edit(start, old_len, new_text)
+        except LexicalError:
+            self._full = True
+            raise
+        if path is not None:
+            # Where those tokens are now, or None if the edit replaced them
+            following = [i - removed + inserted if i >= index + removed else None for i in following]
+            region = self._reparse_enclosing(path, following, len(new_text) - old_len)
+            if region is not None:
+                return region
+        return self.reparse()
+
+    def reparse(self) -> Tuple[int, int]:
+        """Parse the whole text again, with a new symbol table."""
+        self._full = True
+        if self.lexer.error is not None:
+            raise self.lexer.error
+        symbol_table = SymbolTable()
+        parser = _SpanParser(self.lexer.tokens, symbol_table)
+        self.ast = parser.parse()
+        self.symbol_table = symbol_table
+        self.spans = parser.spans
+        self._first = len(self.ast) - len(self.spans)
+        self._split = len(self.spans)
+        self._full = parser.declares
+        return 0, len(self.lexer.text)
+
+    def _span_end(self, index: int) -> int:
+        """Absolute end offset of the index-th top-level statement."""
+        span = self.spans[index]
+        return span.end if index < self._split else len(self.lexer.text) - span.end
+
+    def _anchor_to_end(self, index: int):
+        """Move the head/tail boundary of the top-level spans to `index`."""
+        spans = self.spans
+        length = len(self.lexer.text)
+        # Converting an offset to a distance from the end and back are the
+        # same operation
+        for i in range(min(index, self._split), max(index, self._split)):
+            span = spans[i]
+            span.start = length - span.start
+            span.end = length - span.end
+        self._split = index
+
+    def _enclosing(self, start: int, end: int) -> Optional[List[Tuple[StatementSpan, int, int]]]:
+        """Statements containing text[start:end], outermost first, as
+        (span, absolute start, index among its siblings); None if no
+        top-level statement contains it."""
+        spans = self.spans
+        index = bisect_left(range(len(spans)), end, key=self._span_end)
+        if index == len(spans):
+            return None
+        base = spans[index].start if index < self._split else len(self.lexer.text) - spans[index].start
+        if base > start:
+            return None
+        path = [(spans[index], base, index)]
+        children = spans[index].children
+        while children:
+            index = bisect_left(children, end - base, key=lambda span: span.end)
+            if index == len(children) or base + children[index].start > start:
+                break
+            span = children[index]
+            base += span.start
+            path.append((span, base, index))
+            children = span.children
+        return path
+
+    def _reparse_enclosing(self, path: List[Tuple[StatementSpan, int, int]],
+                           following: List[Optional[int]], delta: int) -> Optional[Tuple[int, int]]:
+        """Reparse the innermost statement of `path` that still parses in place
+        and splice it into the tree; None if none of them does."""
+        for depth in range(len(path) - 1, -1, -1):
+            if following[depth] is None:
+                continue
+            span, base, index = path[depth]
+            replacement = self._reparse(base, base + span.end - span.start + delta, following[depth])
+            if replacement is None:
+                continue
+            region = replacement.start, replacement.end
+            self._splice(path[:depth], index, replacement, delta)
+            return region
+        return None
+
+    def _reparse(self, start: int, end: int, following: int) -> Optional[StatementSpan]:
+        """Parse text[start:end] as one statement, with absolute offsets.
+
+        None unless it is exactly the tokens of that region: no token may
+        straddle its bounds, and the statement has to stop at
+        tokens[following], the token that followed the old statement.
+        Checking the region alone is not enough, since an edit can open a
+        comment that swallows the tokens after it.
+        """
+        tokens = self.lexer.tokens
+        first = bisect_left(tokens, start, key=lambda token: token.start)
+        last = bisect_left(tokens, end, key=lambda token: token.start)
+        if first and tokens[first - 1].end > start:
+            return None
+        if (last > first and tokens[last - 1].end > end) or last != following:
+            return None
+        if tokens[first].type in (TokenType.SEMICOLON, TokenType.EOF):
+            # Statement lists skip separators and stop at EOF before
+            # parsing a statement
+            return None
+        parser = _SpanParser(tokens, self.symbol_table)
+        parser.seek(first)
+        try:
+            parser._statement()
+        except ParseError:
+            return None
+        if parser.pos != last or parser.declares:
+            return None
+        return parser.spans[0]
+
+    def _splice(self, ancestors: List[Tuple[StatementSpan, int, int]], index: int,
+                span: StatementSpan, delta: int):
+        """Put `span` and its statement in place of the index-th child of the
+        last of `ancestors`, or of the index-th top-level statement."""
+        if not ancestors:
+            self.ast[self._first + index] = span.node
+            self.spans[index] = span
+            return
+        parent, base, _ = ancestors[-1]
+        span.start -= base
+        span.end -= base
+        parent.children[index] = span
+        _replace_child(parent.node, index, span.node)
+        # Spans after the edit move by its length difference, up to the
+        # top-level statement; the following top-level ones are anchored to
+        # the end of the text
+        for parent, _, parent_index in reversed(ancestors):
+            children = parent.children
+            for i in range(index + 1, len(children)):
+                children[i].start += delta
+                children[i].end += delta
+            parent.end += delta
+            index = parent_index
@@ -3,8 +3,36 @@ Intermediate code generator module with optimization and detailed information.
 """
 from typing import List, Dict, Optional, Union
 from .lexer import TokenType
-from .parser import ASTNode, BinOpNode, NumNode, VarNode, AssignNode, PrintNode, IfNode, WhileNode
+from .parser import ASTNode, BinOpNode, UnaryOpNode, NumNode, VarNode, AssignNode, PrintNode, IfNode, WhileNode, postorder
 from .symbol_table import SymbolType
+from .ast_arena import ASSIGN, BIN_OP, BLOCK, IF, NUM, PRINT, UNARY_OP, VAR, WHILE, NodeArena
+
+ARITHMETIC_OPERATORS = {
+    TokenType.PLUS: "ADD",
+    TokenType.MINUS: "SUB",
+    TokenType.MULTIPLY: "MUL",
+    TokenType.DIVIDE: "DIV",
+    TokenType.MODULO: "MOD",
+}
+
+COMPARISON_OPERATORS = {
+    TokenType.GREATER_THAN: "GT",
+    TokenType.LESS_THAN: "LT",
+    TokenType.EQUALS: "EQ",
+    TokenType.NOT_EQUALS: "NE",
+    TokenType.GREATER_EQUALS: "GE",
+    TokenType.LESS_EQUALS: "LE",
+}
+
+LOGICAL_OPERATORS = {
+    TokenType.AND: "AND",
+    TokenType.OR: "OR",
+}
+
+UNARY_OPERATORS = {
+    TokenType.MINUS: "NEG",
+    TokenType.NOT: "NOT",
+}
 
 class ThreeAddressCode:
     def __init__(self, op: str, arg1: Optional[str] = None, arg2: Optional[str] = None, 
@@ -35,10 +63,12 @@ class ThreeAddressCode:
             base = f"LOAD {self.arg1}"
         elif self.op == 'ASSIGN':
             base = f"{self.result} := {self.arg1}"
-        elif self.op in ('ADD', 'SUB', 'MUL', 'DIV'):
+        elif self.op in ('ADD', 'SUB', 'MUL', 'DIV', 'MOD'):
             base = f"{self.result} := {self.arg1} {self.op} {self.arg2}"
-        elif self.op in ('GT', 'LT', 'EQ'):
+        elif self.op in ('GT', 'LT', 'EQ', 'NE', 'GE', 'LE', 'AND', 'OR'):
             base = f"{self.result} := {self.arg1} {self.op} {self.arg2}"
+        elif self.op in ('NEG', 'NOT'):
+            base = f"{self.result} := {self.op} {self.arg1}"
         else:
             base = f"{self.op} {self.arg1 or ''} {self.arg2 or ''} {self.result or ''}"
         
@@ -85,6 +115,8 @@ class IntermediateCodeGenerator:
             self.generate_assignment(ast)
         elif isinstance(ast, BinOpNode):
             self.generate_bin_op(ast)
+        elif isinstance(ast, UnaryOpNode):
+            self.generate_unary_op(ast)
         elif isinstance(ast, VarNode):
             self.generate_variable(ast)
         elif isinstance(ast, NumNode):
@@ -101,6 +133,8 @@ class IntermediateCodeGenerator:
         # Generar código para el lado derecho
         if isinstance(node.right, BinOpNode):
             result = self.generate_bin_op(node.right)
+        elif isinstance(node.right, UnaryOpNode):
+            result = self.generate_unary_op(node.right)
         elif isinstance(node.right, VarNode):
             result = self.generate_variable(node.right)
         elif isinstance(node.right, NumNode):
@@ -118,62 +152,76 @@ class IntermediateCodeGenerator:
 
     def generate_bin_op(self, node):
         """Generate code for binary operation."""
-        # Generar código para el lado izquierdo
-        if isinstance(node.left, BinOpNode):
-            left = self.generate_bin_op(node.left)
-        elif isinstance(node.left, VarNode):
-            left = self.generate_variable(node.left)
-        elif isinstance(node.left, NumNode):
-            left = self.generate_number(node.left)
-        else:
-            left = str(node.left.value)
+        return self.generate_expression(node)
 
-        # Generar código para el lado derecho
-        if isinstance(node.right, BinOpNode):
-            right = self.generate_bin_op(node.right)
-        elif isinstance(node.right, VarNode):
-            right = self.generate_variable(node.right)
-        elif isinstance(node.right, NumNode):
-            right = self.generate_number(node.right)
-        else:
-            right = str(node.right.value)
+    def generate_unary_op(self, node):
+        """Generate code for unary operation."""
+        return self.generate_expression(node)
+
+    def generate_expression(self, node):
+        """Generate code for an expression, operands first, without recursion."""
+        results = []
+        for node in postorder(node):
+            if isinstance(node, BinOpNode):
+                right = results.pop()
+                left = results.pop()
+                results.append(self._emit_bin_op(node.op.type, left, right))
+            elif isinstance(node, UnaryOpNode):
+                results.append(self._emit_unary_op(node.op.type, results.pop()))
+            elif isinstance(node, VarNode):
+                results.append(self.generate_variable(node))
+            elif isinstance(node, NumNode):
+                results.append(self.generate_number(node))
+            else:
+                results.append(str(node.value))
+        return results.pop()
 
-        # Generar la operación
-        if node.op.type in (TokenType.PLUS, TokenType.MINUS, TokenType.MULTIPLY, TokenType.DIVIDE):
+    def _emit_bin_op(self, op_type, left, right):
+        """Emit the instruction of a binary operation on already generated operands."""
+        if op_type in ARITHMETIC_OPERATORS:
             result = self.get_temp()
-            op = {
-                TokenType.PLUS: "ADD",
-                TokenType.MINUS: "SUB",
-                TokenType.MULTIPLY: "MUL",
-                TokenType.DIVIDE: "DIV"
-            }[node.op.type]
+            op = ARITHMETIC_OPERATORS[op_type]
             self.add_instruction(op, left, right, result, f"Perform {op} operation")
             return result
-        elif node.op.type in (TokenType.GREATER_THAN, TokenType.LESS_THAN, TokenType.EQUALS):
+        elif op_type in COMPARISON_OPERATORS:
             result = self.get_temp()
-            op = {
-                TokenType.GREATER_THAN: "GT",
-                TokenType.LESS_THAN: "LT",
-                TokenType.EQUALS: "EQ"
-            }[node.op.type]
+            op = COMPARISON_OPERATORS[op_type]
             self.add_instruction(op, left, right, result, f"Compare {left} {op} {right}")
             return result
+        elif op_type in LOGICAL_OPERATORS:
+            result = self.get_temp()
+            op = LOGICAL_OPERATORS[op_type]
+            self.add_instruction(op, left, right, result, f"Combine {left} {op} {right}")
+            return result
         return None
 
+    def _emit_unary_op(self, op_type, operand):
+        """Emit the instruction of a unary operation on an already generated operand."""
+        result = self.get_temp()
+        op = UNARY_OPERATORS[op_type]
+        self.add_instruction(op, operand, None, result, f"Perform {op} operation")
+        return result
+
     def generate_variable(self, node):
         """Generate code for variable reference."""
+        return self._load_variable(node.value)
+
+    def _load_variable(self, name):
         # Si la variable ya tiene un valor conocido, usarlo directamente
-        if node.value in self.value_table and self.value_table[node.value] is not None:
-            return str(self.value_table[node.value])
+        if name in self.value_table and self.value_table[name] is not None:
+            return str(self.value_table[name])
         
         # Si no, cargar la variable
-        self.add_instruction("LOAD", node.value, None, None, f"Load variable {node.value}")
-        return node.value
+        self.add_instruction("LOAD", name, None, None, f"Load variable {name}")
+        return name
 
     def generate_number(self, node):
         """Generate code for number literal."""
-        self.add_instruction("LOAD", str(node.value), None, None, f"Load constant {node.value}")
-        return str(node.value)
+        return self._load_constant(node.value)
+
+    def _load_constant(self, value):
+        self.add_instruction("LOAD", str(value), None, None, f"Load constant {value}")
+        return str(value)
 
     def generate_print(self, node):
         """Generate code for print statement."""
@@ -185,6 +233,9 @@ class IntermediateCodeGenerator:
             result = self.generate_bin_op(node.value)
             if result:
                 self.add_instruction("PRINT", result, None, None, f"Print expression result")
+        elif isinstance(node.value, UnaryOpNode):
+            result = self.generate_unary_op(node.value)
+            self.add_instruction("PRINT", result, None, None, f"Print expression result")
 
     def generate_if(self, node):
         """Generate code for if statement."""
@@ -192,8 +243,11 @@ class IntermediateCodeGenerator:
         if isinstance(node.condition, BinOpNode):
             condition = self.generate_bin_op(node.condition)
             # Generar comparación
-            if node.condition.op.type in (TokenType.GREATER_THAN, TokenType.LESS_THAN, TokenType.EQUALS):
+            if node.condition.op.type in COMPARISON_OPERATORS:
                 self.add_instruction("CMP", condition, "0", None, f"Compare {condition} with 0")
+        elif isinstance(node.condition, UnaryOpNode):
+            condition = self.generate_unary_op(node.condition)
+            self.add_instruction("CMP", condition, "0", None, f"Compare {condition} with 0")
         elif isinstance(node.condition, VarNode):
             condition = self.generate_variable(node.condition)
             self.add_instruction("CMP", condition, "0", None, f"Compare {condition} with 0")
@@ -239,8 +293,11 @@ class IntermediateCodeGenerator:
         if isinstance(node.condition, BinOpNode):
             condition = self.generate_bin_op(node.condition)
             # Generar comparación
-            if node.condition.op.type in (TokenType.GREATER_THAN, TokenType.LESS_THAN, TokenType.EQUALS):
+            if node.condition.op.type in COMPARISON_OPERATORS:
                 self.add_instruction("CMP", condition, "0", None, f"Compare {condition} with 0")
+        elif isinstance(node.condition, UnaryOpNode):
+            condition = self.generate_unary_op(node.condition)
+            self.add_instruction("CMP", condition, "0", None, f"Compare {condition} with 0")
         elif isinstance(node.condition, VarNode):
             condition = self.generate_variable(node.condition)
             self.add_instruction("CMP", condition, "0", None, f"Compare {condition} with 0")
@@ -261,6 +318,120 @@ class IntermediateCodeGenerator:
         # Generar etiqueta final
         self.add_instruction("LABEL", end_label, None, None, "End of while loop")
     
+    def generate_arena(self, arena: NodeArena, index: Optional[int] = None):
+        """Generate intermediate code from a NodeArena, reading its arrays directly.
+
+        Produces the same code as generate() on the equivalent object AST.
+        """
+        if index is None:
+            index = arena.root
+        kind = arena.kinds[index]
+        if kind == BLOCK:
+            for statement in arena.block(index):
+                self.generate_arena(arena, statement)
+        elif kind == ASSIGN:
+            self._generate_arena_assignment(arena, index)
+        elif kind == PRINT:
+            self._generate_arena_print(arena, index)
+        elif kind == IF:
+            self._generate_arena_if(arena, index)
+        elif kind == WHILE:
+            self._generate_arena_while(arena, index)
+        else:
+            self.generate_arena_expression(arena, index)
+
+    def generate_arena_expression(self, arena: NodeArena, index: int):
+        """Generate code for an arena expression, operands first, without recursion."""
+        kinds = arena.kinds
+        results = []
+        stack = [(index, False)]
+        while stack:
+            index, expanded = stack.pop()
+            kind = kinds[index]
+            if kind == BIN_OP:
+                if expanded:
+                    right = results.pop()
+                    left = results.pop()
+                    results.append(self._emit_bin_op(arena.op(index), left, right))
+                else:
+                    stack.append((index, True))
+                    stack.append((arena.child1[index], False))
+                    stack.append((arena.child0[index], False))
+            elif kind == UNARY_OP:
+                if expanded:
+                    results.append(self._emit_unary_op(arena.op(index), results.pop()))
+                else:
+                    stack.append((index, True))
+                    stack.append((arena.child0[index], False))
+            elif kind == VAR:
+                results.append(self._load_variable(arena.value(index)))
+            else:
+                results.append(self._load_constant(arena.value(index)))
+        return results.pop()
+
+    def _generate_arena_assignment(self, arena: NodeArena, index: int):
+        target = arena.value(arena.child0[index])
+        right = arena.child1[index]
+        if arena.kinds[right] == NUM:
+            result = str(arena.value(right))
+        else:
+            result = self.generate_arena_expression(arena, right)
+
+        if result:
+            self.add_instruction("ASSIGN", result, None, target, f"Assign {result} to {target}")
+            self.value_table[target] = result
+        else:
+            value = arena.value(right)
+            self.add_instruction("ASSIGN", str(value), None, target, f"Assign {value} to {target}")
+            self.value_table[target] = str(value)
+
+    def _generate_arena_print(self, arena: NodeArena, index: int):
+        value = arena.child0[index]
+        kind = arena.kinds[value]
+        if kind == VAR:
+            self.add_instruction("PRINT", arena.value(value), None, None, f"Print variable {arena.value(value)}")
+        elif kind == NUM:
+            self.add_instruction("PRINT", str(arena.value(value)), None, None, f"Print constant {arena.value(value)}")
+        else:
+            result = self.generate_arena_expression(arena, value)
+            if result:
+                self.add_instruction("PRINT", result, None, None, f"Print expression result")
+
+    def _generate_arena_condition(self, arena: NodeArena, index: int) -> str:
+        kind = arena.kinds[index]
+        if kind == NUM:
+            condition = str(arena.value(index))
+        else:
+            condition = self.generate_arena_expression(arena, index)
+        # As in generate_if(), only arithmetic and logical operations are
+        # not followed by a CMP
+        if kind != BIN_OP or arena.op(index) in COMPARISON_OPERATORS:
+            self.add_instruction("CMP", condition, "0", None, f"Compare {condition} with 0")
+        return condition
+
+    def _generate_arena_if(self, arena: NodeArena, index: int):
+        condition = self._generate_arena_condition(arena, arena.child0[index])
+        branches = arena.child1[index]
+        else_label = self.get_label()
+        end_label = self.get_label()
+        self.add_instruction("JZ", condition, else_label, None, f"If {condition} is false, jump to else")
+        self.generate_arena(arena, arena.child0[branches])
+        self.add_instruction("JMP", end_label, None, None, "Jump to end of if")
+        self.add_instruction("LABEL", else_label, None, None, "Else branch")
+        if arena.child1[branches] != -1:
+            self.generate_arena(arena, arena.child1[branches])
+        self.add_instruction("LABEL", end_label, None, None, "End of if")
+
+    def _generate_arena_while(self, arena: NodeArena, index: int):
+        start_label = self.get_label()
+        end_label = self.get_label()
+        self.add_instruction("LABEL", start_label, None, None, "Start of while loop")
+        condition = self._generate_arena_condition(arena, arena.child0[index])
+        self.add_instruction("JZ", condition, end_label, None, f"If {condition} is false, exit loop")
+        self.generate_arena(arena, arena.child1[index])
+        self.add_instruction("JMP", start_label, None, None, "Jump back to start of loop")
+        self.add_instruction("LABEL", end_label, None, None, "End of while loop")
+
     def get_code(self) -> List[ThreeAddressCode]:
         """Get the generated intermediate code."""
         return self.code 
\ No newline at end of file
@@ -1,139 +1,15 @@
 """
 Enhanced lexical analyzer with improved token recognition and error handling.
 """
-from enum import Enum, auto
+import re
+from sys import intern
+from itertools import product
+from types import MappingProxyType
 from dataclasses import dataclass
-from typing import Optional
-
-class TokenType(Enum):
-    # Keywords
-    PROGRAM = auto()
-    VAR = auto()
-    INT = auto()
-    FLOAT = auto()
-    STRING = auto()
-    IF = auto()
-    ELSE = auto()
-    WHILE = auto()
-    FOR = auto()
-    DO = auto()
-    FUNCTION = auto()
-    RETURN = auto()
-    PRINT = auto()
-    
-    # Data types
-    INTEGER_CONST = auto()
-    FLOAT_CONST = auto()
-    STRING_LITERAL = auto()
-    BOOL = auto()
-    
-    # Operators
-    PLUS = auto()
-    MINUS = auto()
-    MULTIPLY = auto()
-    DIVIDE = auto()
-    MODULO = auto()
-    ASSIGN = auto()
-    
-    # Comparison
-    EQUALS = auto()
-    NOT_EQUALS = auto()
-    LESS_THAN = auto()
-    GREATER_THAN = auto()
-    LESS_EQUALS = auto()
-    GREATER_EQUALS = auto()
-    
-    # Logical operators
-    AND = auto()
-    OR = auto()
-    NOT = auto()
-    
-    # Delimiters
-    LPAREN = auto()
-    RPAREN = auto()
-    LBRACE = auto()
-    RBRACE = auto()
-    LBRACKET = auto()
-    RBRACKET = auto()
-    SEMICOLON = auto()
-    COMMA = auto()
-    DOT = auto()
-    COLON = auto()
-    
-    # Others
-    IDENTIFIER = auto()
-    COMMENT = auto()
-    EOF = auto()
-    ERROR = auto()
-    TRUE = auto()
-    FALSE = auto()
-
-    def to_spanish(self) -> str:
-        """Convert token type to Spanish label."""
-        translations = {
-            # Keywords
-            TokenType.PROGRAM: "PROGRAMA",
-            TokenType.VAR: "VARIABLE",
-            TokenType.INT: "ENTERO",
-            TokenType.FLOAT: "REAL",
-            TokenType.STRING: "CADENA",
-            TokenType.IF: "SI",
-            TokenType.ELSE: "SINO",
-            TokenType.WHILE: "MIENTRAS",
-            TokenType.FOR: "PARA",
-            TokenType.DO: "HACER",
-            TokenType.FUNCTION: "FUNCION",
-            TokenType.RETURN: "RETORNAR",
-            TokenType.PRINT: "IMPRIMIR",
-            
-            # Data types
-            TokenType.INTEGER_CONST: "CONSTANTE_ENTERA",
-            TokenType.FLOAT_CONST: "CONSTANTE_REAL",
-            TokenType.STRING_LITERAL: "CADENA_LITERAL",
-            TokenType.BOOL: "BOOLEANO",
-            
-            # Operators
-            TokenType.PLUS: "SUMA",
-            TokenType.MINUS: "RESTA",
-            TokenType.MULTIPLY: "MULTIPLICACION",
-            TokenType.DIVIDE: "DIVISION",
-            TokenType.MODULO: "MODULO",
-            TokenType.ASSIGN: "ASIGNACION",
-            
-            # Comparison
-            TokenType.EQUALS: "IGUAL",
-            TokenType.NOT_EQUALS: "DIFERENTE",
-            TokenType.LESS_THAN: "MENOR_QUE",
-            TokenType.GREATER_THAN: "MAYOR_QUE",
-            TokenType.LESS_EQUALS: "MENOR_IGUAL",
-            TokenType.GREATER_EQUALS: "MAYOR_IGUAL",
-            
-            # Logical operators
-            TokenType.AND: "Y",
-            TokenType.OR: "O",
-            TokenType.NOT: "NO",
-            
-            # Delimiters
-            TokenType.LPAREN: "PARENTESIS_IZQ",
-            TokenType.RPAREN: "PARENTESIS_DER",
-            TokenType.LBRACE: "LLAVE_IZQ",
-            TokenType.RBRACE: "LLAVE_DER",
-            TokenType.LBRACKET: "CORCHETE_IZQ",
-            TokenType.RBRACKET: "CORCHETE_DER",
-            TokenType.SEMICOLON: "PUNTO_COMA",
-            TokenType.COMMA: "COMA",
-            TokenType.DOT: "PUNTO",
-            TokenType.COLON: "DOS_PUNTOS",
-            
-            # Others
-            TokenType.IDENTIFIER: "IDENTIFICADOR",
-            TokenType.COMMENT: "COMENTARIO",
-            TokenType.EOF: "FIN_ARCHIVO",
-            TokenType.ERROR: "ERROR",
-            TokenType.TRUE: "VERDADERO",
-            TokenType.FALSE: "FALSO"
-        }
-        return translations.get(self, str(self))
+from typing import Dict, List, NamedTuple, Optional, Tuple
+from . import token_spec
+from .line_index import LineIndex
+from .token_spec import SYMBOLS, TokenType
 
 @dataclass
 class Token:
@@ -142,12 +18,93 @@ class Token:
     line: int
     column: int
     error_message: Optional[str] = None
+    # En los diagnósticos del lexer: 'error' o 'warning'
+    severity: Optional[str] = None
 
     def __str__(self) -> str:
         if self.error_message:
             return f"Token({self.type.to_spanish()}, '{self.value}', línea={self.line}, columna={self.column}, error='{self.error_message}')"
         return f"Token({self.type.to_spanish()}, '{self.value}', línea={self.line}, columna={self.column})"
 
+class SpanToken:
+    """Token que solo guarda (type, start, end) sobre el texto del lexer.
+    
+    `value`, `line` y `column` se calculan en el primer acceso y se guardan,
+    así que quien solo consulta `.type` nunca crea subcadenas.
+    """
+    __slots__ = ('type', 'start', 'end', 'source', '_value', '_line', '_column')
+    error_message = None
+
+    def __init__(self, type: TokenType, start: int, end: int, source: 'Lexer'):
+        self.type = type
+        self.start = start
+        self.end = end
+        self.source = source
+
+    @property
+    def text(self) -> str:
+        """Lexema tal como aparece en el código fuente."""
+        return self.source.text[self.start:self.end]
+
+    @property
+    def value(self):
+        try:
+            return self._value
+        except AttributeError:
+            pass
+        if self.type == TokenType.EOF:
+            value = None
+        elif self.type == TokenType.INTEGER_CONST:
+            value = int(self.text)
+        elif self.type == TokenType.FLOAT_CONST:
+            value = float(self.text)
+        elif self.type == TokenType.STRING_LITERAL:
+            value = _unescape(self.source.text[self.start + 1:self.end - 1])
+        elif self.type == TokenType.IDENTIFIER:
+            value = intern(self.text)
+        else:
+            value = self.text
+        self._value = value
+        return value
+
+    @property
+    def line(self) -> int:
+        # Como en Token, la línea de una cadena multilínea es la de su final
+        try:
+            return self._line
+        except AttributeError:
+            self._line = self.source.line_index.line_of(self.end)
+            return self._line
+
+    @property
+    def column(self) -> int:
+        try:
+            return self._column
+        except AttributeError:
+            self._column = self.source.line_index.column_of(self.start)
+            return self._column
+
+    def __str__(self) -> str:
+        return f"Token({self.type.to_spanish()}, '{self.value}', línea={self.line}, columna={self.column})"
+
+    def __repr__(self) -> str:
+        return f"SpanToken(type={self.type}, start={self.start}, end={self.end})"
+
+class ErrorSpanToken(SpanToken):
+    """SpanToken de tipo ERROR producido en modo de recuperación."""
+    __slots__ = ('error_message',)
+
+    def __init__(self, start: int, end: int, source: 'Lexer', error_message: str):
+        super().__init__(TokenType.ERROR, start, end, source)
+        self.error_message = error_message
+
+class LexerSnapshot(NamedTuple):
+    """Estado de un Lexer entre dos tokens; línea y columna se deducen de pos."""
+    pos: int
+    error_count: int
+    warning_count: int
+    diagnostic_count: int
+
 class LexicalError(Exception):
     def __init__(self, message: str, line: int, column: int):
         self.message = message
@@ -155,36 +112,132 @@ class LexicalError(Exception):
         self.column = column
         super().__init__(f"Error léxico: {message} en línea {line}, columna {column}")
 
+# Operadores y delimitadores de la especificación de tokens
+_OPERATORS = SYMBOLS
+
+# Alternancia de los operadores, los más largos primero para que '=='
+# gane a '='. Solo contiene caracteres ASCII; también la usa mapped_lexer
+OPERATOR_PATTERN = '|'.join(map(re.escape, sorted(_OPERATORS, key=len, reverse=True)))
+
+def _operators_by_start() -> Dict[str, Tuple[Tuple[str, TokenType], ...]]:
+    """Operadores del motor escalar por su primer carácter, los más largos primero."""
+    table: Dict[str, List[Tuple[str, TokenType]]] = {}
+    for lexeme in sorted(_OPERATORS, key=len, reverse=True):
+        table.setdefault(lexeme[0], []).append((lexeme, _OPERATORS[lexeme]))
+    return {char: tuple(entries) for char, entries in table.items()}
+
+_OPERATORS_BY_START = _operators_by_start()
+
+# Expresión maestra del motor "regex": una sola alternancia compilada que
+# reconoce el siguiente lexema en una llamada. El orden de las alternativas
+# reproduce las prioridades de get_next_token (comentarios antes que '/',
+# '==' antes que '=', etc.). Los espacios, comentarios, cadenas y operadores
+# salen de la especificación; identificadores y números solo se reconocen
+# aquí en ASCII, el resto lo resuelve el motor escalar.
+_TOKEN_REGEX = re.compile(r'''
+    [ \t]*                         # Espacios horizontales previos al lexema
+  (?:
+    (?P<WHITESPACE>{whitespace})
+  | (?P<IDENTIFIER>[A-Za-z_]\w*)
+  | (?P<NUMBER>[0-9][0-9.]*)
+  | (?P<COMMENT>{comment})
+  | (?P<OPEN_COMMENT>/\*)
+  | (?P<OPERATOR>{operator})
+  | (?P<STRING_LITERAL>{string})
+  | (?P<OTHER>(?s:.))
+  )
+'''.format(whitespace=token_spec.SPECS_BY_TYPE[TokenType.WHITESPACE].pattern,
+           comment=token_spec.SPECS_BY_TYPE[TokenType.COMMENT].pattern,
+           operator=OPERATOR_PATTERN,
+           string=token_spec.SPECS_BY_TYPE[TokenType.STRING_LITERAL].pattern), re.VERBOSE)
+
+_STRING_ESCAPES = {'n': '\n', 't': '\t', 'r': '\r', '"': '"', '\\': '\\'}
+_ESCAPE_REGEX = re.compile(r'\\(.)')
+
+# Palabras clave del lenguaje, compartidas por todos los lexers
+KEYWORDS = MappingProxyType(token_spec.KEYWORDS)
+
+# Las palabras clave no distinguen mayúsculas. En lugar de llamar a lower()
+# en cada identificador, la tabla contiene todas las variantes de mayúsculas
+# de cada palabra clave (unas 720 entradas): basta una consulta exacta.
+# Ningún carácter no ASCII pasa a minúsculas como una letra de una palabra
+# clave, así que el resultado es el mismo que con lower().
+KEYWORD_TABLE = MappingProxyType({
+    ''.join(variant): token_type
+    for word, token_type in KEYWORDS.items()
+    for variant in product(*({char, char.upper()} for char in word))
+})
+
+# Longitud de la palabra clave más larga ('function'): ningún identificador
+# más largo necesita consultar la tabla
+_MAX_KEYWORD_LENGTH = max(map(len, KEYWORDS))
+
+def _unescape(value: str) -> str:
+    """Sustituye las secuencias de escape de una cadena ya validada."""
+    if '\\' in value:
+        return _ESCAPE_REGEX.sub(lambda e: _STRING_ESCAPES[e.group(1)], value)
+    return value
+
 class Lexer:
-    def __init__(self, text: str):
+    ENGINES = ('scalar', 'regex', 'generated')
+
+    def __init__(self, text: str, engine: str = 'scalar', span_tokens: bool = False,
+                 recover: bool = False, trivia: bool = False):
+        if engine not in self.ENGINES:
+            raise ValueError(f"Motor léxico desconocido: {engine}")
+        if span_tokens and engine != 'regex':
+            raise ValueError("Los tokens por rango requieren engine='regex'")
+        if trivia and engine != 'regex':
+            raise ValueError("Los tokens de espacios y comentarios requieren engine='regex'")
         self.text = text
+        self.engine = engine
+        self.span_tokens = span_tokens
+        self.recover = recover
+        self.trivia = trivia
         self.pos = 0
         self.current_char = self.text[0] if text else None
-        self.line = 1
-        self.column = 1
+        self._line_index = None
         self.error_count = 0  # Contador de errores
         self.warning_count = 0  # Contador de advertencias
-        
-        self.keywords = {
-            'program': TokenType.PROGRAM,
-            'var': TokenType.VAR,
-            'int': TokenType.INT,
-            'float': TokenType.FLOAT,
-            'string': TokenType.STRING,
-            'if': TokenType.IF,
-            'else': TokenType.ELSE,
-            'while': TokenType.WHILE,
-            'for': TokenType.FOR,
-            'do': TokenType.DO,
-            'function': TokenType.FUNCTION,
-            'return': TokenType.RETURN,
-            'print': TokenType.PRINT,
-            'and': TokenType.AND,
-            'or': TokenType.OR,
-            'not': TokenType.NOT,
-            'true': TokenType.TRUE,
-            'false': TokenType.FALSE,
-        }
+        self.diagnostics: List[Token] = []  # Errores y advertencias, como tokens ERROR (ver severity)
+        self._token_start = 0
+        self.keywords = KEYWORDS
+        if engine == 'regex':
+            self._next_token = self._regex_tokens().__next__
+        elif engine == 'generated':
+            from .lexer_generator import load_lexer
+            self._generated = load_lexer()(text)
+            self._next_token = self._generated_next_token
+        else:
+            self._next_token = self._scalar_next_token
+
+    @classmethod
+    def from_path(cls, path: str) -> 'MappedLexer':
+        """Analiza un archivo UTF-8 mapeado en memoria, sin decodificarlo entero.
+
+        Devuelve un MappedLexer con la misma interfaz get_next_token(); su
+        memoria no crece con el tamaño del archivo más allá de las páginas
+        mapeadas.
+        """
+        from .mapped_lexer import MappedLexer
+        return MappedLexer(path)
+
+    @property
+    def line_index(self) -> LineIndex:
+        """Tabla de inicios de línea del texto, construida en el primer uso."""
+        if self._line_index is None:
+            self._line_index = LineIndex(self.text)
+        return self._line_index
+    
+    @property
+    def line(self) -> int:
+        """Línea de la posición actual."""
+        return self.line_index.line_of(self.pos)
+    
+    @property
+    def column(self) -> int:
+        """Columna de la posición actual."""
+        return self.line_index.column_of(self.pos)
     
     def error(self, message="Carácter inválido"):
         """Registra un error léxico."""
@@ -194,24 +247,43 @@ class Lexer:
     def warning(self, message: str) -> Token:
         """Registra una advertencia léxica y retorna un token de error."""
         self.warning_count += 1
-        return Token(
+        token = Token(
             type=TokenType.ERROR,
             value=self.current_char,
             line=self.line,
             column=self.column,
-            error_message=message
+            error_message=message,
+            severity='warning'
         )
+        self.diagnostics.append(token)
+        return token
     
     def advance(self):
         """Avanza el cursor un carácter."""
         self.pos += 1
-        if self.current_char == '\n':
-            self.line += 1
-            self.column = 1
-        else:
-            self.column += 1
         self.current_char = self.text[self.pos] if self.pos < len(self.text) else None
     
+    def seek(self, pos: int):
+        """Sitúa el cursor en `pos`, que debe ser un límite entre tokens."""
+        self.pos = pos
+        self.current_char = self.text[pos] if pos < len(self.text) else None
+        if self.engine == 'regex':
+            # El generador guarda la posición en variables locales
+            self._next_token = self._regex_tokens().__next__
+        elif self.engine == 'generated':
+            self._generated.seek(pos, *self.line_index.position(pos))
+    
+    def snapshot(self) -> LexerSnapshot:
+        """Guarda el estado actual para volver a él con restore()."""
+        return LexerSnapshot(self.pos, self.error_count, self.warning_count, len(self.diagnostics))
+    
+    def restore(self, snapshot: LexerSnapshot):
+        """Vuelve al estado guardado; se descartan los diagnósticos posteriores."""
+        self.seek(snapshot.pos)
+        self.error_count = snapshot.error_count
+        self.warning_count = snapshot.warning_count
+        del self.diagnostics[snapshot.diagnostic_count:]
+    
     def peek(self):
         """Mira el siguiente carácter sin avanzar."""
         peek_pos = self.pos + 1
@@ -241,10 +313,9 @@ class Lexer:
                 if self.current_char == '*' and self.peek() == '/':
                     self.advance()  # Salta *
                     self.advance()  # Salta /
-                    break
+                    return
                 self.advance()
-            if not self.current_char:
-                self.error("Comentario multilínea no cerrado")
+            self.error("Comentario multilínea no cerrado")
     
     def number(self):
         """Retorna un token numérico (entero o real)."""
@@ -309,11 +380,62 @@ class Lexer:
         if len(result) > 32:
             self.warning(f"Identificador demasiado largo: {result[:32]}...")
         
-        token_type = self.keywords.get(result.lower(), TokenType.IDENTIFIER)
+        # Los nombres repetidos comparten un único objeto str
+        result = intern(result)
+        if len(result) > _MAX_KEYWORD_LENGTH:
+            token_type = TokenType.IDENTIFIER
+        else:
+            token_type = KEYWORD_TABLE.get(result, TokenType.IDENTIFIER)
         return Token(token_type, result, self.line, start_column)
     
     def get_next_token(self) -> Token:
+        """Retorna el siguiente token usando el motor seleccionado."""
+        if not self.recover:
+            return self._next_token()
+        try:
+            return self._next_token()
+        except LexicalError as error:
+            return self._recover(error)
+    
+    def _recover(self, error: LexicalError) -> Token:
+        """Convierte un error en un token ERROR y continúa tras el lexema erróneo.
+        
+        El token lleva la línea y columna del error. Con span_tokens se
+        devuelve un ErrorSpanToken, situado como cualquier otro token.
+        """
+        start = self._token_start
+        end = self._error_end(start)
+        token = Token(TokenType.ERROR, self.text[start:end], error.line, error.column, error.message, 'error')
+        self.diagnostics.append(token)
+        self.seek(end)
+        if self.span_tokens:
+            return ErrorSpanToken(start, end, self, error.message)
+        return token
+    
+    def _error_end(self, start: int) -> int:
+        """Fin del lexema erróneo que empieza en `start`, donde se resincroniza."""
+        text = self.text
+        char = text[start]
+        if char == '"':
+            # Hasta la comilla de cierre, saltando cualquier secuencia de escape
+            pos = start + 1
+            while pos < len(text) and text[pos] != '"':
+                pos += 2 if text[pos] == '\\' else 1
+            return min(pos + 1, len(text))
+        if char == '/':
+            # Comentario multilínea sin cerrar: ocupa el resto del texto
+            return len(text)
+        if char.isdigit():
+            pos = start
+            while pos < len(text) and (text[pos].isdigit() or text[pos] == '.'):
+                pos += 1
+            return pos
+        return start + 1
+    
+    def _scalar_next_token(self) -> Token:
+        """Motor carácter a carácter."""
         while self.current_char:
+            self._token_start = self.pos
             if self.current_char.isspace():
                 self.skip_whitespace()
                 continue
@@ -324,69 +446,163 @@ class Lexer:
             if self.current_char.isalpha() or self.current_char == '_':
                 return self.identifier()
             
-            if self.current_char == '+':
-                self.advance()
-                return Token(TokenType.PLUS, '+', self.line, self.column - 1)
-            
-            if self.current_char == '-':
-                self.advance()
-                return Token(TokenType.MINUS, '-', self.line, self.column - 1)
-            
-            if self.current_char == '*':
-                self.advance()
-                return Token(TokenType.MULTIPLY, '*', self.line, self.column - 1)
-            
-            if self.current_char == '/':
-                self.advance()
-                if self.current_char == '/' or self.current_char == '*':
-                    self.skip_comment()
-                    continue
-                return Token(TokenType.DIVIDE, '/', self.line, self.column - 1)
-            
-            if self.current_char == '=':
-                self.advance()
-                if self.current_char == '=':
-                    self.advance()
-                    return Token(TokenType.EQUALS, '==', self.line, self.column - 2)
-                return Token(TokenType.ASSIGN, '=', self.line, self.column - 1)
+            if self.current_char == '/' and (self.peek() == '/' or self.peek() == '*'):
+                self.skip_comment()
+                continue
             
-            if self.current_char == '>':
-                self.advance()
-                if self.current_char == '=':
-                    self.advance()
-                    return Token(TokenType.GREATER_EQUALS, '>=', self.line, self.column - 2)
-                return Token(TokenType.GREATER_THAN, '>', self.line, self.column - 1)
+            # Operadores y delimitadores, el más largo que aparezca
+            for lexeme, token_type in _OPERATORS_BY_START.get(self.current_char, ()):
+                if self.text.startswith(lexeme, self.pos):
+                    column = self.column
+                    for _ in lexeme:
+                        self.advance()
+                    return Token(token_type, lexeme, self.line, column)
             
-            if self.current_char == '<':
-                self.advance()
-                if self.current_char == '=':
-                    self.advance()
-                    return Token(TokenType.LESS_EQUALS, '<=', self.line, self.column - 2)
-                return Token(TokenType.LESS_THAN, '<', self.line, self.column - 1)
-            
-            if self.current_char == '(':
-                self.advance()
-                return Token(TokenType.LPAREN, '(', self.line, self.column - 1)
+            if self.current_char == '"':
+                return self.string()
             
-            if self.current_char == ')':
-                self.advance()
-                return Token(TokenType.RPAREN, ')', self.line, self.column - 1)
+            self.error(f"Carácter no reconocido: '{self.current_char}'")
+        
+        return Token(TokenType.EOF, None, self.line, self.column)
+    
+    def _generated_next_token(self) -> Token:
+        """Motor generado a partir de token_spec (ver lexer_generator).
+        
+        El lexer generado lleva su propia posición: se copia aquí tras cada
+        token, junto con sus errores y advertencias, para que la recuperación,
+        snapshot() y los diagnósticos funcionen como con los otros motores.
+        """
+        generated = self._generated
+        warnings = generated.warning_count
+        try:
+            token = generated.get_next_token()
+        except LexicalError:
+            self._token_start = generated.token_start
+            self.pos = generated.pos
+            self.current_char = self.text[self.pos] if self.pos < len(self.text) else None
+            self.error_count += 1
+            raise
+        self.pos = generated.pos
+        self.current_char = self.text[self.pos] if self.pos < len(self.text) else None
+        if generated.warning_count != warnings:
+            self.warning(f"Identificador demasiado largo: {token.value[:32]}...")
+        return token
+    
+    def _trivia_token(self, token_type: TokenType, start: int, end: int):
+        """Token de espacios o comentario; su valor es el propio lexema."""
+        if self.span_tokens:
+            return SpanToken(token_type, start, end, self)
+        line_index = self.line_index
+        return Token(token_type, self.text[start:end], line_index.line_of(end), line_index.column_of(start))
+    
+    def _regex_tokens(self):
+        """Motor basado en _TOKEN_REGEX: un match por lexema en lugar de un advance() por carácter.
+        
+        Es un generador para conservar el estado en variables locales entre
+        tokens. Las situaciones poco frecuentes (errores, dígitos o letras no
+        ASCII) se delegan al motor escalar desde la misma posición, de modo
+        que ambos motores producen exactamente los mismos tokens y errores.
+        Con span_tokens=True produce SpanToken y no materializa los valores.
+        Con trivia=True también produce los espacios (WHITESPACE) y los
+        comentarios (COMMENT) como tokens, de modo que los lexemas de todos
+        los tokens concatenados reproducen el texto exacto.
+        """
+        text = self.text
+        length = len(text)
+        match = _TOKEN_REGEX.match
+        keywords = KEYWORD_TABLE
+        spans = self.span_tokens
+        trivia = self.trivia
+        pos = self.pos
+        
+        while True:
+            if pos >= length:
+                self.pos = pos
+                self.current_char = None
+                if spans:
+                    yield SpanToken(TokenType.EOF, pos, pos, self)
+                else:
+                    yield Token(TokenType.EOF, None, *self.line_index.position(pos))
+                continue
             
-            if self.current_char == '{':
-                self.advance()
-                return Token(TokenType.LBRACE, '{', self.line, self.column - 1)
+            m = match(text, pos)
+            kind = m.lastgroup
+            if kind is None:
+                # Solo quedaban espacios horizontales hasta el final
+                pos = length
+                continue
+            start, end = m.span(kind)
             
-            if self.current_char == '}':
-                self.advance()
-                return Token(TokenType.RBRACE, '}', self.line, self.column - 1)
+            if trivia:
+                if kind == 'WHITESPACE':
+                    # Un único token con los espacios del prefijo
+                    start = pos
+                elif start > pos:
+                    self.pos = start
+                    self.current_char = text[start]
+                    yield self._trivia_token(TokenType.WHITESPACE, pos, start)
+                if kind == 'WHITESPACE' or kind == 'COMMENT':
+                    self.pos = pos = end
+                    self.current_char = text[end] if end < length else None
+                    yield self._trivia_token(
+                        TokenType.WHITESPACE if kind == 'WHITESPACE' else TokenType.COMMENT, start, end)
+                    continue
             
-            if self.current_char == ';':
-                self.advance()
-                return Token(TokenType.SEMICOLON, ';', self.line, self.column - 1)
+            if kind == 'WHITESPACE' or kind == 'COMMENT':
+                pos = end
+                continue
             
-            if self.current_char == '"':
-                return self.string()
+            value = None
+            if kind == 'IDENTIFIER':
+                if end - start > 32:
+                    self.pos = end
+                    self.current_char = text[end] if end < length else None
+                    self.warning(f"Identificador demasiado largo: {text[start:start + 32]}...")
+                if end - start > _MAX_KEYWORD_LENGTH:
+                    token_type = TokenType.IDENTIFIER
+                    if not spans:
+                        value = intern(text[start:end])
+                else:
+                    value = intern(text[start:end])
+                    token_type = keywords.get(value, TokenType.IDENTIFIER)
+            elif kind == 'OPERATOR':
+                value = text[start:end]
+                token_type = _OPERATORS[value]
+            elif kind == 'STRING_LITERAL':
+                if not spans:
+                    value = _unescape(text[start + 1:end - 1])
+                token_type = TokenType.STRING_LITERAL
+            elif kind == 'NUMBER' and text.count('.', start, end) < 2 and (
+                    end == length or not text[end].isdigit()):
+                if text.find('.', start, end) >= 0:
+                    token_type = TokenType.FLOAT_CONST
+                    if not spans:
+                        value = float(text[start:end])
+                else:
+                    token_type = TokenType.INTEGER_CONST
+                    if not spans:
+                        value = int(text[start:end])
+            else:
+                # Comentario sin cerrar, cadena inválida, número con varios
+                # puntos o carácter no ASCII: lo resuelve el motor escalar
+                self.pos = start
+                self.current_char = text[start]
+                try:
+                    token = self._scalar_next_token()
+                except LexicalError:
+                    # Un nuevo generador retoma desde la posición del error,
+                    # igual que una nueva llamada al motor escalar
+                    self._next_token = self._regex_tokens().__next__
+                    raise
+                pos = self.pos
+                yield SpanToken(token.type, start, pos, self) if spans else token
+                continue
             
-            self.error(f"Carácter no reconocido: '{self.current_char}'")
-        
-        return Token(TokenType.EOF, None, self.line, self.column) 
\ No newline at end of file
+            self.pos = pos = end
+            self.current_char = text[end] if end < length else None
+            if spans:
+                yield SpanToken(token_type, start, end, self)
+            else:
+                # La línea de una cadena multilínea es la de su final
+                line_index = self.line_index
+                yield Token(token_type, value, line_index.line_of(end), line_index.column_of(start)) 
\ No newline at end of file
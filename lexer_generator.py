@@ -0,0 +1,301 @@
+"""
+Generation of a specialized lexer module from the token specification.
+
+Run ``python -m compiler.lexer_generator`` to print the generated source.
+"""
+from typing import Dict, List, Sequence
+from .generated_code import load_generated
+from .lexer import LexicalError, Token, TokenType
+from .token_spec import TOKEN_SPECS, TokenSpec
+
+# Comment openers take precedence over the symbols they start with
+_COMMENT_OPENERS = {'//': 'line', '/*': 'block'}
+
+# Part of the cache key of the generated code: bump it whenever a change
+# here alters the source generated for the same specification
+_GENERATOR_VERSION = 2
+
+# GeneratedLexer classes by their specs, so that a Lexer(engine='generated')
+# after the first one neither generates nor hashes any source
+_lexers: Dict[tuple, type] = {}
+
+_HEADER = '''\
+# Lexer generated by compiler.lexer_generator from compiler.token_spec.
+# Do not edit: change the specification instead.
+# Token, TokenType and LexicalError are provided by the loader.
+import re
+from itertools import product
+from sys import intern
+
+_KEYWORDS = {
+    ''.join(variant): token_type
+    for word, token_type in {
+@KEYWORDS@
+    }.items()
+    for variant in product(*({char, char.upper()} for char in word))
+}
+_MAX_KEYWORD_LENGTH = @MAX_KEYWORD_LENGTH@
+
+# Symbols that are not the start of a longer symbol or of a comment
+_SINGLE = {
+@SINGLE@
+}
+
+_IDENTIFIER_START = frozenset('ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz_')
+_SPACE = frozenset(' \\t\\n\\r\\f\\v')
+_DIGITS = frozenset('0123456789')
+
+_WORD = re.compile(r'\\w*').match
+_WHITESPACE = re.compile(@WHITESPACE@).match
+_STRING = re.compile(@STRING@).match
+_STRING_PREFIX = re.compile(@STRING_PREFIX@).match
+_NUMBER = re.compile(r'[0-9.]*').match
+
+_ESCAPES = {'n': '\\n', 't': '\\t', 'r': '\\r', '"': '"', '\\\\': '\\\\'}
+_ESCAPE = re.compile(r'\\\\(.)')
+
+def _unescape(value):
+    if '\\\\' in value:
+        return _ESCAPE.sub(lambda e: _ESCAPES[e.group(1)], value)
+    return value
+
+class GeneratedLexer:
+    """Lexer with the get_next_token() interface of Lexer."""
+
+    def __init__(self, text):
+        self.text = text
+        self.pos = 0
+        self.error_count = 0
+        self.warning_count = 0
+        # Start of the lexeme of the last error
+        self.token_start = 0
+        self._next_token = self._tokens(0, 1, 0).__next__
+
+    def get_next_token(self):
+        return self._next_token()
+
+    def seek(self, pos, line, column):
+        """Resume lexing at `pos`, a token boundary at `line` and `column`."""
+        self.pos = pos
+        self._next_token = self._tokens(pos, line, pos - column + 1).__next__
+
+    def _error(self, message, error_pos, pos, line, line_start):
+        """Build the error at error_pos in the lexeme starting at pos; lexing
+        resumes from error_pos."""
+        self.token_start = pos
+        text = self.text
+        newline = text.rfind('\\n', pos, error_pos)
+        if newline != -1:
+            line += text.count('\\n', pos, newline + 1)
+            line_start = newline + 1
+        self.pos = error_pos
+        self.error_count += 1
+        self._next_token = self._tokens(error_pos, line, line_start).__next__
+        return LexicalError(message, line, error_pos - line_start + 1)
+
+    def _tokens(self, pos, line, line_start):
+        text = self.text
+        length = len(text)
+        keywords = _KEYWORDS
+        single = _SINGLE
+        word = _WORD
+        while True:
+            if pos >= length:
+                self.pos = pos = length
+                yield Token(TokenType.EOF, None, line, pos - line_start + 1)
+                continue
+            c = text[pos]
+'''
+
+def generate_lexer_source(specs: Sequence[TokenSpec] = TOKEN_SPECS) -> str:
+    """Python source of a lexer for the tokens in `specs`."""
+    by_type = {spec.type: spec for spec in specs}
+    keywords = {spec.lexeme: spec.type for spec in specs
+                if spec.lexeme and spec.lexeme.isidentifier()}
+    symbols = {spec.lexeme: spec.type for spec in specs
+               if spec.lexeme and not spec.lexeme.isidentifier()}
+
+    string_pattern = by_type[TokenType.STRING_LITERAL].pattern
+    if not string_pattern.endswith('"'):
+        raise ValueError("The string literal pattern must end with its closing quote")
+
+    # Prefix tree of every symbol and comment opener: first characters with
+    # a single outcome go to the _SINGLE table, the rest become branches
+    trie: Dict = {}
+    for lexeme, outcome in list(symbols.items()) + list(_COMMENT_OPENERS.items()):
+        node = trie
+        for char in lexeme:
+            node = node.setdefault(char, {})
+        node[None] = outcome
+    single = {char: node[None] for char, node in trie.items()
+              if list(node) == [None] and isinstance(node[None], TokenType)}
+
+    source = _HEADER
+    for marker, value in (
+            ('@KEYWORDS@', '\n'.join(f"        {word!r}: TokenType.{token_type.name},"
+                                     for word, token_type in keywords.items())),
+            ('@MAX_KEYWORD_LENGTH@', str(max(map(len, keywords)))),
+            ('@SINGLE@', '\n'.join(f"    {char!r}: (TokenType.{token_type.name}, {char!r}),"
+                                   for char, token_type in single.items())),
+            ('@WHITESPACE@', repr(by_type[TokenType.WHITESPACE].pattern)),
+            ('@STRING@', repr(string_pattern)),
+            ('@STRING_PREFIX@', repr(string_pattern[:-1]))):
+        source = source.replace(marker, value)
+
+    lines: List[str] = []
+    _emit_branch(lines, 'if c in _IDENTIFIER_START', _identifier_code())
+    _emit_branch(lines, 'elif c in single', [
+        "token_type, lexeme = single[c]",
+        "self.pos = pos + 1",
+        "yield Token(token_type, lexeme, line, pos - line_start + 1)",
+        "pos += 1",
+    ])
+    _emit_branch(lines, 'elif c in _SPACE', _whitespace_code())
+    for char, node in trie.items():
+        if char not in single:
+            _emit_branch(lines, f'elif c == {char!r}', _symbol_code(node, 1))
+    _emit_branch(lines, 'elif c in _DIGITS', _number_code())
+    _emit_branch(lines, "elif c == '\"'", _string_code())
+    # Characters outside ASCII, as in the scalar engine of Lexer
+    _emit_branch(lines, 'elif c.isspace()', _whitespace_code())
+    _emit_branch(lines, 'elif c.isdigit()', _number_code())
+    _emit_branch(lines, 'elif c.isalpha()', _identifier_code())
+    _emit_branch(lines, 'else', [
+        "raise self._error(f\"Carácter no reconocido: '{c}'\", pos, pos, line, line_start)",
+    ])
+    return source + ''.join(f"            {line}\n" for line in lines)
+
+def _emit_branch(lines: List[str], header: str, body: List[str]):
+    lines.append(header + ':')
+    lines.extend('    ' + line for line in body)
+
+def _identifier_code() -> List[str]:
+    return [
+        "end = word(text, pos + 1).end()",
+        "value = intern(text[pos:end])",
+        "if end - pos > 32:",
+        "    self.warning_count += 1",
+        "    token_type = TokenType.IDENTIFIER",
+        "elif end - pos > _MAX_KEYWORD_LENGTH:",
+        "    token_type = TokenType.IDENTIFIER",
+        "else:",
+        "    token_type = keywords.get(value, TokenType.IDENTIFIER)",
+        "self.pos = end",
+        "yield Token(token_type, value, line, pos - line_start + 1)",
+        "pos = end",
+    ]
+
+def _whitespace_code() -> List[str]:
+    return [
+        "end = _WHITESPACE(text, pos).end()",
+        "newline = text.rfind('\\n', pos, end)",
+        "if newline != -1:",
+        "    line += text.count('\\n', pos, newline + 1)",
+        "    line_start = newline + 1",
+        "pos = end",
+    ]
+
+def _number_code() -> List[str]:
+    return [
+        "end = _NUMBER(text, pos).end()",
+        "while end < length and text[end].isdigit():",
+        "    end = _NUMBER(text, end + 1).end()",
+        "lexeme = text[pos:end]",
+        "dot = lexeme.find('.')",
+        "if dot != -1 and lexeme.find('.', dot + 1) != -1:",
+        "    raise self._error(\"Número real inválido - múltiples puntos decimales\",",
+        "                      pos + lexeme.find('.', dot + 1), pos, line, line_start)",
+        "try:",
+        "    if dot == -1:",
+        "        token = Token(TokenType.INTEGER_CONST, int(lexeme), line, pos - line_start + 1)",
+        "    else:",
+        "        token = Token(TokenType.FLOAT_CONST, float(lexeme), line, pos - line_start + 1)",
+        "except ValueError:",
+        "    raise self._error(f\"Valor numérico inválido: {lexeme}\", end, pos, line, line_start) from None",
+        "self.pos = end",
+        "yield token",
+        "pos = end",
+    ]
+
+def _string_code() -> List[str]:
+    return [
+        "match = _STRING(text, pos)",
+        "if match is None:",
+        "    end = _STRING_PREFIX(text, pos).end()",
+        "    if end >= length:",
+        "        raise self._error(\"Cadena no cerrada\", length, pos, line, line_start)",
+        "    escaped = text[end + 1] if end + 1 < length else None",
+        "    raise self._error(f\"Secuencia de escape inválida: \\\\{escaped}\", end + 1, pos, line, line_start)",
+        "end = match.end()",
+        "column = pos - line_start + 1",
+        "newline = text.rfind('\\n', pos, end)",
+        "if newline != -1:",
+        "    line += text.count('\\n', pos, newline + 1)",
+        "    line_start = newline + 1",
+        "self.pos = end",
+        "yield Token(TokenType.STRING_LITERAL, _unescape(text[pos + 1:end - 1]), line, column)",
+        "pos = end",
+    ]
+
+def _comment_code(kind: str) -> List[str]:
+    if kind == 'line':
+        return [
+            "end = text.find('\\n', pos)",
+            "pos = length if end == -1 else end",
+        ]
+    return [
+        "end = text.find('*/', pos + 2)",
+        "if end == -1:",
+        "    raise self._error(\"Comentario multilínea no cerrado\", length, pos, line, line_start)",
+        "end += 2",
+        "newline = text.rfind('\\n', pos, end)",
+        "if newline != -1:",
+        "    line += text.count('\\n', pos, newline + 1)",
+        "    line_start = newline + 1",
+        "pos = end",
+    ]
+
+def _symbol_code(node: Dict, depth: int) -> List[str]:
+    """Branches of the prefix tree below `node`, `depth` characters in."""
+    lines = []
+    children = [char for char in node if char is not None]
+    if children:
+        lines.append(f"next_char = text[pos + {depth}:pos + {depth + 1}]")
+        for index, char in enumerate(children):
+            lines.append(f"{'if' if index == 0 else 'elif'} next_char == {char!r}:")
+            lines.extend('    ' + line for line in _symbol_code(node[char], depth + 1))
+        lines.append("else:")
+        lines.extend('    ' + line for line in _accept_code(node.get(None), depth))
+    else:
+        lines.extend(_accept_code(node[None], depth))
+    return lines
+
+def _accept_code(outcome, depth: int) -> List[str]:
+    if outcome is None:
+        return ["raise self._error(f\"Carácter no reconocido: '{c}'\", pos, pos, line, line_start)"]
+    if isinstance(outcome, str):
+        return _comment_code(outcome)
+    return [
+        f"self.pos = pos + {depth}",
+        f"yield Token(TokenType.{outcome.name}, text[pos:pos + {depth}], line, pos - line_start + 1)",
+        f"pos += {depth}",
+    ]
+
+def load_lexer(specs: Sequence[TokenSpec] = TOKEN_SPECS, cache: bool = True) -> type:
+    """Return the GeneratedLexer class for `specs`, generating it if needed.
+
+    The compiled code is cached on disk (see generated_code), keyed by the
+    fields of the specs the generator reads, so later processes skip the
+    generation and the compilation.
+    """
+    specs = tuple(specs)
+    lexer = _lexers.get(specs)
+    if lexer is None:
+        inputs = '\n'.join(repr((spec.type.name, spec.lexeme, spec.pattern)) for spec in specs)
+        namespace = {'Token': Token, 'TokenType': TokenType, 'LexicalError': LexicalError}
+        lexer = _lexers[specs] = load_generated('lexer', inputs, lambda: generate_lexer_source(specs),
+                                                _GENERATOR_VERSION, namespace, 'GeneratedLexer', cache)
+    return lexer
+
+if __name__ == "__main__":
+    print(generate_lexer_source())
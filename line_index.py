@@ -0,0 +1,108 @@
+"""
+Offset to line/column mapping for source text.
+"""
+from bisect import bisect_left, bisect_right
+from typing import List, Tuple
+
+class LineIndex:
+    """Start offset of every line, built in one pass over the text.
+
+    Lines and columns are 1-based, as in Token. Lookups are a bisect over
+    the line starts, so positions only cost something when they are asked
+    for.
+    """
+
+    def __init__(self, text: str):
+        starts: List[int] = [0]
+        find = text.find
+        newline = find('\n')
+        while newline != -1:
+            starts.append(newline + 1)
+            newline = find('\n', newline + 1)
+        self.line_starts = starts
+        self.length = len(text)
+
+    @property
+    def line_count(self) -> int:
+        return len(self.line_starts)
+
+    def line_of(self, offset: int) -> int:
+        """Line containing the character at `offset`."""
+        return bisect_right(self.line_starts, offset)
+
+    def column_of(self, offset: int) -> int:
+        """Column of the character at `offset` within its line."""
+        return offset - self.line_starts[bisect_right(self.line_starts, offset) - 1] + 1
+
+    def position(self, offset: int) -> Tuple[int, int]:
+        """(line, column) of the character at `offset`."""
+        line = bisect_right(self.line_starts, offset)
+        return line, offset - self.line_starts[line - 1] + 1
+
+    def offset_of(self, line: int, column: int = 1) -> int:
+        """Offset of a (line, column) position."""
+        if not 1 <= line <= len(self.line_starts):
+            raise ValueError(f"Line {line} out of range")
+        return self.line_starts[line - 1] + column - 1
+
+class EditableLineIndex(LineIndex):
+    """LineIndex that follows edits of the text instead of being rebuilt.
+
+    `line_starts` holds the line starts up to the last edit as absolute
+    offsets. The ones after it are in `tail`, as distances from the end of
+    the text and last line first, so they stay valid whatever is edited
+    before them. An edit then only costs the lines it changes plus those
+    between it and the previous edit.
+    """
+
+    def __init__(self, text: str):
+        super().__init__(text)
+        self.tail: List[int] = []
+
+    @property
+    def line_count(self) -> int:
+        return len(self.line_starts) + len(self.tail)
+
+    def edit(self, start: int, old_len: int, new_text: str):
+        """Replace text[start:start + old_len] by new_text."""
+        head = self.line_starts
+        tail = self.tail
+        length = self.length
+        end = start + old_len
+        # Lines starting up to the end of the edit move to the head...
+        while tail and length - tail[-1] <= end:
+            head.append(length - tail.pop())
+        # ...then the ones after its start leave it: those inside the
+        # replaced text are dropped, the others go to the tail
+        while head[-1] > start:
+            line_start = head.pop()
+            if line_start > end:
+                tail.append(length - line_start)
+        newline = new_text.find('\n')
+        while newline != -1:
+            head.append(start + newline + 1)
+            newline = new_text.find('\n', newline + 1)
+        self.length = length - old_len + len(new_text)
+
+    def _line_start(self, line: int) -> int:
+        head = self.line_starts
+        if line <= len(head):
+            return head[line - 1]
+        return self.length - self.tail[len(head) + len(self.tail) - line]
+
+    def line_of(self, offset: int) -> int:
+        tail = self.tail
+        return (bisect_right(self.line_starts, offset) +
+                len(tail) - bisect_left(tail, self.length - offset))
+
+    def column_of(self, offset: int) -> int:
+        return offset - self._line_start(self.line_of(offset)) + 1
+
+    def position(self, offset: int) -> Tuple[int, int]:
+        line = self.line_of(offset)
+        return line, offset - self._line_start(line) + 1
+
+    def offset_of(self, line: int, column: int = 1) -> int:
+        if not 1 <= line <= self.line_count:
+            raise ValueError(f"Line {line} out of range")
+        return self._line_start(line) + column - 1
@@ -0,0 +1,213 @@
+"""
+Lexing of source files straight from a memory map.
+"""
+import mmap
+import re
+from typing import Optional
+from sys import intern
+from .lexer import KEYWORD_TABLE, OPERATOR_PATTERN, Lexer, LexicalError, Token, TokenType, _OPERATORS, _unescape
+
+# Same alternatives as lexer._TOKEN_REGEX, over bytes. Only ASCII is
+# matched here; anything that involves a multi-byte character goes through
+# the text lexer on a small decoded window.
+_BYTES_TOKEN_REGEX = re.compile(rb'''
+    [ \t]*
+  (?:
+    (?P<WHITESPACE>[ \t\n\r\f\v\x1c-\x1f]+)
+  | (?P<IDENTIFIER>[A-Za-z_][A-Za-z0-9_]*)
+  | (?P<NUMBER>[0-9][0-9.]*)
+  | (?P<COMMENT>//[^\n]*|/\*(?s:.*?)\*/)
+  | (?P<OPEN_COMMENT>/\*)
+  | (?P<OPERATOR>''' + OPERATOR_PATTERN.encode('ascii') + rb''')
+  | (?P<STRING_LITERAL>"(?:[^"\\]|\\[ntr"\\])*")
+  | (?P<OTHER>(?s:.))
+  )
+''', re.VERBOSE)
+
+# Longest prefix of a string literal that is still valid
+_STRING_PREFIX_REGEX = re.compile(rb'"(?:[^"\\]|\\[ntr"\\])*')
+
+# Run of bytes that can belong to an identifier or number; it always ends
+# on a character boundary
+_WORD_REGEX = re.compile(rb'[A-Za-z0-9_.\x80-\xff]*')
+
+_BYTE_OPERATORS = {lexeme.encode('ascii'): (token_type, lexeme)
+                   for lexeme, token_type in _OPERATORS.items()}
+
+# Newlines are counted in slices of this size, so that skipping a huge
+# comment or reaching an error at the end of the file never copies it whole
+_COUNT_CHUNK = 1 << 20
+
+class MappedLexer:
+    """Lexer over the UTF-8 bytes of a memory-mapped file.
+
+    Produces the same tokens and errors as Lexer over the decoded text, but
+    the file is never decoded as a whole: only identifier and literal values
+    are decoded, one token at a time. Lines and columns count characters,
+    as in Lexer; `pos` is a byte offset.
+
+    Line tracking only moves forward, so the position of a token is known
+    without an index of every line start.
+    """
+
+    def __init__(self, path: str):
+        with open(path, 'rb') as file:
+            try:
+                self._buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                # Empty files cannot be mapped
+                self._buffer = b''
+        self.path = path
+        self.length = len(self._buffer)
+        self.pos = 0
+        self.error_count = 0
+        self.warning_count = 0
+        self._scanned = 0      # Newlines before this offset are counted
+        self._line = 1
+        self._line_start = 0
+        self._mark = 0         # Offset on the current line with a known column
+        self._mark_column = 1
+
+    def close(self):
+        """Release the memory map."""
+        if isinstance(self._buffer, mmap.mmap):
+            self._buffer.close()
+
+    def __enter__(self) -> 'MappedLexer':
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    @property
+    def line(self) -> int:
+        """Line of the current position."""
+        return self._position(self.pos)[0]
+
+    @property
+    def column(self) -> int:
+        """Column of the current position."""
+        return self._position(self.pos)[1]
+
+    def _pass_lines(self, offset: int):
+        """Count the newlines between the last counted offset and `offset`."""
+        buffer = self._buffer
+        last = buffer.rfind(b'\n', self._scanned, offset)
+        if last != -1:
+            for start in range(self._scanned, last + 1, _COUNT_CHUNK):
+                self._line += buffer[start:min(start + _COUNT_CHUNK, last + 1)].count(b'\n')
+            self._line_start = self._mark = last + 1
+            self._mark_column = 1
+        self._scanned = max(self._scanned, offset)
+
+    def _position(self, offset: int):
+        """(line, column) of `offset`, which must not precede the current position."""
+        self._pass_lines(offset)
+        if offset > self._mark:
+            chunk = self._buffer[self._mark:offset]
+            self._mark_column += len(chunk) if chunk.isascii() else len(chunk.decode('utf-8'))
+            self._mark = offset
+        return self._line, self._mark_column
+
+    def _error(self, message: str, offset: int):
+        self.pos = offset
+        self.error_count += 1
+        raise LexicalError(message, *self._position(offset))
+
+    def get_next_token(self) -> Token:
+        buffer = self._buffer
+        length = self.length
+        match = _BYTES_TOKEN_REGEX.match
+        pos = self.pos
+
+        while pos < length:
+            m = match(buffer, pos)
+            kind = m.lastgroup
+            start, end = m.span(kind)
+
+            if kind == 'WHITESPACE' or kind == 'COMMENT':
+                self._pass_lines(end)
+                pos = end
+                continue
+
+            if (kind == 'IDENTIFIER' or kind == 'NUMBER') and end < length and buffer[end] >= 0x80:
+                # The lexeme goes on with a multi-byte character
+                kind = 'OTHER'
+
+            if kind == 'IDENTIFIER':
+                value = intern(buffer[start:end].decode('ascii'))
+                if end - start > 32:
+                    self.warning_count += 1
+                token_type = KEYWORD_TABLE.get(value, TokenType.IDENTIFIER)
+            elif kind == 'OPERATOR':
+                token_type, value = _BYTE_OPERATORS[buffer[start:end]]
+            elif kind == 'STRING_LITERAL':
+                # The line of a multi-line string is the line of its end
+                column = self._position(start)[1]
+                self._pass_lines(end)
+                self.pos = end
+                return Token(TokenType.STRING_LITERAL,
+                             _unescape(buffer[start + 1:end - 1].decode('utf-8')),
+                             self._line, column)
+            elif kind == 'NUMBER':
+                dot = buffer.find(b'.', start, end)
+                if dot == -1:
+                    token_type, value = TokenType.INTEGER_CONST, int(buffer[start:end])
+                else:
+                    second = buffer.find(b'.', dot + 1, end)
+                    if second != -1:
+                        self._error("Número real inválido - múltiples puntos decimales", second)
+                    token_type, value = TokenType.FLOAT_CONST, float(buffer[start:end])
+            elif kind == 'OPEN_COMMENT':
+                self._error("Comentario multilínea no cerrado", length)
+            elif buffer[start] == ord('"'):
+                self._string_error(start)
+            elif buffer[start] < 0x80 and m.lastgroup == 'OTHER':
+                self._error(f"Carácter no reconocido: '{chr(buffer[start])}'", start)
+            else:
+                token = self._lex_window(start)
+                if token is None:
+                    # Whitespace outside ASCII: skipped, no newline in it
+                    pos = self.pos
+                    continue
+                return token
+
+            self.pos = end
+            return Token(token_type, value, *self._position(start))
+
+        self.pos = length
+        return Token(TokenType.EOF, None, *self._position(length))
+
+    def _string_error(self, start: int):
+        """Raise the error of a string literal that the regex rejected."""
+        buffer = self._buffer
+        end = _STRING_PREFIX_REGEX.match(buffer, start).end()
+        if end >= self.length:
+            self._error("Cadena no cerrada", self.length)
+        # Stopped at a backslash followed by an invalid escape
+        escaped: Optional[str] = None
+        if end + 1 < self.length:
+            escaped = buffer[end + 1:end + 5].decode('utf-8', 'ignore')[:1]
+        self._error(f"Secuencia de escape inválida: \\{escaped}", end + 1)
+
+    def _lex_window(self, start: int) -> Optional[Token]:
+        """Lex the token at `start` with the text lexer over a decoded window.
+
+        Returns None if `start` holds a non-ASCII whitespace character, after
+        moving past it.
+        """
+        end = _WORD_REGEX.match(self._buffer, start).end()
+        window = self._buffer[start:max(end, start + 1)].decode('utf-8')
+        if window[0].isspace():
+            self.pos = start + len(window[0].encode('utf-8'))
+            return None
+
+        lexer = Lexer(window)
+        try:
+            token = lexer.get_next_token()
+        except LexicalError as error:
+            self._error(error.message, start + len(window[:lexer.pos].encode('utf-8')))
+        finally:
+            self.warning_count += lexer.warning_count
+        self.pos = start + len(window[:lexer.pos].encode('utf-8'))
+        return Token(token.type, token.value, *self._position(start))
@@ -0,0 +1,106 @@
+"""
+Parallel lexing of very large sources with a process pool.
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Tuple
+from .lexer import Lexer, LexicalError, TokenType
+from .token_buffer import TokenBuffer
+
+_MIN_CHUNK_SIZE = 1 << 16
+
+def lex_parallel(text: str, workers: Optional[int] = None,
+                 chunk_size: Optional[int] = None) -> TokenBuffer:
+    """Lex `text` in newline-aligned chunks across a process pool.
+
+    Every chunk is lexed speculatively, as if it started in the lexer's
+    default state. A chunk that starts inside a multi-line comment or a
+    string literal cannot be trusted, and the chunk before it necessarily
+    ends with an unterminated comment or string. The stitching pass
+    detects that, lexes the real text sequentially from the last good
+    token, and jumps back to the speculative tokens as soon as one of them
+    matches. The result, including any LexicalError raised, is the same as
+    a single sequential pass.
+    """
+    workers = workers or os.cpu_count() or 1
+    if chunk_size is None:
+        chunk_size = max(_MIN_CHUNK_SIZE, len(text) // (workers * 4) + 1)
+    chunks = _split_chunks(text, chunk_size)
+
+    texts = [text[start:end] for start, end, _ in chunks]
+    starts = [start for start, _, _ in chunks]
+    lines = [line for _, _, line in chunks]
+    if workers == 1 or len(chunks) == 1:
+        results = list(map(_lex_chunk, texts, starts, lines))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_lex_chunk, texts, starts, lines))
+    return _stitch(text, chunks, results)
+
+def _split_chunks(text: str, chunk_size: int) -> List[Tuple[int, int, int]]:
+    """(start, end, first line) of chunks that each end right after a newline."""
+    chunks = []
+    start = 0
+    line = 1
+    while start < len(text):
+        newline = text.find('\n', start + chunk_size)
+        end = len(text) if newline == -1 else newline + 1
+        chunks.append((start, end, line))
+        line += text.count('\n', start, end)
+        start = end
+    return chunks
+
+def _lex_chunk(chunk: str, base: int, base_line: int) -> Tuple[TokenBuffer, bool]:
+    """Lex one chunk with absolute offsets and lines.
+
+    Returns the tokens lexed before any error, and whether the chunk was
+    lexed to its end without errors.
+    """
+    lexer = Lexer(chunk, engine='regex', span_tokens=True)
+    buffer = TokenBuffer()
+    try:
+        token = lexer.get_next_token()
+        while token.type != TokenType.EOF:
+            buffer.append(token.type, base + token.start, token.end - token.start,
+                          base_line + lexer.line - 1, token.value)
+            token = lexer.get_next_token()
+    except LexicalError:
+        return buffer, False
+    return buffer, True
+
+def _stitch(text: str, chunks: List[Tuple[int, int, int]],
+            results: List[Tuple[TokenBuffer, bool]]) -> TokenBuffer:
+    """Join the speculative chunk results, relexing where speculation failed."""
+    tokens = TokenBuffer(text)
+    # One lexer serves every fix-up, so that its line index is built once
+    lexer = None
+    index = 0
+    first = 0
+    while index < len(chunks):
+        buffer, complete = results[index]
+        tokens.extend(buffer, first)
+        if complete:
+            index += 1
+            first = 0
+            continue
+
+        # Fix-up: lex the real text from the last trusted token until a
+        # token lines up with the speculative result of a later chunk
+        if lexer is None:
+            lexer = Lexer(text, engine='regex', span_tokens=True)
+        lexer.seek(tokens.starts[-1] + tokens.lengths[-1] if tokens else 0)
+        target = index + 1
+        while True:
+            token = lexer.get_next_token()
+            if token.type == TokenType.EOF:
+                return tokens
+            while target < len(chunks) and chunks[target][1] <= token.start:
+                target += 1
+            if target < len(chunks) and token.start >= chunks[target][0]:
+                match = results[target][0].find(token.start, token.end - token.start, token.type)
+                if match is not None:
+                    index = target
+                    first = match
+                    break
+            tokens.append(token.type, token.start, token.end - token.start, lexer.line, token.value)
+    return tokens
@@ -1,152 +1,450 @@
-from .lexer import Lexer, TokenType
+from .lexer import Lexer, Token, TokenType
 from .symbol_table import SymbolTable
-from typing import Optional
+from .token_buffer import ReplayLexer, TokenBuffer, split_eof
+from typing import Dict, List, Optional, Union
+
+class ParseError(Exception):
+    def __init__(self, message: str, line: int, column: int):
+        self.message = message
+        self.line = line
+        self.column = column
+        super().__init__(f'{message} at line {line}, column {column}')
 
 class ASTNode:
-    pass
+    # Nodes have fixed attributes and no per-instance __dict__, which keeps
+    # the tree of a large program small
+    __slots__ = ()
 
 class BinOpNode(ASTNode):
+    __slots__ = ('left', 'op', 'right')
+
     def __init__(self, left, op, right):
         self.left = left
         self.op = op
         self.right = right
 
+class UnaryOpNode(ASTNode):
+    __slots__ = ('op', 'expr')
+
+    def __init__(self, op, expr):
+        self.op = op
+        self.expr = expr
+
 class NumNode(ASTNode):
+    __slots__ = ('token', 'value')
+
     def __init__(self, token):
         self.token = token
         self.value = token.value
 
 class VarNode(ASTNode):
+    __slots__ = ('token', 'value')
+
     def __init__(self, token):
         self.token = token
         self.value = token.value
 
 class AssignNode(ASTNode):
+    __slots__ = ('left', 'right')
+
     def __init__(self, left, right):
         self.left = left
         self.right = right
 
 class PrintNode(ASTNode):
+    __slots__ = ('value',)
+
     def __init__(self, value):
         self.value = value
 
 class IfNode(ASTNode):
+    __slots__ = ('condition', 'then_body', 'else_body')
+
     def __init__(self, condition, then_body, else_body=None):
         self.condition = condition
         self.then_body = then_body
         self.else_body = else_body
 
 class WhileNode(ASTNode):
+    __slots__ = ('condition', 'body')
+
     def __init__(self, condition, body):
         self.condition = condition
         self.body = body
 
+# Binding power of the binary operators: an operator takes as its right
+# operand everything that binds tighter than itself, so all of them are
+# left-associative
+BINARY_PRECEDENCE = {
+    TokenType.OR: 1,
+    TokenType.AND: 2,
+    TokenType.EQUALS: 3,
+    TokenType.NOT_EQUALS: 3,
+    TokenType.LESS_THAN: 4,
+    TokenType.GREATER_THAN: 4,
+    TokenType.LESS_EQUALS: 4,
+    TokenType.GREATER_EQUALS: 4,
+    TokenType.PLUS: 5,
+    TokenType.MINUS: 5,
+    TokenType.MULTIPLY: 6,
+    TokenType.DIVIDE: 6,
+    TokenType.MODULO: 6,
+}
+
+# Binding power of the operand of the prefix operators: 'not' applies to a
+# whole comparison, the signs to a single factor
+PREFIX_PRECEDENCE = {
+    TokenType.NOT: 2,
+    TokenType.PLUS: 6,
+    TokenType.MINUS: 6,
+}
+
+def postorder(node: ASTNode):
+    """Yield the nodes of an expression, operands before their operator.
+
+    Only BinOpNode and UnaryOpNode are descended into. An explicit stack
+    is used, so any depth of nesting can be walked.
+    """
+    stack = [(node, False)]
+    while stack:
+        node, expanded = stack.pop()
+        if expanded:
+            yield node
+        elif isinstance(node, BinOpNode):
+            stack.append((node, True))
+            stack.append((node.right, False))
+            stack.append((node.left, False))
+        elif isinstance(node, UnaryOpNode):
+            stack.append((node, True))
+            stack.append((node.expr, False))
+        else:
+            yield node
+
+def structural_hash(node: ASTNode, memo: Optional[Dict[int, int]] = None) -> int:
+    """Hash of the structure of an expression, equal for identical subtrees.
+
+    A name or literal hashes its token type and value, an operator its
+    token type and the hashes of its operands; positions are ignored.
+    `memo` maps id(node) to the hash of every node visited: passing the
+    same dict for a whole AST (while it is alive) makes each node cost one
+    visit, even when NodeFactory shares it. Computed without recursion.
+    """
+    if memo is None:
+        memo = {}
+    hashes = []
+    stack = [(node, False)]
+    while stack:
+        node, expanded = stack.pop()
+        known = memo.get(id(node))
+        if known is not None:
+            hashes.append(known)
+            continue
+        if isinstance(node, BinOpNode):
+            if not expanded:
+                stack.append((node, True))
+                stack.append((node.right, False))
+                stack.append((node.left, False))
+                continue
+            right = hashes.pop()
+            value = hash((node.op.type, hashes.pop(), right))
+        elif isinstance(node, UnaryOpNode):
+            if not expanded:
+                stack.append((node, True))
+                stack.append((node.expr, False))
+                continue
+            value = hash((node.op.type, hashes.pop()))
+        elif isinstance(node, (NumNode, VarNode)):
+            value = hash((node.token.type, node.value))
+        else:
+            raise TypeError(f"Unexpected expression node: {type(node).__name__}")
+        memo[id(node)] = value
+        hashes.append(value)
+    return hashes.pop()
+
+class NodeFactory:
+    """Hash-consing constructor of expression nodes.
+
+    Returns one shared node for all the occurrences of a name, of a literal
+    and of an operator applied to the same operands. Operands are shared
+    already, so an operator node is looked up by its operator and their
+    identities, at the cost of one dict access. Expressions are never
+    modified after parsing, which makes the sharing safe; a shared node
+    keeps the tokens, and so the lines, of its first occurrence.
+
+    That is why a shared AST cannot be filled into a symbol table later
+    (SymbolTableBuilder.fill) or copied into a NodeArena, which both read
+    positions from the nodes: Parser records the symbols as it parses
+    instead, from the tokens, and refuses share_nodes with syntax_only or
+    parse_arena(). Assignment targets are never shared.
+    """
+
+    def __init__(self):
+        self._nodes: Dict[tuple, ASTNode] = {}
+    
+    def __len__(self) -> int:
+        """Number of distinct nodes built."""
+        return len(self._nodes)
+    
+    def num(self, token: Token) -> NumNode:
+        key = (token.type, token.value)
+        node = self._nodes.get(key)
+        if node is None:
+            node = self._nodes[key] = NumNode(token)
+        return node
+    
+    def var(self, token: Token) -> VarNode:
+        key = (token.type, token.value)
+        node = self._nodes.get(key)
+        if node is None:
+            node = self._nodes[key] = VarNode(token)
+        return node
+    
+    def binary(self, left: ASTNode, op: Token, right: ASTNode) -> BinOpNode:
+        key = (op.type, id(left), id(right))
+        node = self._nodes.get(key)
+        if node is None:
+            node = self._nodes[key] = BinOpNode(left, op, right)
+        return node
+    
+    def unary(self, op: Token, expr: ASTNode) -> UnaryOpNode:
+        key = (op.type, id(expr))
+        node = self._nodes.get(key)
+        if node is None:
+            node = self._nodes[key] = UnaryOpNode(op, expr)
+        return node
+
+# Keywords a statement can start with, where error recovery resumes parsing
+STATEMENT_KEYWORDS = frozenset((TokenType.IF, TokenType.WHILE, TokenType.PRINT, TokenType.VAR))
+
 class Parser:
-    def __init__(self, lexer: Lexer, symbol_table: SymbolTable):
-        self.lexer = lexer
+    def __init__(self, lexer: Union[Lexer, ReplayLexer, TokenBuffer, List[Token]],
+                 symbol_table: Optional[SymbolTable], recover: bool = False, syntax_only: bool = False,
+                 share_nodes: bool = False):
+        # Already lexed tokens are read in place through an integer cursor;
+        # a lexer is pulled from one token at a time
+        if isinstance(lexer, (TokenBuffer, list)):
+            self.tokens = lexer
+            self.count, self.eof = split_eof(lexer)
+            self.lexer = None
+        else:
+            self.tokens = None
+            self.lexer = lexer
+        if share_nodes and syntax_only:
+            raise ValueError("share_nodes needs a parser that fills the symbol table, not a syntax-only one")
         self.symbol_table = symbol_table
-        self.current_token = self.lexer.get_next_token()
+        # A syntax-only parser builds the AST and nothing else: variables are
+        # neither checked nor recorded, and symbol_table may be None. The
+        # table can be filled afterwards with SymbolTableBuilder.fill()
+        if syntax_only:
+            self.symbols = None
+        else:
+            from .symbol_pass import SymbolTableBuilder
+            self.symbols = SymbolTableBuilder(symbol_table)
+        # Number of top-level nodes that come from the var block
+        self.declaration_count = 0
+        # Constructors of expression nodes. With share_nodes, identical
+        # subexpressions are a single node (see NodeFactory)
+        self.node_factory = NodeFactory() if share_nodes else None
+        if self.node_factory is None:
+            self._num_node, self._var_node = NumNode, VarNode
+            self._binary_node, self._unary_node = BinOpNode, UnaryOpNode
+        else:
+            self._num_node, self._var_node = self.node_factory.num, self.node_factory.var
+            self._binary_node, self._unary_node = self.node_factory.binary, self.node_factory.unary
+        # In recover mode syntax errors are collected here and the statement
+        # that contains each of them is left out of the AST
+        self.recover = recover
+        self.errors: List[ParseError] = []
+        self._resume = False
+        # Index of the current token
+        self.pos = 0
+        self.current_token = self.lexer.get_next_token() if self.tokens is None else self._token(0)
+        # Checked for every token, so kept apart from the token itself
+        self.current_type = self.current_token.type
+    
+    def _token(self, index: int):
+        """Token at `index` of the token array, EOF past its end."""
+        return self.tokens[index] if index < self.count else self.eof
+    
+    def advance(self):
+        """Move to the next token."""
+        if self.tokens is None:
+            self.current_token = self.lexer.get_next_token()
+            self.pos += 1
+        elif self.pos < self.count:
+            self.pos += 1
+            self.current_token = self.tokens[self.pos] if self.pos < self.count else self.eof
+        self.current_type = self.current_token.type
+    
+    def peek(self, k: int = 1):
+        """Token k positions after the current one, without moving (EOF past the end).
+
+        An index into a token array; a lexer is read ahead and restored,
+        so it must have snapshot() and restore() (Lexer, ReplayLexer).
+        """
+        if k < 0:
+            raise ValueError("peek() looks ahead only")
+        if self.tokens is not None:
+            return self._token(self.pos + k)
+        if not hasattr(self.lexer, 'snapshot'):
+            raise TypeError(f"peek() needs a token array or a lexer with snapshot(), "
+                            f"not {type(self.lexer).__name__}")
+        snapshot = self.lexer.snapshot()
+        token = self.current_token
+        for _ in range(k):
+            token = self.lexer.get_next_token()
+        self.lexer.restore(snapshot)
+        return token
+    
+    def seek(self, index: int):
+        """Make the index-th token of the token array the current one."""
+        if self.tokens is None:
+            raise ValueError("seek() needs a parser over a token array")
+        self.pos = min(index, self.count)
+        self.current_token = self._token(self.pos)
+        self.current_type = self.current_token.type
     
     def error(self, message="Invalid syntax"):
-        raise Exception(f'{message} at line {self.current_token.line}, column {self.current_token.column}')
+        raise ParseError(message, self.current_token.line, self.current_token.column)
+    
+    def _record(self, error: ParseError):
+        """Keep `error` in recover mode; raise it otherwise."""
+        if not self.recover:
+            raise error
+        # ERROR tokens come from a recovering lexer, which already reported them
+        if self.current_type != TokenType.ERROR:
+            self.errors.append(error)
+    
+    def _recover(self, error: ParseError):
+        """Record `error`, then skip tokens up to a point where parsing can go on (panic mode).
+
+        Stops at a ';', a '}' or EOF, or at a keyword that starts a statement.
+        A block opened while skipping is skipped whole.
+        """
+        self._record(error)
+        depth = 0
+        while self.current_type != TokenType.EOF:
+            token_type = self.current_type
+            if depth == 0:
+                if token_type == TokenType.SEMICOLON or token_type == TokenType.RBRACE:
+                    return
+                if token_type in STATEMENT_KEYWORDS:
+                    # No ';' separates this statement from the skipped tokens
+                    self._resume = True
+                    return
+            if token_type == TokenType.LBRACE:
+                depth += 1
+            elif token_type == TokenType.RBRACE:
+                depth -= 1
+            self.advance()
+    
+    def _resumed(self) -> bool:
+        """True once after recovery stopped at the start of a statement."""
+        resume, self._resume = self._resume, False
+        return resume
     
     def eat(self, token_type: TokenType):
-        if self.current_token.type == token_type:
-            self.current_token = self.lexer.get_next_token()
+        if self.current_type == token_type:
+            self.advance()
         else:
-            self.error(f'Expected {token_type}, got {self.current_token.type}')
+            self.error(f'Expected {token_type}, got {self.current_type}')
     
     def program(self):
         """program : PROGRAM variable_declarations compound_statement"""
-        self.eat(TokenType.PROGRAM)
+        return list(self._program())
+    
+    def _program(self):
+        """Yield the top-level statements of the program, each as soon as it is parsed."""
+        try:
+            self.eat(TokenType.PROGRAM)
+        except ParseError as error:
+            self._record(error)
         # Skip empty lines after PROGRAM
-        while self.current_token.type == TokenType.SEMICOLON:
+        while self.current_type == TokenType.SEMICOLON:
             self.eat(TokenType.SEMICOLON)
         
         # Process variable declarations
         declarations = self.variable_declarations()
+        self.declaration_count = len(declarations)
+        yield from declarations
         
         # Process compound statement
-        statements = self.compound_statement()
-        
-        # Combine declarations and statements
-        return declarations + statements
+        yield from self._compound_statement()
     
     def variable_declarations(self):
         """variable_declarations : VAR (variable_declaration SEMICOLON)*"""
         declarations = []
-        if self.current_token.type == TokenType.VAR:
+        if self.current_type == TokenType.VAR:
             self.eat(TokenType.VAR)
-            while self.current_token.type == TokenType.IDENTIFIER:
-                declarations.extend(self.variable_declaration())
-                self.eat(TokenType.SEMICOLON)
+            while self.current_type == TokenType.IDENTIFIER:
+                try:
+                    declarations.extend(self.variable_declaration())
+                    self.eat(TokenType.SEMICOLON)
+                except ParseError as error:
+                    self._recover(error)
                 # Skip empty lines
-                while self.current_token.type == TokenType.SEMICOLON:
+                while self.current_type == TokenType.SEMICOLON:
                     self.eat(TokenType.SEMICOLON)
         return declarations
     
     def variable_declaration(self):
         """variable_declaration : ID (ASSIGN expr)?"""
-        var_nodes = []
-        # Get the current token before eating it
-        token = self.current_token
-        var_node = VarNode(token)
-        var_nodes.append(var_node)
+        var_node = VarNode(self.current_token)
         
         # Add the variable to the symbol table with initial value None
-        self.symbol_table.insert(token.value, None, token.line)
+        if self.symbols is not None:
+            self.symbols.declare(var_node)
         
         self.eat(TokenType.IDENTIFIER)
         
         # Check for initialization
-        if self.current_token.type == TokenType.ASSIGN:
+        right = None
+        if self.current_type == TokenType.ASSIGN:
             self.eat(TokenType.ASSIGN)
             right = self.expr()
-            
-            # Update the symbol table with the initial value
-            if isinstance(right, NumNode):
-                if right.token.type == TokenType.STRING_LITERAL:
-                    self.symbol_table.insert(var_node.value, right.value, token.line)
-                else:
-                    try:
-                        value = float(right.value) if isinstance(right.value, str) and '.' in right.value else int(right.value)
-                        self.symbol_table.insert(var_node.value, value, token.line)
-                    except ValueError:
-                        self.error(f"Invalid numeric value: {right.value}")
-            elif isinstance(right, VarNode):
-                right_symbol = self.symbol_table.lookup(right.value, record_usage=True, line=token.line)
-                if right_symbol and right_symbol.value is not None:
-                    self.symbol_table.insert(var_node.value, right_symbol.value, token.line)
-            
-            # Registrar el uso de la variable en la asignación
-            self.symbol_table.lookup(var_node.value, record_usage=True, line=token.line)
-            return [AssignNode(var_node, right)]
         
-        # Si no hay inicialización, registrar el uso de la variable
-        self.symbol_table.lookup(var_node.value, record_usage=True, line=token.line)
-        return var_nodes
+        # Record the initial value, and the variable's use on this line
+        if self.symbols is not None:
+            self.symbols.initialize(var_node, right)
+        return [var_node] if right is None else [AssignNode(var_node, right)]
     
     def compound_statement(self):
         """compound_statement : statement (SEMICOLON statement)*"""
-        nodes = []
+        return list(self._compound_statement())
+    
+    def _compound_statement(self):
         # Skip initial empty lines
-        while self.current_token.type == TokenType.SEMICOLON:
+        while self.current_type == TokenType.SEMICOLON:
             self.eat(TokenType.SEMICOLON)
         
-        # Add first non-empty statement
-        if self.current_token.type != TokenType.EOF:
-            nodes.append(self.statement())
+        # Yield first non-empty statement
+        if self.current_type != TokenType.EOF:
+            yield self._statement()
         
-        # Add remaining statements
-        while self.current_token.type == TokenType.SEMICOLON:
-            self.eat(TokenType.SEMICOLON)
-            # Skip empty lines
-            while self.current_token.type == TokenType.SEMICOLON:
+        # Yield remaining statements
+        while self.current_type == TokenType.SEMICOLON or self._resumed():
+            # Skip the separator and empty lines
+            while self.current_type == TokenType.SEMICOLON:
                 self.eat(TokenType.SEMICOLON)
-            if self.current_token.type != TokenType.EOF:
-                nodes.append(self.statement())
-        
-        return nodes
+            if self.current_type != TokenType.EOF:
+                yield self._statement()
+    
+    def _statement(self):
+        """statement(), or None in recover mode if it has a syntax error."""
+        self._resume = False
+        try:
+            node = self.statement()
+            if self.recover and self.current_type == TokenType.ERROR:
+                if node is None or isinstance(node, AssignNode):
+                    # A lexical error cuts the statement short: skip the rest of it
+                    self.error()
+                # The statement ended with its own ';' or '}' before the
+                # error, so it is kept and only what follows is skipped
+                self._recover(ParseError("Invalid syntax", self.current_token.line, self.current_token.column))
+            return node
+        except ParseError as error:
+            self._recover(error)
+            return None
     
     def statement(self):
         """
@@ -156,110 +454,49 @@ class Parser:
                  | while_statement
                  | empty
         """
-        if self.current_token.type == TokenType.IDENTIFIER:
+        if self.current_type == TokenType.IDENTIFIER:
             return self.assignment_statement()
-        elif self.current_token.type == TokenType.PRINT:
+        elif self.current_type == TokenType.PRINT:
             return self.print_statement()
-        elif self.current_token.type == TokenType.IF:
+        elif self.current_type == TokenType.IF:
             return self.if_statement()
-        elif self.current_token.type == TokenType.WHILE:
+        elif self.current_type == TokenType.WHILE:
             return self.while_statement()
-        elif self.current_token.type == TokenType.VAR:
+        elif self.current_type == TokenType.VAR:
             return self.variable_declarations()
         else:
             return self.empty()
     
     def assignment_statement(self):
         """assignment_statement : variable ASSIGN expr"""
-        left = self.variable()
+        left = self.variable(shared=False)
         token = self.current_token
         self.eat(TokenType.ASSIGN)
         right = self.expr()
         
         # Update the symbol table with the assigned value and line information
-        if isinstance(right, NumNode):
-            if right.token.type == TokenType.STRING_LITERAL:
-                self.symbol_table.insert(left.value, right.value, token.line)
-            else:
-                try:
-                    value = float(right.value) if isinstance(right.value, str) and '.' in right.value else int(right.value)
-                    self.symbol_table.insert(left.value, value, token.line)
-                except ValueError:
-                    self.error(f"Invalid numeric value: {right.value}")
-        elif isinstance(right, VarNode):
-            right_symbol = self.symbol_table.lookup(right.value, record_usage=True, line=token.line)
-            if right_symbol and right_symbol.value is not None:
-                self.symbol_table.insert(left.value, right_symbol.value, token.line)
-        elif isinstance(right, BinOpNode):
-            symbol = self.symbol_table.lookup(left.value, record_usage=False)
-            if symbol:
-                expr = self._build_expression(right)
-                symbol.set_expression(expr)
-                symbol.info.last_modified_line = token.line
-                try:
-                    result = self._evaluate_expression(right)
-                    if result is not None:
-                        symbol.update_value(result, token.line)
-                except:
-                    pass
+        if self.symbols is not None:
+            self.symbols.assign(left, right, token.line)
         
-        # Registrar el uso de la variable en la asignación
-        self.symbol_table.lookup(left.value, record_usage=True, line=token.line)
         return AssignNode(left, right)
     
-    def _evaluate_expression(self, node: BinOpNode) -> Optional[float]:
-        """Evaluate a binary operation if possible"""
-        if isinstance(node, NumNode):
-            return float(node.value) if '.' in str(node.value) else int(node.value)
-        elif isinstance(node, VarNode):
-            symbol = self.symbol_table.lookup(node.value, record_usage=True, line=self.current_token.line)
-            if symbol and symbol.value is not None:
-                return symbol.value
-            return None
-        elif isinstance(node, BinOpNode):
-            left = self._evaluate_expression(node.left)
-            right = self._evaluate_expression(node.right)
-            if left is not None and right is not None:
-                if node.op.type == TokenType.PLUS:
-                    return left + right
-                elif node.op.type == TokenType.MINUS:
-                    return left - right
-                elif node.op.type == TokenType.MULTIPLY:
-                    return left * right
-                elif node.op.type == TokenType.DIVIDE:
-                    return left / right if right != 0 else None
-        return None
-    
-    def _build_expression(self, node: BinOpNode) -> str:
-        """Build a string representation of an expression"""
-        if isinstance(node, NumNode):
-            return str(node.value)
-        elif isinstance(node, VarNode):
-            # Record variable usage in expressions
-            self.symbol_table.lookup(node.value, record_usage=True, line=self.current_token.line)
-            return node.value
-        elif isinstance(node, BinOpNode):
-            left = self._build_expression(node.left)
-            right = self._build_expression(node.right)
-            op = {
-                TokenType.PLUS: '+',
-                TokenType.MINUS: '-',
-                TokenType.MULTIPLY: '*',
-                TokenType.DIVIDE: '/'
-            }.get(node.op.type, '?')
-            return f"({left} {op} {right})"
-        return ""
-    
-    def variable(self):
-        """variable : ID"""
-        node = VarNode(self.current_token)
-        
-        # Verify that the variable exists in the symbol table and record usage
-        symbol = self.symbol_table.lookup(self.current_token.value, record_usage=True, line=self.current_token.line)
-        if not symbol:
-            self.error(f"Variable '{self.current_token.value}' not declared")
-        
+    def variable(self, shared: bool = True):
+        """variable : ID
+
+        An assignment target is never a shared node (shared=False), so that
+        it keeps the line of its statement.
+        """
+        token = self.current_token
+        # Checked first, so that a missing operand is reported as such and
+        # not as an undeclared variable
         self.eat(TokenType.IDENTIFIER)
+        node = self._var_node(token) if shared else VarNode(token)
+        
+        # Verify that the variable exists in the symbol table and record usage.
+        # This is the only place a variable reference is recorded, on the
+        # line of its own token
+        if self.symbols is not None:
+            self.symbols.use(node, token)
         return node
     
     def empty(self):
@@ -267,87 +504,84 @@ class Parser:
         return None
     
     def expr(self):
-        """expr : term ((PLUS | MINUS | GREATER_THAN | LESS_THAN | EQUALS) term)*"""
-        node = self.term()
-        
-        # Registrar uso de variables en el primer término
-        if isinstance(node, VarNode):
-            self.symbol_table.lookup(node.value, record_usage=True, line=self.current_token.line)
-        elif isinstance(node, BinOpNode):
-            self._register_variable_usage_in_expr(node)
-        
-        while self.current_token.type in (TokenType.PLUS, TokenType.MINUS, 
-                                        TokenType.GREATER_THAN, TokenType.LESS_THAN, 
-                                        TokenType.EQUALS):
-            token = self.current_token
-            if token.type == TokenType.PLUS:
-                self.eat(TokenType.PLUS)
-            elif token.type == TokenType.MINUS:
-                self.eat(TokenType.MINUS)
-            elif token.type == TokenType.GREATER_THAN:
-                self.eat(TokenType.GREATER_THAN)
-            elif token.type == TokenType.LESS_THAN:
-                self.eat(TokenType.LESS_THAN)
-            elif token.type == TokenType.EQUALS:
-                self.eat(TokenType.EQUALS)
-            
-            right = self.term()
-            node = BinOpNode(node, token, right)
-            
-            # Registrar uso de variables en la expresión
-            if isinstance(node.left, VarNode):
-                self.symbol_table.lookup(node.left.value, record_usage=True, line=self.current_token.line)
-            elif isinstance(node.left, BinOpNode):
-                self._register_variable_usage_in_expr(node.left)
-            
-            if isinstance(node.right, VarNode):
-                self.symbol_table.lookup(node.right.value, record_usage=True, line=self.current_token.line)
-            elif isinstance(node.right, BinOpNode):
-                self._register_variable_usage_in_expr(node.right)
-        
-        return node
+        """
+        expr : prefix_op expr
+             | expr binary_op expr
+             | LPAREN expr RPAREN
+             | factor
+
+        Operators by increasing precedence: or; and; not; == !=;
+        < > <= >=; + -; * / %; unary + -.
+        """
+        return self._expression()
     
-    def term(self):
-        """term : factor ((MUL | DIV) factor)*"""
-        node = self.factor()
-        
-        while self.current_token.type in (TokenType.MULTIPLY, TokenType.DIVIDE):
-            token = self.current_token
-            if token.type == TokenType.MULTIPLY:
-                self.eat(TokenType.MULTIPLY)
-            else:
-                self.eat(TokenType.DIVIDE)
+    def _expression(self):
+        """Parse an expression with explicit operand and operator stacks.
+
+        This is Pratt parsing without recursion: a stacked operator is applied
+        as soon as the next operator binds no tighter than it does, so each
+        token costs one loop iteration and nesting depth costs no Python stack.
+        """
+        operands = []
+        operators = []  # (token, binding power, is prefix); open parentheses have power 0
+        open_parens = 0
+        while True:
+            # Prefix operators and opening parentheses before an operand
+            while True:
+                token_type = self.current_type
+                if token_type in PREFIX_PRECEDENCE:
+                    operators.append((self.current_token, PREFIX_PRECEDENCE[token_type], True))
+                elif token_type == TokenType.LPAREN:
+                    operators.append((self.current_token, 0, False))
+                    open_parens += 1
+                else:
+                    break
+                self.advance()
+            operands.append(self.factor())
             
-            node = BinOpNode(node, token, self.factor())
-        
-        return node
+            # Binary operators and closing parentheses after it
+            while True:
+                token_type = self.current_type
+                precedence = BINARY_PRECEDENCE.get(token_type, 0)
+                # Open parentheses are only removed by their closing one
+                while operators and operators[-1][1] >= max(precedence, 1):
+                    self._reduce(operators.pop(), operands)
+                if precedence:
+                    break
+                if token_type == TokenType.RPAREN and open_parens:
+                    operators.pop()
+                    open_parens -= 1
+                    self.advance()
+                    continue
+                if open_parens:
+                    self.eat(TokenType.RPAREN)
+                return operands.pop()
+            operators.append((self.current_token, precedence, False))
+            self.advance()
+    
+    def _reduce(self, operator, operands: List[ASTNode]):
+        """Apply a stacked operator to the operands on top of the stack."""
+        token, _, prefix = operator
+        if prefix:
+            # A unary plus does not change its operand
+            if token.type != TokenType.PLUS:
+                operands[-1] = self._unary_node(token, operands[-1])
+        else:
+            right = operands.pop()
+            operands[-1] = self._binary_node(operands[-1], token, right)
     
     def factor(self):
         """
-        factor : PLUS factor
-               | MINUS factor
-               | INTEGER_CONST
+        factor : INTEGER_CONST
                | FLOAT_CONST
                | STRING_LITERAL
-               | LPAREN expr RPAREN
                | variable
         """
         token = self.current_token
         
-        if token.type == TokenType.PLUS:
-            self.eat(TokenType.PLUS)
-            return self.factor()
-        elif token.type == TokenType.MINUS:
-            self.eat(TokenType.MINUS)
-            return BinOpNode(NumNode(Token(TokenType.INTEGER_CONST, 0, token.line, token.column)), token, self.factor())
-        elif token.type in (TokenType.INTEGER_CONST, TokenType.FLOAT_CONST, TokenType.STRING_LITERAL):
-            self.eat(token.type)
-            return NumNode(token)
-        elif token.type == TokenType.LPAREN:
-            self.eat(TokenType.LPAREN)
-            node = self.expr()
-            self.eat(TokenType.RPAREN)
-            return node
+        if self.current_type in (TokenType.INTEGER_CONST, TokenType.FLOAT_CONST, TokenType.STRING_LITERAL):
+            self.advance()
+            return self._num_node(token)
         else:
             return self.variable()
     
@@ -371,7 +605,7 @@ class Parser:
         self.eat(TokenType.RBRACE)
         
         else_body = None
-        if self.current_token.type == TokenType.ELSE:
+        if self.current_type == TokenType.ELSE:
             self.eat(TokenType.ELSE)
             self.eat(TokenType.LBRACE)
             else_body = self.statement_list()
@@ -390,40 +624,40 @@ class Parser:
         self.eat(TokenType.RBRACE)
         return WhileNode(condition, body)
 
-    def _register_variable_usage_in_expr(self, node: BinOpNode):
-        """Register variable usage in an expression."""
-        if isinstance(node.left, VarNode):
-            self.symbol_table.lookup(node.left.value, record_usage=True, line=self.current_token.line)
-        elif isinstance(node.left, BinOpNode):
-            self._register_variable_usage_in_expr(node.left)
-            
-        if isinstance(node.right, VarNode):
-            self.symbol_table.lookup(node.right.value, record_usage=True, line=self.current_token.line)
-        elif isinstance(node.right, BinOpNode):
-            self._register_variable_usage_in_expr(node.right)
-
     def statement_list(self):
         """statement_list : statement (SEMICOLON statement)*"""
         statements = []
         # Skip initial empty lines
-        while self.current_token.type == TokenType.SEMICOLON:
+        while self.current_type == TokenType.SEMICOLON:
             self.eat(TokenType.SEMICOLON)
         
         # Add first non-empty statement
-        if self.current_token.type != TokenType.EOF:
-            statements.append(self.statement())
+        if self.current_type != TokenType.EOF:
+            statements.append(self._statement())
         
         # Add remaining statements
-        while self.current_token.type == TokenType.SEMICOLON:
-            self.eat(TokenType.SEMICOLON)
-            # Skip empty lines
-            while self.current_token.type == TokenType.SEMICOLON:
+        while self.current_type == TokenType.SEMICOLON or self._resumed():
+            # Skip the separator and empty lines
+            while self.current_type == TokenType.SEMICOLON:
                 self.eat(TokenType.SEMICOLON)
-            if self.current_token.type != TokenType.EOF:
-                statements.append(self.statement())
+            if self.current_type != TokenType.EOF:
+                statements.append(self._statement())
         
         return statements
     
     def parse(self):
         """Parse the input and return an AST."""
-        return self.program() 
\ No newline at end of file
+        return self.program()
+    
+    def parse_arena(self) -> 'NodeArena':
+        """Parse the input into a NodeArena.
+
+        Each top-level statement is copied into the arena as soon as it is
+        parsed, so the object nodes of only one statement exist at a time.
+        """
+        from .ast_arena import NodeArena
+        if self.node_factory is not None:
+            raise ValueError("parse_arena() needs a parser without share_nodes")
+        arena = NodeArena()
+        arena.root = arena.add_block(self._program())
+        return arena 
\ No newline at end of file
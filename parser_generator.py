@@ -0,0 +1,399 @@
+"""
+Generation of a table-driven LL(1) parser module from the grammar.
+
+Run ``python -m compiler.parser_generator`` to print the generated source.
+"""
+from typing import Dict, FrozenSet, List, NamedTuple, Optional, Sequence, Tuple
+from .generated_code import load_generated
+from .grammar import GRAMMAR
+from .lexer import TokenType
+from .parser import (AssignNode, BinOpNode, IfNode, NumNode, ParseError, PrintNode,
+                     UnaryOpNode, VarNode, WhileNode)
+from .token_buffer import split_eof
+
+# Rules map to their alternatives, each a tuple of symbols as written:
+# 'rule', 'TERMINAL', '$TERMINAL' (token kept) or '{action}'
+Rules = Dict[str, List[Tuple[str, ...]]]
+
+# Code of the semantic actions. They run on the value stack `values`;
+# `marks` holds where the statements of the open blocks start and `current`
+# is the type value of the lookahead token
+_ACTIONS = {
+    'variable': ["values[-1] = VarNode(values[-1])"],
+    'number': ["values[-1] = NumNode(values[-1])"],
+    'binary': ["right = values.pop()",
+               "op = values.pop()",
+               "values[-1] = BinOpNode(values[-1], op, right)"],
+    'unary': ["operand = values.pop()",
+              "values[-1] = UnaryOpNode(values[-1], operand)"],
+    'assign': ["right = values.pop()",
+               "values[-1] = AssignNode(values[-1], right)"],
+    'print': ["values[-1] = PrintNode(values[-1])"],
+    'if': ["else_body = values.pop()",
+           "then_body = values.pop()",
+           "values[-1] = IfNode(values[-1], then_body, else_body)"],
+    'while': ["body = values.pop()",
+              "values[-1] = WhileNode(values[-1], body)"],
+    'none': ["values.append(None)"],
+    # Parser.statement_list() parses no statement at EOF
+    'empty': ["if current != _EOF:",
+              "    values.append(None)"],
+    'mark': ["marks.append(len(values))"],
+    'collect': ["start = marks.pop()",
+                "values[start:] = [values[start:]]"],
+}
+
+def read_grammar(text: str = GRAMMAR) -> Rules:
+    """Rules of a grammar written as described in compiler.grammar, in order."""
+    rules: Rules = {}
+    alternatives = None
+    for number, line in enumerate(text.splitlines(), 1):
+        line = line.split('#', 1)[0].strip()
+        if not line:
+            continue
+        if line.startswith('|'):
+            if alternatives is None:
+                raise ValueError(f"Line {number}: alternative outside a rule")
+            body = line[1:]
+        else:
+            name, colon, body = line.partition(':')
+            name = name.strip()
+            if not colon or not name.isidentifier() or not name.islower():
+                raise ValueError(f"Line {number}: expected 'rule : alternatives'")
+            if name in rules:
+                raise ValueError(f"Line {number}: rule '{name}' defined twice")
+            alternatives = rules[name] = []
+        alternatives.extend(tuple(alternative.split()) for alternative in body.split('|'))
+    if not rules:
+        raise ValueError("The grammar has no rules")
+    for name, alternatives in rules.items():
+        for symbol in (symbol for alternative in alternatives for symbol in alternative):
+            if symbol.startswith('{'):
+                if not symbol.endswith('}') or symbol[1:-1] not in _ACTIONS:
+                    raise ValueError(f"Rule '{name}': unknown action {symbol}")
+            elif symbol.lstrip('$').isupper():
+                if symbol.lstrip('$') not in TokenType.__members__:
+                    raise ValueError(f"Rule '{name}': unknown token type {symbol}")
+            elif symbol not in rules:
+                raise ValueError(f"Rule '{name}': unknown rule '{symbol}'")
+    return rules
+
+def _terminal(symbol: str) -> Optional[TokenType]:
+    """Token type of a terminal symbol, None for rules and actions."""
+    name = symbol.lstrip('$')
+    return TokenType[name] if name.isupper() else None
+
+def _is_action(symbol: str) -> bool:
+    return symbol.startswith('{')
+
+def _sequence_first(symbols: Sequence[str], first: Dict[str, FrozenSet[TokenType]],
+                    nullable: FrozenSet[str]) -> Tuple[FrozenSet[TokenType], bool]:
+    """FIRST set of a sequence of symbols, and whether it can derive nothing."""
+    result = set()
+    for symbol in symbols:
+        if _is_action(symbol):
+            continue
+        token_type = _terminal(symbol)
+        if token_type is not None:
+            result.add(token_type)
+            return frozenset(result), False
+        result |= first[symbol]
+        if symbol not in nullable:
+            return frozenset(result), False
+    return frozenset(result), True
+
+def first_sets(rules: Rules) -> Tuple[Dict[str, FrozenSet[TokenType]], FrozenSet[str]]:
+    """FIRST set of every rule, and the set of rules that can derive nothing."""
+    first = {name: frozenset() for name in rules}
+    nullable = frozenset()
+    changed = True
+    while changed:
+        changed = False
+        for name, alternatives in rules.items():
+            for alternative in alternatives:
+                symbols, empty = _sequence_first(alternative, first, nullable)
+                if not symbols <= first[name]:
+                    first[name] |= symbols
+                    changed = True
+                if empty and name not in nullable:
+                    nullable |= {name}
+                    changed = True
+    return first, nullable
+
+def follow_sets(rules: Rules, first: Dict[str, FrozenSet[TokenType]],
+                nullable: FrozenSet[str]) -> Dict[str, FrozenSet[TokenType]]:
+    """FOLLOW set of every rule; EOF follows the start rule."""
+    follow = {name: set() for name in rules}
+    follow[next(iter(rules))].add(TokenType.EOF)
+    changed = True
+    while changed:
+        changed = False
+        for name, alternatives in rules.items():
+            for alternative in alternatives:
+                for index, symbol in enumerate(alternative):
+                    if _is_action(symbol) or _terminal(symbol) is not None:
+                        continue
+                    symbols, empty = _sequence_first(alternative[index + 1:], first, nullable)
+                    if empty:
+                        symbols |= follow[name]
+                    if not symbols <= follow[symbol]:
+                        follow[symbol] |= symbols
+                        changed = True
+    return {name: frozenset(symbols) for name, symbols in follow.items()}
+
+class ParseTable(NamedTuple):
+    """LL(1) table of a grammar.
+
+    `entries[rule][token type]` is the alternative predicted for that
+    lookahead and `defaults[rule]` the empty alternative applied to any
+    other token, if the rule can derive nothing. `conflicts` lists the
+    (rule, token type, alternative kept, alternative dropped) where the
+    grammar is not LL(1); the alternative written first is kept.
+    """
+    entries: Dict[str, Dict[TokenType, int]]
+    defaults: Dict[str, Optional[int]]
+    conflicts: List[Tuple[str, TokenType, int, int]]
+
+def parse_table(rules: Rules) -> ParseTable:
+    """Build the LL(1) table of `rules` from their FIRST and FOLLOW sets."""
+    first, nullable = first_sets(rules)
+    follow = follow_sets(rules, first, nullable)
+    entries = {}
+    defaults = {}
+    conflicts = []
+    for name, alternatives in rules.items():
+        row = entries[name] = {}
+        defaults[name] = None
+        for index, alternative in enumerate(alternatives):
+            symbols, empty = _sequence_first(alternative, first, nullable)
+            if empty:
+                symbols |= follow[name]
+                if defaults[name] is None:
+                    defaults[name] = index
+            for token_type in sorted(symbols, key=lambda token_type: token_type.value):
+                if token_type not in row:
+                    row[token_type] = index
+                elif row[token_type] != index:
+                    conflicts.append((name, token_type, row[token_type], index))
+    return ParseTable(entries, defaults, conflicts)
+
+# Part of the cache key of the generated code: bump it whenever a change
+# here alters the source generated for the same grammar
+_GENERATOR_VERSION = 2
+
+_HEADER = '''\
+# Parser generated by compiler.parser_generator from compiler.grammar.
+# Do not edit: change the grammar instead.
+# The AST node classes, ParseError, TokenType and split_eof are provided by
+# the loader.
+@CONFLICTS@
+# Symbols on the parse stack: rules are numbered from 0, terminals from
+# _TERMINALS and terminals whose token is kept from _KEPT (both plus the
+# token type value), actions from _ACTIONS
+_TERMINALS = @TERMINALS@
+_KEPT = @KEPT@
+_ACTIONS = @ACTIONS@
+_START = 0
+_EOF = @EOF@
+
+_RULE_NAMES = (
+@RULE_NAMES@
+)
+
+@ACTION_FUNCTIONS@
+_ACTION_FUNCTIONS = (@ACTION_NAMES@)
+
+# For each rule, what replaces it on the stack for each lookahead token
+# type: its alternative with the leading rules already expanded for that
+# token, reversed. Tokens without an entry use the rule's default (its
+# empty alternative), or are a syntax error if it has none
+_TABLE = (
+@TABLE@
+)
+_DEFAULTS = (@DEFAULTS@)
+# For each rule without default, the token type value reported as expected
+# when no alternative applies: the first terminal of its last alternative,
+# the one Parser falls back to (an identifier for an operand)
+_EXPECTED = (@EXPECTED@)
+
+class GeneratedParser:
+    """Syntax-only parser with the parse() interface of Parser.
+
+    `tokens` is a TokenBuffer or a list of tokens. parse() builds the same
+    AST as Parser.parse() but fills no symbol table, so it neither checks
+    that variables are declared nor records their values. Syntax errors
+    are the ParseError Parser raises, with the same message and position.
+    """
+
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.count, self.eof = split_eof(tokens)
+        if isinstance(tokens, list):
+            types = [token.type.value for token in tokens]
+            del types[self.count:]
+        else:
+            types = list(tokens.types)
+        types.append(_EOF)
+        self.types = types
+        self.pos = 0
+
+    def _token(self, index):
+        return self.tokens[index] if index < self.count else self.eof
+
+    def parse(self):
+        """Parse the program and return its top-level nodes."""
+        tokens = self.tokens
+        types = self.types
+        table = _TABLE
+        defaults = _DEFAULTS
+        actions = _ACTION_FUNCTIONS
+        values = []
+        marks = []
+        stack = [_START]
+        pop = stack.pop
+        extend = stack.extend
+        pos = self.pos
+        current = types[pos]
+        while stack:
+            symbol = pop()
+            if symbol < _TERMINALS:
+                expansion = table[symbol].get(current, defaults[symbol])
+                if expansion is None:
+                    self.pos = pos
+                    if _EXPECTED[symbol] is not None:
+                        raise self._error(f"Expected {TokenType(_EXPECTED[symbol])}, got {TokenType(current)}")
+                    raise self._error(f"Unexpected {TokenType(current)} in {_RULE_NAMES[symbol]}")
+                extend(expansion)
+            elif symbol < _ACTIONS:
+                if symbol < _KEPT:
+                    expected = symbol - _TERMINALS
+                else:
+                    expected = symbol - _KEPT
+                    values.append(tokens[pos])
+                if expected != current:
+                    self.pos = pos
+                    raise self._error(f"Expected {TokenType(expected)}, got {TokenType(current)}")
+                pos += 1
+                current = types[pos]
+            else:
+                actions[symbol - _ACTIONS](values, marks, current)
+        self.pos = pos
+        return values
+
+    def _error(self, message):
+        token = self._token(self.pos)
+        return ParseError(message, token.line, token.column)
+'''
+
+def _first_terminal(rules: Rules, symbols: Sequence[str]) -> Optional[TokenType]:
+    """Terminal a sequence of symbols starts with, through the last alternative
+    of a leading rule; None if it can start with nothing."""
+    for symbol in symbols:
+        if _is_action(symbol):
+            continue
+        token_type = _terminal(symbol)
+        if token_type is not None:
+            return token_type
+        return _first_terminal(rules, rules[symbol][-1])
+    return None
+
+def generate_parser_source(grammar: str = GRAMMAR) -> str:
+    """Python source of a parser module for `grammar`."""
+    rules = read_grammar(grammar)
+    table = parse_table(rules)
+    names = list(rules)
+    numbers = {name: number for number, name in enumerate(names)}
+    actions = list(_ACTIONS)
+    terminals = len(names)
+    kept = terminals + max(token_type.value for token_type in TokenType) + 1
+    action_base = kept + (kept - terminals)
+
+    def code(symbol: str) -> int:
+        if _is_action(symbol):
+            return action_base + actions.index(symbol[1:-1])
+        token_type = _terminal(symbol)
+        if token_type is None:
+            return numbers[symbol]
+        return (kept if symbol.startswith('$') else terminals) + token_type.value
+
+    def expand(name: str, token_type: TokenType, alternative: int, depth: int = 0) -> List[str]:
+        """Alternative of `name` for `token_type`, expanding its leading rules."""
+        if depth > len(names):
+            raise ValueError(f"Rule '{name}' is left-recursive")
+        symbols = list(rules[name][alternative])
+        index = 0
+        while index < len(symbols) and _terminal(symbols[index]) is None:
+            symbol = symbols[index]
+            if _is_action(symbol):
+                index += 1
+                continue
+            predicted = table.entries[symbol].get(token_type, table.defaults[symbol])
+            if predicted is None:
+                break
+            symbols[index:index + 1] = expand(symbol, token_type, predicted, depth + 1)
+        return symbols
+
+    def reversed_codes(symbols: Sequence[str]) -> str:
+        codes = [str(code(symbol)) for symbol in reversed(symbols)]
+        return ', '.join(codes) + (',' if len(codes) == 1 else '')
+
+    rows = []
+    defaults = []
+    expected = []
+    for name in names:
+        default = table.defaults[name]
+        row = [f"    {{  # {name}"]
+        for token_type, alternative in table.entries[name].items():
+            if alternative == default:
+                continue  # The default applies anyway
+            symbols = expand(name, token_type, alternative)
+            row.append(f"        TokenType.{token_type.name}.value: ({reversed_codes(symbols)}),"
+                       f"  # {' '.join(symbols)}")
+        row.append("    },")
+        rows.extend(row)
+        defaults.append("None" if default is None
+                        else f"({reversed_codes(rules[name][default])})")
+        fallback = None if default is not None else _first_terminal(rules, rules[name][-1])
+        expected.append("None" if fallback is None else f"TokenType.{fallback.name}.value")
+
+    functions = []
+    for action in actions:
+        functions.append(f"def _action_{action}(values, marks, current):")
+        functions.extend(f"    {line}" for line in _ACTIONS[action])
+        functions.append("")
+    conflicts = [f"# {name}: {token_type.name} takes '{' '.join(rules[name][kept_index]) or 'nothing'}'"
+                 f" over '{' '.join(rules[name][dropped]) or 'nothing'}'"
+                 for name, token_type, kept_index, dropped in table.conflicts]
+    if conflicts:
+        conflicts.insert(0, "#\n# Conflicts, resolved in favour of the alternative written first:")
+        conflicts.append("")
+
+    source = _HEADER
+    for marker, value in (('@CONFLICTS@', '\n'.join(conflicts)),
+                          ('@TERMINALS@', str(terminals)),
+                          ('@KEPT@', str(kept)),
+                          ('@ACTIONS@', str(action_base)),
+                          ('@EOF@', str(TokenType.EOF.value)),
+                          ('@RULE_NAMES@', '\n'.join(f"    {name!r}," for name in names)),
+                          ('@ACTION_FUNCTIONS@', '\n'.join(functions)),
+                          ('@ACTION_NAMES@', ', '.join(f"_action_{action}" for action in actions)),
+                          ('@TABLE@', '\n'.join(rows)),
+                          ('@DEFAULTS@', ', '.join(defaults) + ','),
+                          ('@EXPECTED@', ', '.join(expected) + ',')):
+        source = source.replace(marker, value)
+    return source
+
+def load_parser(grammar: str = GRAMMAR, cache: bool = True) -> type:
+    """Return the GeneratedParser class for `grammar`, generating it if needed.
+
+    Compiled code is cached as load_lexer() does (see generated_code).
+    """
+    namespace = {'TokenType': TokenType, 'ParseError': ParseError,
+                 'split_eof': split_eof, 'AssignNode': AssignNode, 'BinOpNode': BinOpNode,
+                 'IfNode': IfNode, 'NumNode': NumNode, 'PrintNode': PrintNode,
+                 'UnaryOpNode': UnaryOpNode, 'VarNode': VarNode, 'WhileNode': WhileNode}
+    return load_generated('parser', grammar, lambda: generate_parser_source(grammar), _GENERATOR_VERSION,
+                          namespace, 'GeneratedParser', cache)
+
+if __name__ == "__main__":
+    print(generate_parser_source())
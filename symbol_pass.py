@@ -0,0 +1,193 @@
+"""
+Symbol-table bookkeeping of the parser, also available as a pass over the AST.
+"""
+from typing import List, Optional
+from .lexer import Token, TokenType
+from .parser import (ASTNode, AssignNode, BinOpNode, IfNode, NumNode, ParseError, PrintNode,
+                     UnaryOpNode, VarNode, WhileNode, postorder)
+from .symbol_table import SymbolTable
+from .token_spec import SPECS_BY_TYPE
+
+class SymbolTableBuilder:
+    """Fills a SymbolTable with the declarations, values and uses of variables.
+
+    Parser calls it as it parses unless it is syntax-only. fill() does the
+    same work afterwards, in one walk over the AST of a syntax-only parse.
+    """
+
+    def __init__(self, symbol_table: SymbolTable):
+        self.symbol_table = symbol_table
+
+    def use(self, node: VarNode, token: Optional[Token] = None):
+        """Record a reference to a variable, which must be declared.
+
+        `token` is the occurrence when the node is shared (NodeFactory).
+        """
+        token = token or node.token
+        if not self.symbol_table.lookup(node.value, record_usage=True, line=token.line):
+            raise ParseError(f"Variable '{node.value}' not declared", token.line, token.column)
+
+    def declare(self, target: VarNode):
+        """Add a variable of the var block, before its initializer is parsed."""
+        self.symbol_table.insert(target.value, None, target.token.line)
+
+    def initialize(self, target: VarNode, right: Optional[ASTNode]):
+        """Record the initializer of a declared variable, if it has one."""
+        line = target.token.line
+        if isinstance(right, NumNode):
+            self._insert_literal(target, right, line)
+        elif isinstance(right, VarNode):
+            right_symbol = self.symbol_table.lookup(right.value)
+            if right_symbol and right_symbol.value is not None:
+                self.symbol_table.insert(target.value, right_symbol.value, line)
+        self.symbol_table.lookup(target.value, record_usage=True, line=line)
+
+    def assign(self, target: VarNode, right: ASTNode, line: int):
+        """Record the value an assignment statement gives to `target`."""
+        if isinstance(right, NumNode):
+            self._insert_literal(target, right, line)
+        elif isinstance(right, VarNode):
+            right_symbol = self.symbol_table.lookup(right.value)
+            if right_symbol and right_symbol.value is not None:
+                self.symbol_table.insert(target.value, right_symbol.value, line)
+        elif isinstance(right, (BinOpNode, UnaryOpNode)):
+            symbol = self.symbol_table.lookup(target.value)
+            if symbol:
+                symbol.set_expression(self._build_expression(right))
+                symbol.info.last_modified_line = line
+                try:
+                    result = self._evaluate_expression(right)
+                    if result is not None:
+                        symbol.update_value(result, line)
+                except Exception:
+                    pass  # Not a value the table can hold, such as a string sum
+
+    def _insert_literal(self, target: VarNode, right: NumNode, line: int):
+        if right.token.type == TokenType.STRING_LITERAL:
+            self.symbol_table.insert(target.value, right.value, line)
+            return
+        try:
+            value = float(right.value) if isinstance(right.value, str) and '.' in right.value else int(right.value)
+        except ValueError:
+            raise ParseError(f"Invalid numeric value: {right.value}", right.token.line, right.token.column)
+        self.symbol_table.insert(target.value, value, line)
+
+    def fill(self, ast: List, declarations: int = 0):
+        """Fill the table from the AST of a program, in the order Parser does.
+
+        The first `declarations` top-level nodes come from the var block
+        (Parser.declaration_count). Raises ParseError at the first
+        undeclared variable. Assignments are recorded on the line of their
+        target, where Parser uses that of the '='.
+
+        Raises ValueError for an AST with shared nodes (Parser's
+        share_nodes), whose uses would be recorded on the lines of their
+        first occurrence.
+        """
+        # Ids of the expression nodes seen, which are all alive with the AST
+        self._seen = set()
+        try:
+            for index, node in enumerate(ast):
+                if index < declarations:
+                    self._declaration(node)
+                else:
+                    self._statement(node)
+        finally:
+            del self._seen
+
+    def _declaration(self, node: ASTNode):
+        if isinstance(node, AssignNode):
+            self.declare(node.left)
+            self._uses(node.right)
+            self.initialize(node.left, node.right)
+        else:
+            self.declare(node)
+            self.initialize(node, None)
+
+    def _statement(self, node):
+        if isinstance(node, list):
+            # A var statement
+            for declaration in node:
+                self._declaration(declaration)
+        elif isinstance(node, AssignNode):
+            self.use(node.left)
+            self._uses(node.right)
+            self.assign(node.left, node.right, node.left.token.line)
+        elif isinstance(node, PrintNode):
+            self._uses(node.value)
+        elif isinstance(node, IfNode):
+            self._uses(node.condition)
+            for statement in node.then_body:
+                self._statement(statement)
+            for statement in node.else_body or ():
+                self._statement(statement)
+        elif isinstance(node, WhileNode):
+            self._uses(node.condition)
+            for statement in node.body:
+                self._statement(statement)
+
+    def _uses(self, expression: ASTNode):
+        """Record the variables of an expression in source order."""
+        seen = self._seen
+        for node in postorder(expression):
+            if id(node) in seen:
+                raise ValueError("fill() needs an AST without shared nodes")
+            seen.add(id(node))
+            if isinstance(node, VarNode):
+                self.use(node)
+
+    def _evaluate_expression(self, node: ASTNode) -> Optional[float]:
+        """Evaluate an expression if possible"""
+        values = []
+        for node in postorder(node):
+            if isinstance(node, BinOpNode):
+                right = values.pop()
+                left = values.pop()
+                result = None
+                if left is not None and right is not None:
+                    if node.op.type == TokenType.PLUS:
+                        result = left + right
+                    elif node.op.type == TokenType.MINUS:
+                        result = left - right
+                    elif node.op.type == TokenType.MULTIPLY:
+                        result = left * right
+                    elif node.op.type == TokenType.DIVIDE:
+                        result = left / right if right != 0 else None
+                    elif node.op.type == TokenType.MODULO:
+                        result = left % right if right != 0 else None
+                values.append(result)
+            elif isinstance(node, UnaryOpNode):
+                operand = values.pop()
+                if operand is not None and node.op.type == TokenType.MINUS:
+                    values.append(-operand)
+                else:
+                    values.append(None)
+            elif isinstance(node, NumNode):
+                values.append(float(node.value) if '.' in str(node.value) else int(node.value))
+            elif isinstance(node, VarNode):
+                symbol = self.symbol_table.lookup(node.value)
+                values.append(symbol.value if symbol else None)
+            else:
+                values.append(None)
+        return values.pop()
+
+    def _build_expression(self, node: ASTNode) -> str:
+        """Build a string representation of an expression"""
+        # Pieces are joined once at the end, so long expressions are not
+        # copied again for every operator
+        parts = []
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            if isinstance(node, str):
+                parts.append(node)
+            elif isinstance(node, BinOpNode):
+                op = SPECS_BY_TYPE[node.op.type].lexeme or '?'
+                stack.extend((")", node.right, f" {op} ", node.left, "("))
+            elif isinstance(node, UnaryOpNode):
+                stack.extend((")", node.expr, "(not " if node.op.type == TokenType.NOT else "(-"))
+            elif isinstance(node, NumNode):
+                parts.append(str(node.value))
+            elif isinstance(node, VarNode):
+                parts.append(node.value)
+        return "".join(parts)
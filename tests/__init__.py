@@ -0,0 +1,4 @@
+"""
+Tests of the compiler stages, run with ``python -m pytest`` from the
+package directory.
+"""
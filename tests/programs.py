@@ -0,0 +1,92 @@
+"""
+Random source texts for the differential tests, and a comparable form of
+the ASTs built from them.
+
+Every generator takes a random.Random, so that a failing case can be
+reproduced from its seed.
+"""
+import random
+from ..parser import AssignNode, BinOpNode, IfNode, NumNode, PrintNode, UnaryOpNode, VarNode, WhileNode
+
+NAMES = ('a', 'b', 'c')
+LITERALS = ('0', '1', '7', '2.5', '"s"')
+BINARY_OPERATORS = ('+', '-', '*', '/', '%', '<', '>', '<=', '>=', '==', '!=', 'and', 'or')
+PREFIX_OPERATORS = ('-', '+', 'not ')
+
+# Pieces inserted by mutate(): stray operators, separators and lexemes
+# that are only valid in some places, or not at all
+PIECES = ('1', 'a', ' ', '\n', '+', ';', '{', '}', '(', ')', '"', 'var', '=', '==', '!=',
+          '%', '!', '.', ',', '[', ':', '1.2.3', '/*', '//', 'x' * 33, 'ñ', '@')
+
+def expression(rng: random.Random, depth: int = 4) -> str:
+    """An expression over NAMES and LITERALS with every operator."""
+    roll = rng.random()
+    if depth == 0 or roll < 0.25:
+        return rng.choice(NAMES + LITERALS)
+    if roll < 0.35:
+        return '(' + expression(rng, depth - 1) + ')'
+    if roll < 0.45:
+        return rng.choice(PREFIX_OPERATORS) + expression(rng, depth - 1)
+    return f"{expression(rng, depth - 1)} {rng.choice(BINARY_OPERATORS)} {expression(rng, depth - 1)}"
+
+def statement(rng: random.Random, depth: int = 2) -> str:
+    roll = rng.random()
+    if depth > 0 and roll < 0.2:
+        text = f"if ({expression(rng, 2)}) {{\n{block(rng, depth - 1)}\n}}"
+        if rng.random() < 0.5:
+            text += f" else {{\n{block(rng, depth - 1)}\n}}"
+        return text
+    if depth > 0 and roll < 0.35:
+        return f"while ({expression(rng, 2)}) {{\n{block(rng, depth - 1)}\n}}"
+    if roll < 0.5:
+        return f"print({expression(rng, 2)});"
+    return f"{rng.choice(NAMES)} = {expression(rng, 3)}"
+
+def block(rng: random.Random, depth: int) -> str:
+    return ';\n'.join(statement(rng, depth) for _ in range(rng.randint(1, 3)))
+
+def program(rng: random.Random) -> str:
+    """A program that declares every name it uses."""
+    statements = ';\n'.join(statement(rng) for _ in range(rng.randint(1, 6)))
+    return f"program\nvar a = 3; b = 4.5; c = \"x\";\n{statements}\n"
+
+def mutate(rng: random.Random, text: str) -> str:
+    """`text` with a few random edits, which usually break it."""
+    for _ in range(rng.randint(1, 3)):
+        start = rng.randrange(len(text) + 1)
+        end = min(len(text), start + rng.randint(0, 3))
+        text = text[:start] + (rng.choice(PIECES) if rng.random() < 0.8 else '') + text[end:]
+    return text
+
+def texts(seed: int, count: int, broken: float = 0.5):
+    """`count` programs, a `broken` fraction of them mutated."""
+    rng = random.Random(seed)
+    for _ in range(count):
+        text = program(rng)
+        yield mutate(rng, text) if rng.random() < broken else text
+
+def shape(node):
+    """Nested tuples with the structure, operators and values of an AST.
+
+    Tokens are left out, so that ASTs built by different parsers compare
+    equal when they only differ in token objects.
+    """
+    if isinstance(node, list):
+        return [shape(item) for item in node]
+    if isinstance(node, BinOpNode):
+        return ('binary', node.op.type, shape(node.left), shape(node.right))
+    if isinstance(node, UnaryOpNode):
+        return ('unary', node.op.type, shape(node.expr))
+    if isinstance(node, NumNode):
+        return ('literal', node.token.type, node.value)
+    if isinstance(node, VarNode):
+        return ('name', node.value)
+    if isinstance(node, AssignNode):
+        return ('assign', shape(node.left), shape(node.right))
+    if isinstance(node, PrintNode):
+        return ('print', shape(node.value))
+    if isinstance(node, IfNode):
+        return ('if', shape(node.condition), shape(node.then_body), shape(node.else_body))
+    if isinstance(node, WhileNode):
+        return ('while', shape(node.condition), shape(node.body))
+    return node
@@ -0,0 +1,45 @@
+"""
+NodeArena built while parsing, and code generation from it.
+"""
+import unittest
+from ..ast_arena import NodeArena
+from ..intermediate_code import IntermediateCodeGenerator
+from ..lexer import Lexer, LexicalError
+from ..parser import ParseError, Parser
+from ..symbol_table import SymbolTable
+from .programs import texts
+
+COLUMNS = ('child0', 'child1', 'values', 'lines', 'items', 'kinds', 'ops')
+
+def columns(arena: NodeArena):
+    """Comparable contents of an arena."""
+    return [list(getattr(arena, name)) for name in COLUMNS] + [arena.constants, arena.root]
+
+def code(generate, tree):
+    generator = IntermediateCodeGenerator()
+    generate(generator, tree)
+    return [(str(instruction), instruction.line) for instruction in generator.code]
+
+def parsed(count: int):
+    """Texts of the test programs that parse, with their AST."""
+    for text in texts(seed=41, count=count):
+        try:
+            yield text, Parser(Lexer(text), SymbolTable()).parse()
+        except (LexicalError, ParseError):
+            continue
+
+class ArenaTest(unittest.TestCase):
+
+    def test_parse_arena_matches_parse(self):
+        for text, ast in parsed(600):
+            expected = NodeArena()
+            expected.root = expected.add_block(ast)
+            with self.subTest(text=text):
+                self.assertEqual(columns(Parser(Lexer(text), SymbolTable()).parse_arena()), columns(expected))
+
+    def test_generate_arena_matches_generate(self):
+        for text, ast in parsed(300):
+            arena = Parser(Lexer(text), SymbolTable()).parse_arena()
+            with self.subTest(text=text):
+                self.assertEqual(code(IntermediateCodeGenerator.generate_arena, arena),
+                                 code(IntermediateCodeGenerator.generate, ast))
@@ -0,0 +1,51 @@
+"""
+Round trip of a NodeArena through the arena file format.
+"""
+import marshal
+import os
+import tempfile
+import unittest
+from ..ast_format import dump_arena, load_arena, read_arena, write_arena
+from ..intermediate_code import IntermediateCodeGenerator
+from ..lexer import Lexer
+from ..parser import Parser
+from ..symbol_table import SymbolTable
+from .test_ast_arena import code, columns, parsed
+
+class ArenaFormatTest(unittest.TestCase):
+
+    def test_round_trip(self):
+        directory = tempfile.mkdtemp()
+        path = os.path.join(directory, 'program.ast')
+        try:
+            for text, ast in parsed(300):
+                arena = Parser(Lexer(text), SymbolTable()).parse_arena()
+                loaded = load_arena(dump_arena(arena))
+                write_arena(path, arena)
+                mapped = read_arena(path)
+                with self.subTest(text=text):
+                    self.assertEqual(columns(loaded), columns(arena))
+                    self.assertEqual(columns(mapped), columns(arena))
+                    self.assertEqual(code(IntermediateCodeGenerator.generate_arena, mapped),
+                                     code(IntermediateCodeGenerator.generate, ast))
+                del mapped
+        finally:
+            os.unlink(path)
+            os.rmdir(directory)
+
+    def test_corrupt_files_are_rejected(self):
+        arena = Parser(Lexer('program var a = 1;\nprint(a + 2);'), SymbolTable()).parse_arena()
+        data = dump_arena(arena)
+        constants = len(data) - len(marshal.dumps(arena.constants))
+        cases = {
+            'empty': b'',
+            'magic': b'X' + data[1:],
+            'version': data[:8] + bytes(16) + data[24:],
+            'truncated': data[:-1],
+            'trailing': data + b'\0',
+            'constants': data[:constants] + b'\xff' + data[constants + 1:],
+        }
+        for name, corrupt in cases.items():
+            with self.subTest(case=name):
+                with self.assertRaises(ValueError):
+                    load_arena(corrupt)
@@ -0,0 +1,114 @@
+"""
+Operator precedence and associativity, and agreement of the expression
+parser of Parser with the parser generated from the grammar.
+"""
+import unittest
+from ..lexer import Lexer, LexicalError, TokenType
+from ..parser import BinOpNode, NumNode, ParseError, Parser, UnaryOpNode, VarNode
+from ..parser_generator import load_parser
+from ..symbol_table import SymbolTable
+from ..token_buffer import TokenBuffer
+from ..token_spec import SPECS_BY_TYPE
+from .programs import shape, texts
+
+def render(node) -> str:
+    """An expression with every operator application in parentheses."""
+    if isinstance(node, BinOpNode):
+        return f"({render(node.left)} {SPECS_BY_TYPE[node.op.type].lexeme} {render(node.right)})"
+    if isinstance(node, UnaryOpNode):
+        operator = 'not ' if node.op.type == TokenType.NOT else SPECS_BY_TYPE[node.op.type].lexeme
+        return f"({operator}{render(node.expr)})"
+    if isinstance(node, (NumNode, VarNode)):
+        return str(node.value)
+    raise TypeError(f"Unexpected expression node: {type(node).__name__}")
+
+def parse_expression(text: str):
+    """AST of `text` as the argument of print."""
+    tokens = TokenBuffer.from_lexer(Lexer(f"program var a; b; c;\nprint({text});", engine='regex', span_tokens=True))
+    statements = Parser(tokens, SymbolTable()).parse()
+    return statements[-1].value
+
+def tokens_of(text: str):
+    try:
+        return TokenBuffer.from_lexer(Lexer(text, engine='regex', span_tokens=True))
+    except LexicalError:
+        return None
+
+class PrecedenceTest(unittest.TestCase):
+
+    def check(self, cases):
+        for text, expected in cases:
+            with self.subTest(text=text):
+                self.assertEqual(render(parse_expression(text)), expected)
+
+    def test_levels(self):
+        self.check([
+            ("a or b and c", "(a or (b and c))"),
+            ("a and b or c", "((a and b) or c)"),
+            ("a and b == c", "(a and (b == c))"),
+            ("a == b < c", "(a == (b < c))"),
+            ("a != b >= c", "(a != (b >= c))"),
+            ("a > b + c", "(a > (b + c))"),
+            ("a <= b - c", "(a <= (b - c))"),
+            ("a + b * c", "(a + (b * c))"),
+            ("a - b % c", "(a - (b % c))"),
+            ("a * b / c + a % b", "(((a * b) / c) + (a % b))"),
+            ("a % b != 0", "((a % b) != 0)"),
+        ])
+
+    def test_left_associativity(self):
+        self.check([
+            ("a - b - c", "((a - b) - c)"),
+            ("a / b * c % a", "(((a / b) * c) % a)"),
+            ("a < b > c", "((a < b) > c)"),
+            ("a == b != c", "((a == b) != c)"),
+            ("a and b and c", "((a and b) and c)"),
+            ("a or b or c", "((a or b) or c)"),
+        ])
+
+    def test_prefix_operators(self):
+        self.check([
+            ("-a * b", "((-a) * b)"),
+            ("- -a", "(-(-a))"),
+            ("+a - b", "(a - b)"),
+            ("-(a + b)", "(-(a + b))"),
+            ("not a == b", "(not (a == b))"),
+            ("not a < b + c", "(not (a < (b + c)))"),
+            ("not a and b", "((not a) and b)"),
+            ("not a or not b", "((not a) or (not b))"),
+            ("a and not b == c", "(a and (not (b == c)))"),
+            ("not not a", "(not (not a))"),
+        ])
+
+    def test_parentheses(self):
+        self.check([
+            ("(a + b) * c", "((a + b) * c)"),
+            ("a - (b - c)", "(a - (b - c))"),
+            ("((a))", "a"),
+            ("(a > b) + c", "((a > b) + c)"),
+        ])
+
+    def test_deep_nesting(self):
+        # Expressions are parsed without recursion
+        depth = 5000
+        node = parse_expression("(" * depth + "a" + ")" * depth + " + -" * depth + "b")
+        self.assertIsInstance(node, BinOpNode)
+
+class GeneratedParserTest(unittest.TestCase):
+
+    def test_same_ast_or_error_as_parser(self):
+        generated_parser = load_parser()
+        for text in texts(seed=21, count=1500):
+            tokens = tokens_of(text)
+            if tokens is None:
+                continue
+            try:
+                expected = shape(Parser(tokens, None, syntax_only=True).parse())
+            except ParseError as error:
+                expected = (error.message, error.line, error.column)
+            try:
+                result = shape(generated_parser(tokens).parse())
+            except ParseError as error:
+                result = (error.message, error.line, error.column)
+            with self.subTest(text=text):
+                self.assertEqual(result, expected)
@@ -0,0 +1,45 @@
+"""
+IncrementalLexer keeps the tokens a full relex of the edited text gives.
+"""
+import random
+import unittest
+from ..incremental_lexer import IncrementalLexer
+from ..lexer import Lexer, LexicalError, TokenType
+from .programs import mutate, program
+
+def rows(tokens):
+    return [(token.type, token.start, token.end, token.value, token.line, token.column) for token in tokens]
+
+def relex(text: str, trivia: bool):
+    """Tokens of a full relex up to EOF or the first error, and the error."""
+    lexer = Lexer(text, engine='regex', span_tokens=True, trivia=trivia)
+    tokens = []
+    try:
+        while True:
+            token = lexer.get_next_token()
+            tokens.append(token)
+            if token.type == TokenType.EOF:
+                return rows(tokens), None
+    except LexicalError as error:
+        return rows(tokens), (error.message, error.line, error.column)
+
+class IncrementalLexerTest(unittest.TestCase):
+
+    def test_edits_match_full_relex(self):
+        for trivia in (False, True):
+            rng = random.Random(71)
+            for _ in range(60):
+                text = program(rng)
+                lexer = IncrementalLexer(text, trivia=trivia)
+                for _ in range(15):
+                    # Mostly small edits of the current text, sometimes a
+                    # return to a valid program
+                    text = mutate(rng, text) if rng.random() < 0.8 else program(rng)
+                    try:
+                        lexer.update(text)
+                        error = None
+                    except LexicalError as raised:
+                        error = (raised.message, raised.line, raised.column)
+                    with self.subTest(text=text, trivia=trivia):
+                        self.assertEqual(lexer.text, text)
+                        self.assertEqual((rows(lexer.tokens), error), relex(text, trivia))
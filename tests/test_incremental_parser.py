@@ -0,0 +1,65 @@
+"""
+IncrementalParser keeps the AST a fresh Parser builds from the edited text.
+"""
+import random
+import re
+import unittest
+from ..incremental_parser import IncrementalParser
+from ..lexer import Lexer, LexicalError
+from ..parser import ParseError, Parser
+from ..symbol_table import SymbolTable
+from ..token_buffer import TokenBuffer
+from .programs import LITERALS, NAMES, expression, mutate, shape, statement
+
+# Ends the var block, so that the statements after it are not declarations
+HEADER = 'program\nvar a = 3; b = 4.5; c = "x";\nprint(a);;\n'
+
+OPERAND = re.compile(r'\b[abc]\b|\d+(?:\.\d+)?|"s"')
+
+def program(rng: random.Random) -> str:
+    return HEADER + ';\n'.join(statement(rng) for _ in range(rng.randint(2, 8))) + '\n'
+
+def edit(rng: random.Random, text: str) -> str:
+    """Mostly an operand inside a statement replaced by another operand or
+    an expression, otherwise a random edit or a new program."""
+    roll = rng.random()
+    operands = [match for match in OPERAND.finditer(text) if match.start() >= len(HEADER)]
+    if roll < 0.7 and operands:
+        match = rng.choice(operands)
+        replacement = rng.choice(NAMES + LITERALS) if rng.random() < 0.6 else expression(rng, 2)
+        return text[:match.start()] + replacement + text[match.end():]
+    if roll < 0.9:
+        return mutate(rng, text)
+    return program(rng)
+
+def parse(text: str):
+    """AST of a fresh Parser over the tokens of `text`, or its error."""
+    try:
+        tokens = TokenBuffer.from_lexer(Lexer(text, engine='regex', span_tokens=True))
+        return shape(Parser(tokens, SymbolTable()).parse())
+    except (LexicalError, ParseError) as error:
+        return type(error).__name__, error.message, error.line, error.column
+
+class IncrementalParserTest(unittest.TestCase):
+
+    def test_edits_match_fresh_parse(self):
+        rng = random.Random(81)
+        parsed = partial = 0
+        for _ in range(60):
+            text = program(rng)
+            parser = IncrementalParser(text)
+            for _ in range(20):
+                text = edit(rng, text)
+                try:
+                    region = parser.update(text)
+                    result = shape(parser.ast)
+                except (LexicalError, ParseError) as error:
+                    region = None
+                    result = type(error).__name__, error.message, error.line, error.column
+                with self.subTest(text=text):
+                    self.assertEqual(result, parse(text))
+                if region is not None:
+                    parsed += 1
+                    partial += region != (0, len(text))
+        # Most edits land inside a statement, which is reparsed alone
+        self.assertGreater(partial, parsed // 3)
@@ -0,0 +1,140 @@
+"""
+The lexing engines and lexers must produce the same tokens and errors.
+"""
+import os
+import tempfile
+import unittest
+from unittest import mock
+from .. import lexer_generator
+from ..lexer import Lexer, LexicalError, TokenType
+from ..token_buffer import TokenBuffer
+from ..token_spec import TOKEN_SPECS
+from ..vectorized_lexer import lex_vectorized, np
+from .programs import texts
+
+def drain(lexer):
+    """Tokens of a lexer as tuples, ending with EOF or the first error."""
+    tokens = []
+    try:
+        while True:
+            token = lexer.get_next_token()
+            tokens.append((token.type, token.value, token.line, token.column, token.error_message))
+            if token.type == TokenType.EOF:
+                return tokens
+    except LexicalError as error:
+        tokens.append(('error', error.message, error.line, error.column))
+        return tokens
+
+def placed_as_tokens(tokens):
+    """`tokens` with ERROR tokens reduced to their lexeme and message.
+
+    In span mode an ERROR token sits at its lexeme like any other token;
+    the position of the error itself is in the lexer's diagnostics.
+    """
+    return [(token[0], token[1], token[4]) if token[0] == TokenType.ERROR else token for token in tokens]
+
+def diagnostics(lexer):
+    return [(token.value, token.line, token.column, token.error_message, token.severity)
+            for token in lexer.diagnostics]
+
+def buffer_rows(buffer: TokenBuffer):
+    return [(token.type, token.value, token.line, token.column, token.error_message) for token in buffer]
+
+class LexerEngineTest(unittest.TestCase):
+
+    def test_engines_agree(self):
+        for text in texts(seed=11, count=600):
+            for recover in (False, True):
+                reference = Lexer(text, recover=recover)
+                expected = drain(reference)
+                for engine in Lexer.ENGINES[1:]:
+                    lexer = Lexer(text, engine=engine, recover=recover)
+                    with self.subTest(text=text, engine=engine, recover=recover):
+                        self.assertEqual(drain(lexer), expected)
+                        self.assertEqual(diagnostics(lexer), diagnostics(reference))
+                        self.assertEqual((lexer.error_count, lexer.warning_count),
+                                         (reference.error_count, reference.warning_count))
+
+    def test_span_tokens_agree(self):
+        for text in texts(seed=12, count=400):
+            reference = Lexer(text, recover=True)
+            expected = placed_as_tokens(drain(reference))
+            lexer = Lexer(text, engine='regex', span_tokens=True, recover=True)
+            with self.subTest(text=text):
+                self.assertEqual(placed_as_tokens(drain(lexer)), expected)
+                self.assertEqual(diagnostics(lexer), diagnostics(reference))
+
+    def test_token_buffer_replays_the_stream(self):
+        for text in texts(seed=13, count=300):
+            expected = placed_as_tokens(drain(Lexer(text, recover=True)))
+            buffer = TokenBuffer.from_lexer(Lexer(text, engine='regex', span_tokens=True, recover=True))
+            with self.subTest(text=text):
+                self.assertEqual(placed_as_tokens(drain(buffer.reader())), expected)
+                # A slice places its tokens from the same text
+                self.assertEqual([token.column for token in buffer[1:]], [token.column for token in buffer][1:])
+
+    def test_mapped_lexer_agrees(self):
+        directory = tempfile.mkdtemp()
+        path = os.path.join(directory, 'program.txt')
+        try:
+            for text in texts(seed=14, count=300):
+                with open(path, 'w', encoding='utf-8', newline='') as file:
+                    file.write(text)
+                with Lexer.from_path(path) as lexer:
+                    tokens = [token[:4] for token in drain(lexer)]
+                with self.subTest(text=text):
+                    self.assertEqual(tokens, [token[:4] for token in drain(Lexer(text))])
+        finally:
+            os.unlink(path)
+            os.rmdir(directory)
+
+    @unittest.skipIf(np is None, "NumPy is not installed")
+    def test_vectorized_lexing_agrees(self):
+        for text in texts(seed=15, count=300):
+            try:
+                expected = buffer_rows(TokenBuffer.from_lexer(Lexer(text, engine='regex', span_tokens=True)))
+            except LexicalError as error:
+                expected = error.message
+            try:
+                tokens = buffer_rows(lex_vectorized(text))
+            except LexicalError as error:
+                tokens = error.message
+            with self.subTest(text=text):
+                self.assertEqual(tokens, expected)
+
+    def test_specification_tokens(self):
+        text = "a % b != c [d, e.f]: g"
+        expected = [TokenType.IDENTIFIER, TokenType.MODULO, TokenType.IDENTIFIER, TokenType.NOT_EQUALS,
+                    TokenType.IDENTIFIER, TokenType.LBRACKET, TokenType.IDENTIFIER, TokenType.COMMA,
+                    TokenType.IDENTIFIER, TokenType.DOT, TokenType.IDENTIFIER, TokenType.RBRACKET,
+                    TokenType.COLON, TokenType.IDENTIFIER, TokenType.EOF]
+        for engine in Lexer.ENGINES:
+            with self.subTest(engine=engine):
+                self.assertEqual([token[0] for token in drain(Lexer(text, engine=engine))], expected)
+
+    def test_generated_lexer_is_loaded_once(self):
+        generated = lexer_generator.load_lexer()
+        # Neither a new Lexer nor equal specs generate the source again
+        with mock.patch.object(lexer_generator, 'generate_lexer_source', side_effect=AssertionError):
+            self.assertEqual(drain(Lexer("print(a)", engine='generated'))[-1][0], TokenType.EOF)
+            self.assertIs(lexer_generator.load_lexer(list(TOKEN_SPECS)), generated)
+
+    def test_diagnostic_severity(self):
+        text = "program var " + "x" * 40 + " = 1 @ 2;"
+        for engine in Lexer.ENGINES:
+            lexer = Lexer(text, engine=engine, recover=True)
+            drain(lexer)
+            with self.subTest(engine=engine):
+                self.assertEqual([token.severity for token in lexer.diagnostics], ['warning', 'error'])
+                self.assertEqual((lexer.error_count, lexer.warning_count), (1, 1))
+
+    def test_snapshot_restore(self):
+        for engine in Lexer.ENGINES:
+            lexer = Lexer("program var x = 1 @ 2;", engine=engine, recover=True)
+            lexer.get_next_token()
+            snapshot = lexer.snapshot()
+            first = drain(lexer)
+            lexer.restore(snapshot)
+            with self.subTest(engine=engine):
+                self.assertEqual(drain(lexer), first)
+                self.assertEqual(len(lexer.diagnostics), 1)
@@ -0,0 +1,94 @@
+"""
+structural_hash and the shared expression nodes of NodeFactory.
+"""
+import random
+import unittest
+from ..lexer import Lexer, LexicalError
+from ..parser import (AssignNode, IfNode, ParseError, Parser, PrintNode, WhileNode, postorder,
+                      structural_hash)
+from ..symbol_table import SymbolTable
+from ..token_buffer import TokenBuffer
+from .programs import expression, shape, texts
+
+HEADER = "program var a; b; c;\nprint(1);;\n"
+
+def parse(text: str, **options):
+    return Parser(TokenBuffer.from_lexer(Lexer(text, engine='regex', span_tokens=True)),
+                  SymbolTable(), **options).parse()
+
+def parse_expression(text: str):
+    """AST of `text` as the argument of print."""
+    return parse(f"{HEADER}print({text});")[-1].value
+
+def expressions(statements):
+    """Root of every expression in a list of statements."""
+    for node in statements:
+        if isinstance(node, AssignNode):
+            yield node.right
+        elif isinstance(node, PrintNode):
+            yield node.value
+        elif isinstance(node, IfNode):
+            yield node.condition
+            yield from expressions(node.then_body)
+            yield from expressions(node.else_body or [])
+        elif isinstance(node, WhileNode):
+            yield node.condition
+            yield from expressions(node.body)
+
+class StructuralHashTest(unittest.TestCase):
+
+    def test_equal_subtrees_hash_equally(self):
+        rng = random.Random(91)
+        for _ in range(200):
+            text = expression(rng)
+            with self.subTest(text=text):
+                # Two occurrences in different places, and a third parse
+                node = parse_expression(f"({text}) == \n  ({text})")
+                self.assertIsNot(node.left, node.right)
+                self.assertEqual(structural_hash(node.left), structural_hash(node.right))
+                self.assertEqual(structural_hash(parse_expression(text)), structural_hash(node.left))
+
+    def test_different_subtrees_hash_differently(self):
+        pairs = [
+            ("a + b", "a - b"), ("a * b", "a / b"), ("a < b", "a <= b"), ("a and b", "a or b"),
+            ("-a", "not a"), ("-a", "a"), ("a", "b"), ("1", "2"), ("1", "1.0"), ('"1"', "1"),
+            ("a + b", "b + a"), ("(a + b) * c", "a + b * c"), ("a - (b - c)", "a - b - c"),
+        ]
+        for first, second in pairs:
+            with self.subTest(first=first, second=second):
+                self.assertNotEqual(structural_hash(parse_expression(first)),
+                                    structural_hash(parse_expression(second)))
+
+    def test_memo_is_shared_across_an_ast(self):
+        statements = parse(f"{HEADER}print(a + b * c);;\nprint((a + b * c) - b * c);")
+        memo = {}
+        for node in expressions(statements):
+            self.assertEqual(structural_hash(node, memo), structural_hash(node))
+        self.assertEqual(len(memo), len({id(node) for root in expressions(statements) for node in postorder(root)}))
+
+class NodeFactoryTest(unittest.TestCase):
+
+    def test_same_ast_as_without_sharing(self):
+        for text in texts(seed=92, count=600, broken=0.2):
+            try:
+                plain = parse(text)
+                shared = parse(text, share_nodes=True)
+            except (LexicalError, ParseError):
+                continue
+            with self.subTest(text=text):
+                self.assertEqual(shape(shared), shape(plain))
+                self.assertEqual([structural_hash(node) for node in expressions(shared)],
+                                 [structural_hash(node) for node in expressions(plain)])
+                # Equal subexpressions are one node
+                nodes = {}
+                for root in expressions(shared):
+                    for node in postorder(root):
+                        self.assertIs(nodes.setdefault(shape(node), node), node)
+
+    def test_nodes_are_shared(self):
+        parser = Parser(TokenBuffer.from_lexer(Lexer(f"{HEADER}print((a + 1) * (a + 1));", engine='regex',
+                                                     span_tokens=True)), SymbolTable(), share_nodes=True)
+        node = parser.parse()[-1].value
+        self.assertIs(node.left, node.right)
+        # 1 (also printed by HEADER), a, a + 1 and the product
+        self.assertEqual(len(parser.node_factory), 4)
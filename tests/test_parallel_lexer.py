@@ -0,0 +1,47 @@
+"""
+lex_parallel gives the tokens, or the error, of a single sequential pass.
+"""
+import random
+import unittest
+from ..lexer import Lexer, LexicalError
+from ..parallel_lexer import lex_parallel
+from ..token_buffer import TokenBuffer
+from .programs import program, texts
+
+# Multi-line comments and strings whose inner lines look like code, so that
+# a chunk starting inside them lexes differently on its own
+COMMENT = '/* print(a);\n"x = 1;\n*/ y */\n'
+STRING = '"print(a);\n/* x\n;"\n'
+
+def lex(source):
+    """Token rows and EOF of a TokenBuffer built by `source`, or its error."""
+    try:
+        tokens = source()
+    except LexicalError as error:
+        return error.message, error.line, error.column
+    return ([(token.type, token.start, token.end, token.line, token.column, token.value) for token in tokens],
+            tokens.eof_offset, tokens.eof_line, tokens.eof_column)
+
+def spanning(rng: random.Random) -> str:
+    """A program with comments and strings that span several lines."""
+    lines = program(rng).split('\n')
+    for _ in range(rng.randint(1, 4)):
+        lines.insert(rng.randrange(len(lines) + 1), rng.choice([COMMENT, STRING]))
+    return '\n'.join(lines)
+
+class ParallelLexerTest(unittest.TestCase):
+
+    def test_matches_sequential_lexing(self):
+        rng = random.Random(61)
+        sources = list(texts(seed=61, count=150)) + [spanning(rng) for _ in range(150)]
+        for text in sources:
+            expected = lex(lambda: TokenBuffer.from_lexer(Lexer(text, engine='regex', span_tokens=True)))
+            for chunk_size in (1, 5, 16, 64):
+                with self.subTest(text=text, chunk_size=chunk_size):
+                    self.assertEqual(lex(lambda: lex_parallel(text, workers=1, chunk_size=chunk_size)), expected)
+
+    def test_process_pool(self):
+        rng = random.Random(62)
+        text = ''.join(spanning(rng) for _ in range(20))
+        expected = lex(lambda: TokenBuffer.from_lexer(Lexer(text, engine='regex', span_tokens=True)))
+        self.assertEqual(lex(lambda: lex_parallel(text, workers=2, chunk_size=64)), expected)
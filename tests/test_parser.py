@@ -0,0 +1,82 @@
+"""
+Parser gives the same results whatever its token source.
+"""
+import os
+import tempfile
+import unittest
+from ..lexer import Lexer, LexicalError, TokenType
+from ..parser import ParseError, Parser
+from ..symbol_table import SymbolTable
+from ..token_buffer import ReplayLexer, TokenBuffer, split_eof
+from .programs import shape, texts
+from .test_lexer_engines import drain
+
+def symbols(table: SymbolTable):
+    """Comparable contents of a symbol table."""
+    return sorted((name, symbol.value, symbol.expression, symbol.info.declared_line,
+                   symbol.info.last_modified_line, sorted(symbol.info.used_lines))
+                  for name, symbol in table.symbols.items())
+
+def parse(source, **options):
+    """AST and symbol table of a parse, or the position of its error."""
+    table = SymbolTable()
+    try:
+        return shape(Parser(source, table, **options).parse()), symbols(table)
+    except ParseError as error:
+        return error.message, error.line, error.column
+
+class TokenSourceTest(unittest.TestCase):
+
+    def test_sources_agree(self):
+        for text in texts(seed=31, count=800):
+            try:
+                tokens = TokenBuffer.from_lexer(Lexer(text, engine='regex', span_tokens=True))
+            except LexicalError:
+                continue
+            expected = parse(Lexer(text))
+            with self.subTest(text=text):
+                self.assertEqual(parse(Lexer(text, engine='regex', span_tokens=True)), expected)
+                self.assertEqual(parse(tokens), expected)
+                self.assertEqual(parse(list(tokens) + [split_eof(tokens)[1]]), expected)
+                self.assertEqual(parse(ReplayLexer(tokens)), expected)
+
+class PeekTest(unittest.TestCase):
+    TEXT = "program var a = 1;\nprint(a + 2)"
+
+    def sources(self):
+        tokens = TokenBuffer.from_lexer(Lexer(self.TEXT, engine='regex', span_tokens=True))
+        return {
+            'Lexer': Lexer(self.TEXT),
+            'TokenBuffer': tokens,
+            'list': list(tokens) + [split_eof(tokens)[1]],
+            'ReplayLexer': ReplayLexer(tokens),
+        }
+
+    def test_peek(self):
+        expected = [token[:4] for token in drain(Lexer(self.TEXT))]
+        for name, source in self.sources().items():
+            parser = Parser(source, SymbolTable())
+            with self.subTest(source=name):
+                for k in range(len(expected) + 3):
+                    token = parser.peek(k)
+                    self.assertEqual((token.type, token.value, token.line, token.column),
+                                     expected[min(k, len(expected) - 1)])
+                # Peeking does not move the parser
+                parser.advance()
+                token = parser.peek()
+                self.assertEqual((token.type, token.value), expected[2][:2])
+                self.assertEqual(parser.current_type, TokenType.VAR)
+
+    def test_peek_needs_snapshots(self):
+        directory = tempfile.mkdtemp()
+        path = os.path.join(directory, 'program.txt')
+        try:
+            with open(path, 'w', encoding='utf-8') as file:
+                file.write(self.TEXT)
+            with Lexer.from_path(path) as lexer:
+                parser = Parser(lexer, SymbolTable())
+                with self.assertRaises(TypeError):
+                    parser.peek()
+        finally:
+            os.unlink(path)
+            os.rmdir(directory)
@@ -0,0 +1,74 @@
+"""
+Panic-mode error recovery of Parser: every error is reported and the
+valid statements are kept.
+"""
+import unittest
+from ..lexer import Lexer, TokenType
+from ..parser import Parser
+from ..symbol_table import SymbolTable
+from .programs import shape
+
+A = ('name', 'a')
+ONE = ('literal', TokenType.INTEGER_CONST, 1)
+DECLARATION = ('assign', A, ONE)
+
+def recover(text: str):
+    """AST, syntax errors and lexical diagnostics of a recovering parse."""
+    lexer = Lexer(text, recover=True)
+    parser = Parser(lexer, SymbolTable(), recover=True)
+    ast = shape(parser.parse())
+    return (ast, [(error.line, error.column, error.message) for error in parser.errors],
+            [(diagnostic.line, diagnostic.column) for diagnostic in lexer.diagnostics])
+
+class RecoveryTest(unittest.TestCase):
+
+    def test_one_error(self):
+        ast, errors, diagnostics = recover("program var a = 1;\nprint(a + * 2);;\nprint(a);")
+        self.assertEqual(ast, [DECLARATION, None, ('print', A)])
+        self.assertEqual(errors, [(2, 11, "Expected TokenType.IDENTIFIER, got TokenType.MULTIPLY")])
+        self.assertEqual(diagnostics, [])
+
+    def test_several_errors(self):
+        ast, errors, _ = recover("program var a = 1;\nprint(a);;\na = * 2;\nif (a > 1 { a = 2; };\n"
+                                 "while (a < 3) { a = a + 1 };\nprint(a) print(a);;\nprint(b);;\na = a + 1")
+        increment = ('assign', A, ('binary', TokenType.PLUS, A, ONE))
+        self.assertEqual(ast, [
+            DECLARATION,
+            ('print', A),
+            None,
+            None,
+            ('while', ('binary', TokenType.LESS_THAN, A, ('literal', TokenType.INTEGER_CONST, 3)), [increment]),
+            None,
+            ('print', A),
+            None,
+            increment,
+        ])
+        self.assertEqual(errors, [
+            (3, 5, "Expected TokenType.IDENTIFIER, got TokenType.MULTIPLY"),
+            (4, 11, "Expected TokenType.RPAREN, got TokenType.LBRACE"),
+            (6, 10, "Expected TokenType.SEMICOLON, got TokenType.PRINT"),
+            (7, 7, "Variable 'b' not declared"),
+        ])
+
+    def test_error_inside_block(self):
+        ast, errors, _ = recover("program var a = 1;\nif (a) { print(a; a = 3 };\nprint(a);")
+        self.assertEqual(ast, [DECLARATION, ('if', A, [None, ('assign', A, ('literal', TokenType.INTEGER_CONST, 3))], None),
+                               ('print', A)])
+        self.assertEqual(errors, [(2, 17, "Expected TokenType.RPAREN, got TokenType.SEMICOLON")])
+
+    def test_lexical_errors(self):
+        # A statement that ends with its ';' or '}' before the error is kept;
+        # one the error cuts short is not
+        ast, errors, diagnostics = recover("program var a = 1;\nprint(a); @ ;\nprint(a + 1); $ a = 2;\n"
+                                           "while (a) { print(a); # };\na = 1 @ 2;\na = 3")
+        self.assertEqual(ast, [
+            DECLARATION,
+            ('print', A),
+            ('print', ('binary', TokenType.PLUS, A, ONE)),
+            ('while', A, [('print', A)]),
+            None,
+            ('assign', A, ('literal', TokenType.INTEGER_CONST, 3)),
+        ])
+        # Lexical errors are reported by the lexer only
+        self.assertEqual(errors, [])
+        self.assertEqual(diagnostics, [(2, 11), (3, 15), (4, 23), (5, 7)])
@@ -0,0 +1,77 @@
+"""
+The symbol table filled after a syntax-only parse is the one Parser fills
+as it parses, with shared nodes or not.
+"""
+import unittest
+from ..lexer import Lexer, LexicalError
+from ..parser import ParseError, Parser
+from ..symbol_pass import SymbolTableBuilder
+from ..symbol_table import SymbolTable
+from ..token_buffer import TokenBuffer
+from .programs import shape, texts
+from .test_parser import symbols
+
+def inline(tokens, **options):
+    table = SymbolTable()
+    try:
+        return shape(Parser(tokens, table, **options).parse()), symbols(table)
+    except ParseError as error:
+        return error.message, error.line, error.column
+
+def filled(tokens):
+    table = SymbolTable()
+    parser = Parser(tokens, None, syntax_only=True)
+    try:
+        ast = parser.parse()
+        SymbolTableBuilder(table).fill(ast, parser.declaration_count)
+        return shape(ast), symbols(table)
+    except ParseError as error:
+        return error.message, error.line, error.column
+
+class FillTest(unittest.TestCase):
+
+    def test_fill_matches_inline_table(self):
+        # Tokens on one line per statement, where the line of the '=' that
+        # Parser records is the line of the target that fill() records
+        for text in texts(seed=51, count=800):
+            try:
+                tokens = TokenBuffer.from_lexer(Lexer(text, engine='regex', span_tokens=True))
+            except LexicalError:
+                continue
+            expected = inline(tokens)
+            with self.subTest(text=text):
+                self.assertEqual(inline(tokens, share_nodes=True), expected)
+                if len(expected) == 2:
+                    self.assertEqual(filled(tokens), expected)
+
+    def test_shared_nodes_are_rejected(self):
+        text = "program var a = 1; b = 2;\nb = a + 1;\nprint(a + 1);"
+        tokens = TokenBuffer.from_lexer(Lexer(text, engine='regex', span_tokens=True))
+        parser = Parser(tokens, SymbolTable(), share_nodes=True)
+        ast = parser.parse()
+        with self.assertRaises(ValueError):
+            SymbolTableBuilder(SymbolTable()).fill(ast, parser.declaration_count)
+        with self.assertRaises(ValueError):
+            Parser(tokens, None, syntax_only=True, share_nodes=True)
+        with self.assertRaises(ValueError):
+            Parser(tokens, SymbolTable(), share_nodes=True).parse_arena()
+
+class AssignTest(unittest.TestCase):
+    TEXT = "program var x; y = 2; z; w;\nprint(1);;\nx = -5;\nz = -(2 * y);\nw = not y;"
+
+    def check(self, table: SymbolTable):
+        values = {name: (symbol.value, symbol.expression, symbol.info.last_modified_line)
+                  for name, symbol in table.symbols.items()}
+        self.assertEqual(values['x'], (-5, "(-5)", 3))
+        self.assertEqual(values['z'], (-4, "(-(2 * y))", 4))
+        self.assertEqual(values['w'], (None, "(not y)", 5))
+
+    def test_prefix_operator_values(self):
+        tokens = TokenBuffer.from_lexer(Lexer(self.TEXT, engine='regex', span_tokens=True))
+        table = SymbolTable()
+        Parser(tokens, table).parse()
+        self.check(table)
+        table = SymbolTable()
+        parser = Parser(tokens, None, syntax_only=True)
+        SymbolTableBuilder(table).fill(parser.parse(), parser.declaration_count)
+        self.check(table)
@@ -0,0 +1,79 @@
+"""
+TokenCache hits return the stream that was stored, and damaged entries are misses.
+"""
+import marshal
+import os
+import struct
+import tempfile
+import unittest
+from ..lexer import Lexer
+from ..token_buffer import TokenBuffer
+from ..token_cache import TokenCache, _HEADER
+from .programs import texts
+
+def rows(buffer: TokenBuffer):
+    return ([(token.type, token.value, token.line, token.column, token.error_message) for token in buffer],
+            buffer.eof_offset, buffer.eof_line)
+
+class TokenCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.cache = TokenCache(self.directory.name)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_hit_returns_stored_stream(self):
+        for text in texts(seed=61, count=200):
+            recover = len(text) % 2 == 0
+            expected = rows(TokenBuffer.from_lexer(Lexer(text, engine='regex', span_tokens=True, recover=True)))
+            if not recover:
+                try:
+                    expected = rows(TokenBuffer.from_lexer(Lexer(text, engine='regex', span_tokens=True)))
+                except Exception:
+                    continue
+            self.cache.lex(text, recover)
+            with self.subTest(text=text):
+                self.assertEqual(rows(self.cache.get(text, recover)), expected)
+
+    def damage(self, text: str, change):
+        """Store `text`, rewrite its entry with change(data), then read it back."""
+        self.cache.lex(text)
+        path = self.cache._path(text, False)
+        with open(path, 'rb') as file:
+            data = file.read()
+        with open(path, 'wb') as file:
+            file.write(change(data))
+        return self.cache.get(text)
+
+    def test_damaged_entries_are_misses(self):
+        text = 'program var a = "x"; b = 2;\nprint(a + b);'
+        metadata = _HEADER.size + 5 * 4 * len(TokenBuffer.from_lexer(Lexer(text, engine='regex', span_tokens=True)))
+
+        def with_metadata(replacement: bytes):
+            def change(data):
+                header = list(_HEADER.unpack_from(data))
+                header[-1] = len(replacement)
+                return _HEADER.pack(*header) + data[_HEADER.size:metadata] + replacement
+            return change
+
+        cases = {
+            'truncated': lambda data: data[:-1],
+            'metadata type code': lambda data: data[:metadata] + b'\xff' + data[metadata + 1:],
+            # A tuple of a str whose bytes are not UTF-8 and an empty dict
+            'metadata encoding': with_metadata(b')\x02u' + struct.pack('<i', 1) + b'\xff{0'),
+            'metadata shape': with_metadata(marshal.dumps((1, 2, 3))),
+            'metadata values': with_metadata(marshal.dumps(([[1]], {}))),
+            'value id': lambda data: data[:metadata - 4] + struct.pack('<i', 1000) + data[metadata:],
+        }
+        for name, change in cases.items():
+            with self.subTest(case=name):
+                self.assertIsNone(self.damage(text, change))
+                self.assertEqual(rows(self.cache.lex(text)),
+                                 rows(TokenBuffer.from_lexer(Lexer(text, engine='regex', span_tokens=True))))
+
+    def test_eviction(self):
+        self.cache.max_bytes = 0
+        self.cache.lex("program print(1);")
+        self.assertEqual(os.listdir(self.directory.name), [])
@@ -0,0 +1,30 @@
+"""
+With trivia=True the lexemes of all tokens reproduce the source exactly.
+"""
+import unittest
+from ..lexer import Lexer, TokenType
+from .programs import texts
+
+def lexemes(text: str):
+    """Tokens before EOF of a recovering lexer with trivia."""
+    lexer = Lexer(text, engine='regex', span_tokens=True, recover=True, trivia=True)
+    tokens = []
+    token = lexer.get_next_token()
+    while token.type != TokenType.EOF:
+        tokens.append(token)
+        token = lexer.get_next_token()
+    return tokens
+
+class TriviaTest(unittest.TestCase):
+
+    def test_lexemes_reproduce_source(self):
+        errors = unterminated = 0
+        for text in list(texts(seed=41, count=800)) + ["a /* open", 'print("open\n', "a @ b  \n", "1.2.3 ñ"]:
+            tokens = lexemes(text)
+            with self.subTest(text=text):
+                self.assertEqual(''.join(token.text for token in tokens), text)
+            errors += any(token.type == TokenType.ERROR for token in tokens)
+            unterminated += any(token.type == TokenType.ERROR and token.text.startswith('/*') for token in tokens)
+        # The sources cover error tokens and unterminated comments
+        self.assertGreater(errors, 50)
+        self.assertGreater(unterminated, 5)
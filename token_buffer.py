@@ -0,0 +1,228 @@
+"""
+Compact struct-of-arrays storage for token streams.
+"""
+from array import array
+from bisect import bisect_left
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple, Union
+from .lexer import Lexer, Token, TokenType
+from .line_index import LineIndex
+
+_TOKEN_TYPES = {token_type.value: token_type for token_type in TokenType}
+
+class TokenView:
+    """Lightweight view of one token stored in a TokenBuffer."""
+    __slots__ = ('buffer', 'index')
+
+    def __init__(self, buffer: 'TokenBuffer', index: int):
+        self.buffer = buffer
+        self.index = index
+
+    @property
+    def type(self) -> TokenType:
+        return _TOKEN_TYPES[self.buffer.types[self.index]]
+
+    @property
+    def value(self):
+        return self.buffer.values[self.buffer.value_ids[self.index]]
+
+    @property
+    def line(self) -> int:
+        return self.buffer.lines[self.index]
+
+    @property
+    def column(self) -> int:
+        return self.buffer.column(self.index)
+
+    @property
+    def start(self) -> int:
+        return self.buffer.starts[self.index]
+
+    @property
+    def end(self) -> int:
+        return self.buffer.starts[self.index] + self.buffer.lengths[self.index]
+
+    @property
+    def error_message(self) -> Optional[str]:
+        return self.buffer.error_messages.get(self.index)
+
+    def __str__(self) -> str:
+        if self.error_message:
+            return f"Token({self.type.to_spanish()}, '{self.value}', línea={self.line}, columna={self.column}, error='{self.error_message}')"
+        return f"Token({self.type.to_spanish()}, '{self.value}', línea={self.line}, columna={self.column})"
+
+class TokenBuffer:
+    """Token stream stored as parallel array('i') columns.
+
+    Each token costs five machine integers (type, start offset, length,
+    line and value id) instead of a Token instance. Values are interned in
+    a side table shared by every occurrence. EOF is not stored; its
+    position is kept in eof_offset/eof_line so readers can synthesize it.
+    """
+
+    def __init__(self, text: str = ""):
+        self.text = text
+        self.types = array('i')
+        self.starts = array('i')
+        self.lengths = array('i')
+        self.lines = array('i')
+        self.value_ids = array('i')
+        self.values: List = []
+        self.error_messages: Dict[int, str] = {}
+        self.eof_offset = len(text)
+        self.eof_line = text.count('\n') + 1
+        self._value_ids: Dict = {}
+        self._line_index: Optional[LineIndex] = None
+
+    @classmethod
+    def from_lexer(cls, lexer: Lexer) -> 'TokenBuffer':
+        """Drain a span-mode lexer into a new buffer."""
+        if not lexer.span_tokens:
+            raise ValueError("TokenBuffer.from_lexer requires a lexer with span_tokens=True")
+        buffer = cls(lexer.text)
+        token = lexer.get_next_token()
+        while token.type != TokenType.EOF:
+            # After returning a token the lexer sits on that token's line
+            buffer.append(token.type, token.start, token.end - token.start,
+                          lexer.line, token.value, token.error_message)
+            token = lexer.get_next_token()
+        buffer.eof_offset = token.start
+        buffer.eof_line = lexer.line
+        return buffer
+
+    def append(self, token_type: TokenType, start: int, length: int, line: int,
+               value=None, error_message: Optional[str] = None):
+        """Append a token, interning its value."""
+        if error_message:
+            self.error_messages[len(self.types)] = error_message
+        self.types.append(token_type.value)
+        self.starts.append(start)
+        self.lengths.append(length)
+        self.lines.append(line)
+        self.value_ids.append(self._intern(value))
+
+    def extend(self, other: 'TokenBuffer', first: int = 0):
+        """Append other[first:] in bulk, re-interning its value table."""
+        mapping = [self._intern(value) for value in other.values]
+        base = len(self.types) - first
+        self.error_messages.update((base + index, message)
+                                   for index, message in other.error_messages.items()
+                                   if index >= first)
+        self.types.extend(other.types[first:])
+        self.starts.extend(other.starts[first:])
+        self.lengths.extend(other.lengths[first:])
+        self.lines.extend(other.lines[first:])
+        self.value_ids.extend(array('i', map(mapping.__getitem__, other.value_ids[first:])))
+
+    def find(self, start: int, length: int, token_type: TokenType) -> Optional[int]:
+        """Index of the token with exactly this offset, length and type, if any."""
+        index = bisect_left(self.starts, start)
+        if (index < len(self.types) and self.starts[index] == start
+                and self.lengths[index] == length and self.types[index] == token_type.value):
+            return index
+        return None
+
+    def _intern(self, value) -> int:
+        """Id of `value` in the value table, adding it if needed."""
+        # Keyed by type too, so that 1, 1.0 and True stay distinct
+        key = (type(value), value)
+        value_id = self._value_ids.get(key)
+        if value_id is None:
+            value_id = self._value_ids[key] = len(self.values)
+            self.values.append(value)
+        return value_id
+
+    @property
+    def line_index(self) -> LineIndex:
+        """Line starts of the text, built on first use."""
+        if self._line_index is None:
+            self._line_index = LineIndex(self.text)
+        return self._line_index
+
+    def column(self, index: int) -> int:
+        """Column of a token, derived from its offset."""
+        return self.line_index.column_of(self.starts[index])
+
+    @property
+    def eof_column(self) -> int:
+        return self.line_index.column_of(self.eof_offset)
+
+    def __len__(self) -> int:
+        return len(self.types)
+
+    def __getitem__(self, key: Union[int, slice]) -> Union[TokenView, 'TokenBuffer']:
+        if isinstance(key, slice):
+            return self._slice(key)
+        if key < 0:
+            key += len(self.types)
+        if not 0 <= key < len(self.types):
+            raise IndexError("TokenBuffer index out of range")
+        return TokenView(self, key)
+
+    def __iter__(self) -> Iterator[TokenView]:
+        for index in range(len(self.types)):
+            yield TokenView(self, index)
+
+    def _slice(self, key: slice) -> 'TokenBuffer':
+        """Copy the selected rows; the value table is shared, not copied."""
+        result = TokenBuffer.__new__(TokenBuffer)
+        result.text = self.text
+        result.types = self.types[key]
+        result.starts = self.starts[key]
+        result.lengths = self.lengths[key]
+        result.lines = self.lines[key]
+        result.value_ids = self.value_ids[key]
+        result.values = self.values
+        result._value_ids = self._value_ids
+        result._line_index = self._line_index
+        indices = range(*key.indices(len(self.types)))
+        result.error_messages = {new: self.error_messages[old]
+                                 for new, old in enumerate(indices)
+                                 if old in self.error_messages}
+        result.eof_offset = self.eof_offset
+        result.eof_line = self.eof_line
+        return result
+
+    def reader(self) -> 'ReplayLexer':
+        """Return an object with the Lexer.get_next_token() interface over this buffer."""
+        return ReplayLexer(self)
+
+def split_eof(tokens: Union[TokenBuffer, Sequence[Token]]) -> Tuple[int, Token]:
+    """Number of tokens before EOF in a token array, and its EOF token.
+
+    A TokenBuffer does not store EOF; a list may end with it or not, and
+    without one it gets an EOF at the position of its last token.
+    """
+    if isinstance(tokens, TokenBuffer):
+        return len(tokens), Token(TokenType.EOF, None, tokens.eof_line, tokens.eof_column)
+    if tokens and tokens[-1].type == TokenType.EOF:
+        return len(tokens) - 1, tokens[-1]
+    if tokens:
+        return len(tokens), Token(TokenType.EOF, None, tokens[-1].line, tokens[-1].column)
+    return 0, Token(TokenType.EOF, None, 1, 1)
+
+class ReplayLexer:
+    """Feeds already lexed tokens through the Lexer.get_next_token() interface.
+
+    `tokens` is a TokenBuffer or a list of tokens, with or without its final
+    EOF token. Once the tokens are exhausted every call returns EOF; a list
+    without one gets an EOF at the position of its last token. The state is
+    a single index, so snapshot() and restore() cost nothing.
+    """
+
+    def __init__(self, tokens: Union[TokenBuffer, Sequence[Token]]):
+        self.tokens = tokens
+        self.index = 0
+        self.count, self.eof = split_eof(tokens)
+
+    def get_next_token(self):
+        if self.index < self.count:
+            token = self.tokens[self.index]
+            self.index += 1
+            return token
+        return self.eof
+
+    def snapshot(self) -> int:
+        return self.index
+
+    def restore(self, snapshot: int):
+        self.index = snapshot
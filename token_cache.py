@@ -0,0 +1,199 @@
+"""
+Persistent on-disk cache of token streams, keyed by source content.
+"""
+import hashlib
+import marshal
+import mmap
+import os
+import struct
+import tempfile
+from typing import Optional
+from .lexer import Lexer, TokenType
+from .token_buffer import TokenBuffer
+from .token_spec import TOKEN_SPECS
+
+_MAGIC = b'TOKCACHE'
+_FORMAT_VERSION = 1
+
+# Magic, version key, token count, EOF offset, EOF line, metadata length
+_HEADER = struct.Struct('<8s16sqqqq')
+
+_COLUMNS = ('types', 'starts', 'lengths', 'lines', 'value_ids')
+
+def _version_key() -> bytes:
+    """Digest of everything a cached stream depends on besides the source.
+
+    Token types are stored by value, so any change to TokenType (a member
+    added, removed or reordered) yields a new key and old entries are
+    simply never read again. So does a change to how tokens are written in
+    the token specification, which changes how a text is lexed.
+    """
+    description = repr((_FORMAT_VERSION, [(token_type.name, token_type.value) for token_type in TokenType],
+                        [(spec.type.name, spec.lexeme, spec.pattern) for spec in TOKEN_SPECS]))
+    return hashlib.blake2b(description.encode('utf-8'), digest_size=16).digest()
+
+VERSION_KEY = _version_key()
+
+def default_cache_directory() -> str:
+    return os.path.join(os.path.expanduser('~'), '.cache', 'mini-compiler', 'tokens')
+
+class TokenCache:
+    """Cache of TokenBuffer streams under a directory, bounded in size.
+
+    Entries are named after a blake2b hash of the source, the lexer options
+    and VERSION_KEY. A hit maps the file and the buffer's columns are
+    read-only views of the mapping, so nothing is relexed or copied (and
+    nothing can be appended to a buffer loaded from the cache). Every
+    hit refreshes the entry's modification time, and stores evict the
+    least recently used entries once the directory exceeds `max_bytes`.
+    """
+
+    def __init__(self, directory: Optional[str] = None, max_bytes: int = 256 * 1024 * 1024):
+        self.directory = directory or default_cache_directory()
+        self.max_bytes = max_bytes
+        os.makedirs(self.directory, exist_ok=True)
+
+    def lex(self, text: str, recover: bool = False) -> TokenBuffer:
+        """Token stream of `text`, from the cache if possible."""
+        buffer = self.get(text, recover)
+        if buffer is None:
+            lexer = Lexer(text, engine='regex', span_tokens=True, recover=recover)
+            buffer = TokenBuffer.from_lexer(lexer)
+            self.put(text, buffer, recover)
+        return buffer
+
+    def _path(self, text: str, recover: bool) -> str:
+        digest = hashlib.blake2b(VERSION_KEY, digest_size=20)
+        digest.update(b'recover' if recover else b'strict')
+        digest.update(text.encode('utf-8', 'surrogatepass'))
+        return os.path.join(self.directory, digest.hexdigest() + '.tokens')
+
+    def get(self, text: str, recover: bool = False) -> Optional[TokenBuffer]:
+        """Cached stream of `text`, or None on a miss."""
+        path = self._path(text, recover)
+        try:
+            with open(path, 'rb') as file:
+                mapping = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return None
+        buffer = _load(mapping, text)
+        if buffer is None:
+            mapping.close()
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return buffer
+
+    def put(self, text: str, buffer: TokenBuffer, recover: bool = False):
+        """Store the stream of `text`, then evict old entries if needed."""
+        data = _dump(buffer)
+        path = self._path(text, recover)
+        # Written under a temporary name so readers never see a partial file
+        fd, temporary = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as file:
+                file.write(data)
+            os.replace(temporary, path)
+        except OSError:
+            try:
+                os.unlink(temporary)
+            except OSError:
+                pass
+            return
+        self.evict()
+
+    def evict(self):
+        """Delete least recently used entries until the cache fits in max_bytes."""
+        entries = []
+        total = 0
+        with os.scandir(self.directory) as scan:
+            for entry in scan:
+                if not entry.name.endswith('.tokens'):
+                    continue
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+                total += stat.st_size
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.unlink(path)
+            except OSError:
+                continue
+            total -= size
+
+    def clear(self):
+        """Delete every entry."""
+        with os.scandir(self.directory) as scan:
+            for entry in scan:
+                if entry.name.endswith('.tokens'):
+                    try:
+                        os.unlink(entry.path)
+                    except OSError:
+                        pass
+
+def _dump(buffer: TokenBuffer) -> bytes:
+    """Binary form: header, the int32 columns, then the marshalled side tables."""
+    metadata = marshal.dumps((buffer.values, buffer.error_messages))
+    parts = [_HEADER.pack(_MAGIC, VERSION_KEY, len(buffer), buffer.eof_offset,
+                          buffer.eof_line, len(metadata))]
+    for name in _COLUMNS:
+        column = getattr(buffer, name)
+        if column.itemsize != 4:
+            raise ValueError("Token columns must be 32-bit to be cached")
+        parts.append(column.tobytes())
+    parts.append(metadata)
+    return b''.join(parts)
+
+def _load(mapping: mmap.mmap, text: str) -> Optional[TokenBuffer]:
+    """TokenBuffer whose columns are views of `mapping`, or None if it is
+    stale or corrupt."""
+    # Nothing is kept from the mapping until it is known to be valid, so
+    # that get() can still close it when this returns None
+    if len(mapping) < _HEADER.size:
+        return None
+    magic, version, count, eof_offset, eof_line, metadata_length = _HEADER.unpack_from(mapping)
+    column_bytes = 4 * count
+    end = _HEADER.size + len(_COLUMNS) * column_bytes + metadata_length
+    if (magic != _MAGIC or version != VERSION_KEY or count < 0 or metadata_length < 0
+            or len(mapping) != end):
+        return None
+    offset = end - metadata_length
+    try:
+        values, error_messages = marshal.loads(mapping[offset:end])
+        value_ids = {(type(value), value): index for index, value in enumerate(values)}
+    except (EOFError, TypeError, ValueError, UnicodeDecodeError):
+        return None
+    if not isinstance(values, list) or not isinstance(error_messages, dict):
+        return None
+
+    columns = []
+    view = memoryview(mapping)
+    offset = _HEADER.size
+    for _ in _COLUMNS:
+        columns.append(view[offset:offset + column_bytes].cast('i'))
+        offset += column_bytes
+    ids = columns[-1]
+    if count and (min(ids) < 0 or max(ids) >= len(values)):
+        for column in columns:
+            column.release()
+        view.release()
+        return None
+
+    buffer = TokenBuffer.__new__(TokenBuffer)
+    buffer.text = text
+    for name, column in zip(_COLUMNS, columns):
+        setattr(buffer, name, column)
+    buffer.values = values
+    buffer.error_messages = error_messages
+    buffer._value_ids = value_ids
+    buffer._line_index = None
+    buffer.eof_offset = eof_offset
+    buffer.eof_line = eof_line
+    return buffer
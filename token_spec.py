@@ -0,0 +1,191 @@
+"""
+Declarative specification of the tokens of the language.
+
+One row per token type holds how it is written, its Spanish name, its
+category in the token viewer and its colour in the editor. The keyword
+and operator tables of Lexer, the UI tables and the generated lexer (see
+lexer_generator) are all derived from it. TokenType is defined here, so
+that lexer can import the specification; it is also exported by lexer.
+"""
+from dataclasses import dataclass
+from enum import Enum, auto
+from typing import Dict, List, Optional, Tuple
+
+class TokenType(Enum):
+    # Keywords
+    PROGRAM = auto()
+    VAR = auto()
+    INT = auto()
+    FLOAT = auto()
+    STRING = auto()
+    IF = auto()
+    ELSE = auto()
+    WHILE = auto()
+    FOR = auto()
+    DO = auto()
+    FUNCTION = auto()
+    RETURN = auto()
+    PRINT = auto()
+    
+    # Data types
+    INTEGER_CONST = auto()
+    FLOAT_CONST = auto()
+    STRING_LITERAL = auto()
+    BOOL = auto()
+    
+    # Operators
+    PLUS = auto()
+    MINUS = auto()
+    MULTIPLY = auto()
+    DIVIDE = auto()
+    MODULO = auto()
+    ASSIGN = auto()
+    
+    # Comparison
+    EQUALS = auto()
+    NOT_EQUALS = auto()
+    LESS_THAN = auto()
+    GREATER_THAN = auto()
+    LESS_EQUALS = auto()
+    GREATER_EQUALS = auto()
+    
+    # Logical operators
+    AND = auto()
+    OR = auto()
+    NOT = auto()
+    
+    # Delimiters
+    LPAREN = auto()
+    RPAREN = auto()
+    LBRACE = auto()
+    RBRACE = auto()
+    LBRACKET = auto()
+    RBRACKET = auto()
+    SEMICOLON = auto()
+    COMMA = auto()
+    DOT = auto()
+    COLON = auto()
+    
+    # Others
+    IDENTIFIER = auto()
+    COMMENT = auto()
+    EOF = auto()
+    ERROR = auto()
+    TRUE = auto()
+    FALSE = auto()
+    WHITESPACE = auto()
+
+    def to_spanish(self) -> str:
+        """Convert token type to Spanish label."""
+        return SPANISH_NAMES.get(self, str(self))
+
+@dataclass(frozen=True)
+class TokenSpec:
+    """How one token type is written, named and shown."""
+    type: TokenType
+    spanish: str
+    category: str
+    lexeme: Optional[str] = None   # Fixed spelling of keywords, operators and delimiters
+    pattern: Optional[str] = None  # Regular expression of variable-spelling tokens
+    color: Optional[str] = None    # Editor colour, as a flet colour name
+
+# Token viewer categories, in display order
+KEYWORD = "Palabras Clave"
+DATA = "Tipos de Datos"
+OPERATOR = "Operadores"
+COMPARISON = "Comparación"
+LOGICAL = "Lógicos"
+DELIMITER = "Delimitadores"
+OTHER = "Otros"
+
+TOKEN_SPECS: Tuple[TokenSpec, ...] = (
+    # Keywords
+    TokenSpec(TokenType.PROGRAM, "PROGRAMA", KEYWORD, lexeme='program', color='blue'),
+    TokenSpec(TokenType.VAR, "VARIABLE", KEYWORD, lexeme='var', color='blue'),
+    TokenSpec(TokenType.INT, "ENTERO", KEYWORD, lexeme='int', color='teal'),
+    TokenSpec(TokenType.FLOAT, "REAL", KEYWORD, lexeme='float', color='teal'),
+    TokenSpec(TokenType.STRING, "CADENA", KEYWORD, lexeme='string', color='teal'),
+    TokenSpec(TokenType.IF, "SI", KEYWORD, lexeme='if', color='blue'),
+    TokenSpec(TokenType.ELSE, "SINO", KEYWORD, lexeme='else', color='blue'),
+    TokenSpec(TokenType.WHILE, "MIENTRAS", KEYWORD, lexeme='while', color='blue'),
+    TokenSpec(TokenType.FOR, "PARA", KEYWORD, lexeme='for', color='blue'),
+    TokenSpec(TokenType.DO, "HACER", KEYWORD, lexeme='do', color='blue'),
+    TokenSpec(TokenType.FUNCTION, "FUNCION", KEYWORD, lexeme='function', color='blue'),
+    TokenSpec(TokenType.RETURN, "RETORNAR", KEYWORD, lexeme='return', color='blue'),
+    TokenSpec(TokenType.PRINT, "IMPRIMIR", KEYWORD, lexeme='print'),
+
+    # Data types
+    TokenSpec(TokenType.INTEGER_CONST, "CONSTANTE_ENTERA", DATA, pattern=r'\d+', color='orange'),
+    TokenSpec(TokenType.FLOAT_CONST, "CONSTANTE_REAL", DATA, pattern=r'\d+\.\d*', color='orange'),
+    TokenSpec(TokenType.STRING_LITERAL, "CADENA_LITERAL", DATA,
+              pattern=r'"(?:[^"\\]|\\[ntr"\\])*"', color='green'),
+    TokenSpec(TokenType.BOOL, "BOOLEANO", DATA, color='teal'),
+
+    # Operators
+    TokenSpec(TokenType.PLUS, "SUMA", OPERATOR, lexeme='+', color='red'),
+    TokenSpec(TokenType.MINUS, "RESTA", OPERATOR, lexeme='-', color='red'),
+    TokenSpec(TokenType.MULTIPLY, "MULTIPLICACION", OPERATOR, lexeme='*', color='red'),
+    TokenSpec(TokenType.DIVIDE, "DIVISION", OPERATOR, lexeme='/', color='red'),
+    TokenSpec(TokenType.MODULO, "MODULO", OPERATOR, lexeme='%', color='red'),
+    TokenSpec(TokenType.ASSIGN, "ASIGNACION", OPERATOR, lexeme='=', color='red'),
+
+    # Comparison
+    TokenSpec(TokenType.EQUALS, "IGUAL", COMPARISON, lexeme='==', color='red'),
+    TokenSpec(TokenType.NOT_EQUALS, "DIFERENTE", COMPARISON, lexeme='!=', color='red'),
+    TokenSpec(TokenType.LESS_THAN, "MENOR_QUE", COMPARISON, lexeme='<', color='red'),
+    TokenSpec(TokenType.GREATER_THAN, "MAYOR_QUE", COMPARISON, lexeme='>', color='red'),
+    TokenSpec(TokenType.LESS_EQUALS, "MENOR_IGUAL", COMPARISON, lexeme='<=', color='red'),
+    TokenSpec(TokenType.GREATER_EQUALS, "MAYOR_IGUAL", COMPARISON, lexeme='>=', color='red'),
+
+    # Logical operators
+    TokenSpec(TokenType.AND, "Y", LOGICAL, lexeme='and', color='blue'),
+    TokenSpec(TokenType.OR, "O", LOGICAL, lexeme='or', color='blue'),
+    TokenSpec(TokenType.NOT, "NO", LOGICAL, lexeme='not', color='blue'),
+
+    # Delimiters
+    TokenSpec(TokenType.LPAREN, "PARENTESIS_IZQ", DELIMITER, lexeme='(', color='grey'),
+    TokenSpec(TokenType.RPAREN, "PARENTESIS_DER", DELIMITER, lexeme=')', color='grey'),
+    TokenSpec(TokenType.LBRACE, "LLAVE_IZQ", DELIMITER, lexeme='{', color='grey'),
+    TokenSpec(TokenType.RBRACE, "LLAVE_DER", DELIMITER, lexeme='}', color='grey'),
+    TokenSpec(TokenType.LBRACKET, "CORCHETE_IZQ", DELIMITER, lexeme='[', color='grey'),
+    TokenSpec(TokenType.RBRACKET, "CORCHETE_DER", DELIMITER, lexeme=']', color='grey'),
+    TokenSpec(TokenType.SEMICOLON, "PUNTO_COMA", DELIMITER, lexeme=';', color='grey'),
+    TokenSpec(TokenType.COMMA, "COMA", DELIMITER, lexeme=',', color='grey'),
+    TokenSpec(TokenType.DOT, "PUNTO", DELIMITER, lexeme='.', color='grey'),
+    TokenSpec(TokenType.COLON, "DOS_PUNTOS", DELIMITER, lexeme=':', color='grey'),
+
+    # Others
+    TokenSpec(TokenType.IDENTIFIER, "IDENTIFICADOR", OTHER, pattern=r'[^\W\d]\w*', color='white'),
+    TokenSpec(TokenType.COMMENT, "COMENTARIO", OTHER,
+              pattern=r'//[^\n]*|/\*(?s:.*?)\*/', color='green400'),
+    TokenSpec(TokenType.EOF, "FIN_ARCHIVO", OTHER),
+    TokenSpec(TokenType.ERROR, "ERROR", OTHER, color='red400'),
+    TokenSpec(TokenType.TRUE, "VERDADERO", DATA, lexeme='true', color='purple'),
+    TokenSpec(TokenType.FALSE, "FALSO", DATA, lexeme='false', color='purple'),
+    TokenSpec(TokenType.WHITESPACE, "ESPACIO", OTHER, pattern=r'\s+'),
+)
+
+SPECS_BY_TYPE: Dict[TokenType, TokenSpec] = {spec.type: spec for spec in TOKEN_SPECS}
+
+SPANISH_NAMES: Dict[TokenType, str] = {spec.type: spec.spanish for spec in TOKEN_SPECS}
+
+COLORS: Dict[TokenType, str] = {spec.type: spec.color for spec in TOKEN_SPECS if spec.color}
+
+# Keywords are the fixed lexemes spelled like identifiers; they are matched
+# without regard to case
+KEYWORDS: Dict[str, TokenType] = {spec.lexeme: spec.type for spec in TOKEN_SPECS
+                                  if spec.lexeme and spec.lexeme.isidentifier()}
+
+# Operators and delimiters
+SYMBOLS: Dict[str, TokenType] = {spec.lexeme: spec.type for spec in TOKEN_SPECS
+                                 if spec.lexeme and not spec.lexeme.isidentifier()}
+
+def _categories() -> Dict[str, List[TokenType]]:
+    categories: Dict[str, List[TokenType]] = {
+        category: [] for category in (KEYWORD, DATA, OPERATOR, COMPARISON, LOGICAL, DELIMITER, OTHER)
+    }
+    for spec in TOKEN_SPECS:
+        categories[spec.category].append(spec.type)
+    return categories
+
+CATEGORIES: Dict[str, List[TokenType]] = _categories()
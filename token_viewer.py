@@ -2,40 +2,14 @@
 Token viewer component for displaying lexical analysis results.
 """
 import flet as ft
+from typing import Union
 from compiler.lexer import Token, TokenType
+from compiler.token_buffer import TokenBuffer
+from compiler.token_spec import CATEGORIES
 
 class TokenViewer:
-    TOKEN_CATEGORIES = {
-        "Palabras Clave": [
-            TokenType.PROGRAM, TokenType.VAR, TokenType.INT, TokenType.FLOAT,
-            TokenType.STRING, TokenType.IF, TokenType.ELSE, TokenType.WHILE,
-            TokenType.FOR, TokenType.DO, TokenType.FUNCTION, TokenType.RETURN,
-            TokenType.PRINT
-        ],
-        "Tipos de Datos": [
-            TokenType.INTEGER_CONST, TokenType.FLOAT_CONST, TokenType.STRING_LITERAL,
-            TokenType.BOOL, TokenType.TRUE, TokenType.FALSE
-        ],
-        "Operadores": [
-            TokenType.PLUS, TokenType.MINUS, TokenType.MULTIPLY, TokenType.DIVIDE,
-            TokenType.MODULO, TokenType.ASSIGN
-        ],
-        "Comparación": [
-            TokenType.EQUALS, TokenType.NOT_EQUALS, TokenType.LESS_THAN,
-            TokenType.GREATER_THAN, TokenType.LESS_EQUALS, TokenType.GREATER_EQUALS
-        ],
-        "Lógicos": [
-            TokenType.AND, TokenType.OR, TokenType.NOT
-        ],
-        "Delimitadores": [
-            TokenType.LPAREN, TokenType.RPAREN, TokenType.LBRACE, TokenType.RBRACE,
-            TokenType.LBRACKET, TokenType.RBRACKET, TokenType.SEMICOLON,
-            TokenType.COMMA, TokenType.DOT, TokenType.COLON
-        ],
-        "Otros": [
-            TokenType.IDENTIFIER, TokenType.COMMENT, TokenType.EOF, TokenType.ERROR
-        ]
-    }
+    # Categorías de la especificación de tokens, en orden de presentación
+    TOKEN_CATEGORIES = CATEGORIES
 
     TOKEN_COLORS = {
         "Palabras Clave": "#569CD6",      # Azul
@@ -57,7 +31,7 @@ class TokenViewer:
         return "Otros"
 
     @staticmethod
-    def create_token_view(tokens: list[Token]) -> ft.Column:
+    def create_token_view(tokens: Union[list[Token], TokenBuffer]) -> ft.Column:
         """Crea una vista estructurada de tokens con categorías y estadísticas."""
         # Agrupar tokens por categoría
         tokens_by_category = {}
@@ -0,0 +1,169 @@
+"""
+Bulk lexing with a NumPy character-classification prepass.
+
+NumPy is optional: without it lex_vectorized() lexes with the regex engine.
+"""
+from bisect import bisect_left
+from sys import intern
+from .lexer import KEYWORD_TABLE, Lexer, TokenType, _MAX_KEYWORD_LENGTH, _OPERATORS
+from .token_buffer import TokenBuffer
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Character classes of the prepass
+_SPACE, _LETTER, _DIGIT, _DOT, _OPERATOR, _PAIR, _SLASH, _AMBIGUOUS = range(8)
+
+# How each candidate token is turned into a real one
+_IDENTIFIER, _INTEGER, _FLOAT, _FIXED, _FALLBACK = range(5)
+
+def _class_table():
+    """Class of every ASCII code; index 128 stands for any other character."""
+    table = np.full(129, _AMBIGUOUS, dtype=np.uint8)
+    for char in ' \t\n\r\f\v\x1c\x1d\x1e\x1f':
+        table[ord(char)] = _SPACE
+    for char in 'ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz_':
+        table[ord(char)] = _LETTER
+    for char in '0123456789':
+        table[ord(char)] = _DIGIT
+    # One-character operators, unless they start a longer one other than
+    # the same character followed by '='
+    for lexeme in _OPERATORS:
+        if len(lexeme) != 1:
+            continue
+        longer = [other for other in _OPERATORS if len(other) > 1 and other[0] == lexeme]
+        if not longer:
+            table[ord(lexeme)] = _OPERATOR
+        elif longer == [lexeme + '=']:
+            table[ord(lexeme)] = _PAIR
+    table[ord('.')] = _DOT
+    table[ord('/')] = _SLASH
+    return table
+
+_CLASS_TABLE = _class_table() if np is not None else None
+
+def lex_vectorized(text: str) -> TokenBuffer:
+    """Lex `text` into a TokenBuffer, finding most token boundaries with NumPy.
+
+    The prepass classifies every character through a lookup table and takes
+    token boundaries from class transitions: identifier and number runs,
+    single-character operators and the two-character comparisons. Strings,
+    comments, malformed numbers, chains such as '===' and anything outside
+    ASCII are left to the regex engine of Lexer (which in turn falls back to
+    the scalar engine for errors). It takes over at such a position and
+    hands back at the next boundary found by the prepass. The result is
+    identical to TokenBuffer.from_lexer() over the whole text, errors
+    included.
+    """
+    if np is None or not text:
+        return TokenBuffer.from_lexer(Lexer(text, engine='regex', span_tokens=True))
+
+    if text.isascii():
+        codes = np.frombuffer(text.encode('ascii'), dtype=np.uint8)
+    else:
+        codes = np.frombuffer(text.encode('utf-32-le'), dtype=np.uint32)
+    classes = _CLASS_TABLE[np.minimum(codes, 128)]
+    following = np.empty_like(codes)
+    following[:-1] = codes[1:]
+    following[-1] = 0
+
+    # '/' opens a comment or is a division
+    slash = classes == _SLASH
+    comment = slash & ((following == ord('/')) | (following == ord('*')))
+
+    # '=', '<' and '>' followed by '=' form a two-character operator. In a
+    # chain like '===' the pairing depends on where the chain starts: that
+    # is left to the fallback
+    pair = classes == _PAIR
+    double = pair & (following == ord('='))
+    chained = np.zeros_like(double)
+    chained[1:] = double[1:] & double[:-1]
+    chained[:-1] |= chained[1:]
+    consumed = np.zeros_like(double)
+    consumed[1:] = double[:-1]
+
+    # Runs of letters, digits and dots are identifiers or numbers
+    word = (classes == _LETTER) | (classes == _DIGIT) | (classes == _DOT)
+    before = np.zeros_like(word)
+    before[1:] = word[:-1]
+    after = np.zeros_like(word)
+    after[:-1] = word[1:]
+    run_starts = np.flatnonzero(word & ~before)
+    run_ends = np.flatnonzero(word & ~after) + 1
+    letters = np.concatenate(([0], np.cumsum(classes == _LETTER)))
+    dots = np.concatenate(([0], np.cumsum(classes == _DOT)))
+    run_letters = letters[run_ends] - letters[run_starts]
+    run_dots = dots[run_ends] - dots[run_starts]
+    first = classes[run_starts]
+    # A run followed by a character outside ASCII may go on in Lexer
+    next_code = np.append(codes, 0)[run_ends]
+    run_kinds = np.full(len(run_starts), _FALLBACK, dtype=np.uint8)
+    run_kinds[(first == _LETTER) & (run_dots == 0)] = _IDENTIFIER
+    run_kinds[(first == _DIGIT) & (run_letters == 0) & (run_dots == 0)] = _INTEGER
+    run_kinds[(first == _DIGIT) & (run_letters == 0) & (run_dots == 1)] = _FLOAT
+    run_kinds[next_code >= 128] = _FALLBACK
+
+    fixed = (((classes == _OPERATOR) | (slash & ~comment)) |
+             (pair & ~consumed & ~chained))
+    fixed_starts = np.flatnonzero(fixed)
+    fixed_lengths = np.where(double[fixed_starts], 2, 1)
+    fallback_starts = np.flatnonzero((classes == _AMBIGUOUS) | comment | (pair & chained))
+
+    starts = np.concatenate((run_starts, fixed_starts, fallback_starts))
+    ends = np.concatenate((run_ends, fixed_starts + fixed_lengths, fallback_starts + 1))
+    kinds = np.concatenate((run_kinds,
+                            np.full(len(fixed_starts), _FIXED, dtype=np.uint8),
+                            np.full(len(fallback_starts), _FALLBACK, dtype=np.uint8)))
+    order = np.argsort(starts, kind='stable')
+    starts = starts[order]
+    ends = ends[order]
+    kinds = kinds[order]
+    lines = np.searchsorted(np.flatnonzero(codes == ord('\n')), starts) + 1
+
+    return _build(text, starts.tolist(), ends.tolist(), kinds.tolist(), lines.tolist())
+
+def _build(text: str, starts, ends, kinds, lines) -> TokenBuffer:
+    """Materialize the candidate tokens, lexing the fallback regions with Lexer."""
+    buffer = TokenBuffer(text)
+    append = buffer.append
+    count = len(starts)
+    lexer = None
+    index = 0
+    while index < count:
+        start = starts[index]
+        end = ends[index]
+        kind = kinds[index]
+        if kind == _IDENTIFIER:
+            value = intern(text[start:end])
+            if end - start > _MAX_KEYWORD_LENGTH:
+                append(TokenType.IDENTIFIER, start, end - start, lines[index], value)
+            else:
+                append(KEYWORD_TABLE.get(value, TokenType.IDENTIFIER), start, end - start,
+                       lines[index], value)
+        elif kind == _FIXED:
+            value = text[start:end]
+            append(_OPERATORS[value], start, end - start, lines[index], value)
+        elif kind == _INTEGER:
+            append(TokenType.INTEGER_CONST, start, end - start, lines[index], int(text[start:end]))
+        elif kind == _FLOAT:
+            append(TokenType.FLOAT_CONST, start, end - start, lines[index], float(text[start:end]))
+        else:
+            if lexer is None:
+                lexer = Lexer(text, engine='regex', span_tokens=True)
+            lexer.seek(start)
+            # Lex until the lexer stops on a boundary found by the prepass
+            while True:
+                token = lexer.get_next_token()
+                if token.type == TokenType.EOF:
+                    return buffer
+                append(token.type, token.start, token.end - token.start, lexer.line, token.value)
+                pos = token.end
+                index = bisect_left(starts, pos, index)
+                if index < count and kinds[index] != _FALLBACK and (
+                        starts[index] == pos or text[pos:starts[index]].isspace()):
+                    break
+            continue
+        index += 1
+    return buffer